@@ -0,0 +1,117 @@
+"""
+Resolution-time and SLA analytics over columnar ticket data.
+
+All calculations are vectorized NumPy operations on whole columns
+(status, created_at, updated_at, due_date, ...), so they stay fast with
+millions of tickets. Resolution times are sorted once; each group breakdown
+then reads percentiles directly from its slice of that order.
+"""
+
+import numpy as np
+import pandas as pd
+
+DONE_STATUSES = ['Resolved', 'Closed']
+PERCENTILES = (50, 90, 99)
+BREAKDOWNS = [
+    ('by_problem_type', 'problem_type'),
+    ('by_block', 'block_no'),
+    ('by_assignee', 'assigned_to')
+]
+
+def _as_datetime(values):
+    # ISO8601 parses each value on its own: SQLite text mixes '%H:%M:%S' and '%H:%M:%S.%f'
+    return pd.to_datetime(pd.Series(values), format='ISO8601', errors='coerce').values.astype('datetime64[s]')
+
+def _encode(values):
+    """Integer group codes and their labels (hash-based, no string sort)"""
+    codes, labels = pd.factorize(pd.Series(values).fillna('').astype(str))
+    return codes, [str(label) for label in labels]
+
+def grouped_percentiles(group_index, sorted_values, group_count, percentiles=PERCENTILES):
+    """Linear-interpolated percentiles per group, shape (group_count, len(percentiles))
+
+    sorted_values must be in ascending order and group_index aligned with it;
+    a stable sort on the small integer group codes then leaves every group's
+    values contiguous and still sorted.
+    """
+    result = np.full((group_count, len(percentiles)), np.nan)
+    if len(sorted_values) == 0:
+        return result
+    sorted_values = sorted_values[np.argsort(group_index, kind='stable')]
+    counts = np.bincount(group_index, minlength=group_count)
+    offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    has_data = counts > 0
+    for i, pct in enumerate(percentiles):
+        position = (counts[has_data] - 1) * pct / 100.0
+        lower = np.floor(position).astype(int)
+        upper = np.ceil(position).astype(int)
+        base = offsets[has_data]
+        low_values = sorted_values[base + lower]
+        high_values = sorted_values[base + upper]
+        result[has_data, i] = low_values + (high_values - low_values) * (position - lower)
+    return result
+
+def _summaries(labels, total, resolved, percentiles, sla_met, sla_due):
+    rows = []
+    for i, label in enumerate(labels):
+        row = {
+            'name': label,
+            'total': int(total[i]),
+            'resolved': int(resolved[i]),
+            'sla_hit_rate': round(float(sla_met[i] / sla_due[i]) * 100, 1) if sla_due[i] else None
+        }
+        for j, pct in enumerate(PERCENTILES):
+            value = percentiles[i, j]
+            row[f'p{pct}_hours'] = None if np.isnan(value) else round(float(value), 1)
+        rows.append(row)
+    rows.sort(key=lambda r: r['total'], reverse=True)
+    return rows
+
+def resolution_analytics(columns):
+    """Resolution-time distribution and SLA hit rate, overall and per group
+
+    `columns` maps status, created_at, updated_at, due_date, problem_type,
+    block_no and assigned_to (and optionally status_changed_at) to
+    equal-length arrays (a DataFrame works). Resolution time runs from
+    created_at to when a Resolved/Closed ticket entered that status:
+    status_changed_at, or updated_at where it is missing (bulk-loaded rows,
+    CSV), so editing notes afterwards doesn't stretch it. The SLA is met
+    when that moment falls on or before due_date.
+    """
+    count = len(columns['status'])
+    created = _as_datetime(columns['created_at'])
+    finished = _as_datetime(columns['updated_at'])
+    if 'status_changed_at' in columns:
+        changed = _as_datetime(columns['status_changed_at'])
+        finished = np.where(np.isnat(changed), finished, changed)
+    due = _as_datetime(columns['due_date']).astype('datetime64[D]')
+
+    done = pd.Series(columns['status']).isin(DONE_STATUSES).values & ~np.isnat(created) & ~np.isnat(finished)
+    hours = np.clip((finished - created).astype('timedelta64[s]').astype(float) / 3600.0, 0, None)
+    with_due = done & ~np.isnat(due)
+    met = with_due & (finished.astype('datetime64[D]') <= due)
+
+    value_order = np.argsort(hours[done], kind='stable')
+    done_hours = hours[done][value_order]
+    overall = {
+        'total': count,
+        'resolved': int(done.sum()),
+        'sla_tracked': int(with_due.sum()),
+        'sla_hit_rate': round(float(met.sum() / with_due.sum()) * 100, 1) if with_due.any() else None
+    }
+    for pct, value in zip(PERCENTILES, np.percentile(done_hours, PERCENTILES) if len(done_hours) else [None] * 3):
+        overall[f'p{pct}_hours'] = None if value is None else round(float(value), 1)
+
+    result = {'overall': overall}
+    for key, column in BREAKDOWNS:
+        group_index, labels = _encode(columns[column])
+        groups = len(labels)
+        result[key] = _summaries(
+            labels,
+            np.bincount(group_index, minlength=groups),
+            np.bincount(group_index, weights=done, minlength=groups),
+            grouped_percentiles(group_index[done][value_order], done_hours, groups),
+            np.bincount(group_index, weights=met, minlength=groups),
+            np.bincount(group_index, weights=with_due, minlength=groups)
+        )
+    return result
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the ticket storage backends.
+
+Seeds SQLite and CSV stores with 1k / 100k / 1M tickets and times the core
+operations (add, update, delete, list, next ID, CSV migration and report
+generation). Results are written as JSON so scaling regressions show up as
+numbers that can be compared between runs.
+
+--report-scaling instead times the reports summary against the old
+per-block loop as the number of blocks and tickets grows.
+
+--write-contention has many concurrent clients submit tickets to SQLite,
+once with a transaction per ticket and once through the group-commit queue.
+
+Usage:
+    python benchmark.py
+    python benchmark.py --sizes 1000 100000 --backends sqlite --output bench.json
+    python benchmark.py --report-scaling --sizes 10000 100000 --blocks 5 50 500
+    python benchmark.py --write-contention --clients 1 8 32
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import enhanced_app
+from database import DatabaseManager
+from data_generator import TicketGenerator, write_csv, insert_database, to_records
+from write_queue import WriteQueue
+
+DEFAULT_SIZES = [1000, 100000, 1000000]
+BACKENDS = ['sqlite', 'csv']
+SEED_END_DATE = '2025-12-31'  # Fixed so every run seeds identical data
+REPORT_SCALING_BLOCKS = [5, 50, 500]
+WRITE_CONTENTION_CLIENTS = [1, 8, 32]
+
+def use_backend(backend, workdir):
+    """Point the app-level storage functions at a fresh store in workdir"""
+    csv_path = os.path.join(workdir, 'tickets.csv')
+    enhanced_app.CSV_FILE = csv_path
+    if backend == 'sqlite':
+        enhanced_app.USE_DATABASE = True
+        enhanced_app.db_manager = DatabaseManager(f'sqlite:///{os.path.join(workdir, "tickets.db")}')
+    else:
+        enhanced_app.USE_DATABASE = False
+    return csv_path
+
+def time_operation(func, iterations):
+    """Run func(i) `iterations` times and return per-call timings in seconds"""
+    timings = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        func(i)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def summarize(backend, size, operation, timings, rows=None):
+    total = sum(timings)
+    result = {
+        'backend': backend,
+        'size': size,
+        'operation': operation,
+        'iterations': len(timings),
+        'total_s': round(total, 6),
+        'mean_ms': round(statistics.mean(timings) * 1000, 3),
+        'p50_ms': round(statistics.median(timings) * 1000, 3),
+        'max_ms': round(max(timings) * 1000, 3)
+    }
+    if rows is not None and total > 0:
+        result['rows_per_sec'] = round(rows * len(timings) / total, 1)
+    print(f"  {backend:<7} {size:>9,} {operation:<20} mean {result['mean_ms']:>11.3f} ms")
+    return result
+
+def benchmark_backend(backend, size, repeat, migrate_limit):
+    """Seed one backend and time every operation against it"""
+    results = []
+    workdir = tempfile.mkdtemp(prefix=f'bench_{backend}_')
+    try:
+        csv_path = use_backend(backend, workdir)
+        start = time.perf_counter()
+        if backend == 'sqlite':
+            insert_database(enhanced_app.db_manager, size, TicketGenerator(end_date=SEED_END_DATE), start=1)
+        else:
+            write_csv(csv_path, size, TicketGenerator(end_date=SEED_END_DATE))
+        results.append(summarize(backend, size, 'seed', [time.perf_counter() - start], rows=size))
+
+        scan_repeat = 3 if size <= 100000 else 1
+        rng = random.Random(size)
+        existing = [f'TKT{rng.randint(1, size):03d}' for _ in range(repeat)]
+
+        results.append(summarize(backend, size, 'get_next_ticket_id', time_operation(
+            lambda i: enhanced_app.get_next_ticket_id(), repeat)))
+
+        new_tickets = to_records(TicketGenerator(end_date=SEED_END_DATE, seed=7).chunk(size + 1, repeat))
+        results.append(summarize(backend, size, 'add_ticket', time_operation(
+            lambda i: enhanced_app.add_ticket(new_tickets[i]), repeat)))
+
+        results.append(summarize(backend, size, 'update_ticket', time_operation(
+            lambda i: enhanced_app.update_ticket_data(existing[i], 'Status', 'Resolved'), repeat)))
+
+        results.append(summarize(backend, size, 'delete_ticket', time_operation(
+            lambda i: enhanced_app.delete_ticket_data(new_tickets[i]['Ticket ID']), repeat)))
+
+        results.append(summarize(backend, size, 'get_all_tickets', time_operation(
+            lambda i: enhanced_app.get_all_tickets(), scan_repeat), rows=size))
+
+        results.append(summarize(backend, size, 'report_generation', time_operation(
+            lambda i: enhanced_app.build_reports_data(enhanced_app.get_status_counts()), scan_repeat), rows=size))
+
+        if backend == 'sqlite':
+            # Migration inserts row by row; cap the source so large runs finish
+            migrate_rows = min(size, migrate_limit)
+            source_csv = os.path.join(workdir, 'migrate_source.csv')
+            write_csv(source_csv, migrate_rows, TicketGenerator(end_date=SEED_END_DATE))
+
+            def migrate(i):
+                target = DatabaseManager(f'sqlite:///{os.path.join(workdir, f"migrate_{i}.db")}')
+                target.create_tables()
+                target.migrate_from_csv(source_csv)
+                target.engine.dispose()
+            timings = time_operation(migrate, 1)
+            result = summarize(backend, size, 'migrate_from_csv', timings, rows=migrate_rows)
+            result['rows'] = migrate_rows
+            results.append(result)
+    finally:
+        if enhanced_app.USE_DATABASE:
+            enhanced_app.db_manager.engine.dispose()
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+def legacy_block_summary(df):
+    """The per-block filtering loop the reports page used before the single-pass summary"""
+    block_summary = {}
+    for block in df['Block No'].unique():
+        block_df = df[df['Block No'] == block]
+        block_summary[block] = {
+            'total': len(block_df),
+            'open': len(block_df[block_df['Status'] == 'Open']),
+            'in_progress': len(block_df[block_df['Status'] == 'In Progress']),
+            'resolved': len(block_df[block_df['Status'] == 'Resolved']),
+            'completed': len(block_df[block_df['Status'].isin(['Resolved', 'Closed'])])
+        }
+    return block_summary
+
+def benchmark_report_scaling(sizes, block_counts, repeat=3):
+    """Time the reports summary and the old per-block loop on in-memory columns"""
+    results = []
+    for size in sizes:
+        chunk = TicketGenerator(end_date=SEED_END_DATE).chunk(1, size)
+        for blocks in block_counts:
+            labels = np.array([f'Block {n}' for n in range(blocks)], dtype=object)
+            block_no = labels[np.random.default_rng(blocks).integers(0, blocks, size)]
+            legacy = pd.DataFrame({'Block No': block_no, 'Status': chunk['Status'].values})
+            columns = pd.DataFrame({'block_no': block_no, 'problem_type': chunk['Problem Type'].values,
+                                    'status': chunk['Status'].values})
+
+            label = f'{blocks}_blocks'
+            results.append(summarize('memory', size, f'report_{label}', time_operation(
+                lambda i: enhanced_app.build_reports_data(enhanced_app.count_by_status(columns)), repeat),
+                rows=size))
+            results.append(summarize('memory', size, f'legacy_{label}', time_operation(
+                lambda i: legacy_block_summary(legacy), repeat), rows=size))
+    return results
+
+def benchmark_write_contention(client_counts, tickets_per_client=50):
+    """Concurrent submissions with a transaction per ticket vs the group-commit queue"""
+    results = []
+    original = (enhanced_app.USE_DATABASE, enhanced_app.CSV_FILE, enhanced_app.db_manager, enhanced_app.write_queue)
+    try:
+        for clients in client_counts:
+            tickets = to_records(TicketGenerator(end_date=SEED_END_DATE, seed=clients).chunk(
+                1, clients * tickets_per_client))
+            for mode in ('direct', 'queued'):
+                workdir = tempfile.mkdtemp(prefix='bench_writes_')
+                try:
+                    use_backend('sqlite', workdir)
+                    enhanced_app.db_manager.create_tables()
+                    enhanced_app.write_queue = WriteQueue() if mode == 'queued' else None
+                    ticket_ids = []
+                    lock = threading.Lock()
+
+                    def client(n):
+                        for ticket in tickets[n::clients]:
+                            ticket_id = enhanced_app.save_new_ticket(dict(ticket))
+                            with lock:
+                                ticket_ids.append(ticket_id)
+
+                    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+                    start = time.perf_counter()
+                    for thread in threads:
+                        thread.start()
+                    for thread in threads:
+                        thread.join()
+                    elapsed = time.perf_counter() - start
+
+                    saved = [ticket_id for ticket_id in ticket_ids if ticket_id]
+                    result = {
+                        'backend': 'sqlite',
+                        'operation': f'submit_{mode}',
+                        'clients': clients,
+                        'tickets': len(tickets),
+                        'total_s': round(elapsed, 3),
+                        'tickets_per_sec': round(len(saved) / elapsed, 1),
+                        'failed': len(ticket_ids) - len(saved),
+                        'duplicate_ids': len(saved) - len(set(saved)),
+                        'stored': len(enhanced_app.db_manager.get_all_tickets())
+                    }
+                    print(f"  {mode:<7} {clients:>3} clients {result['tickets_per_sec']:>9.1f} tickets/s "
+                          f"failed {result['failed']} duplicate IDs {result['duplicate_ids']}")
+                    results.append(result)
+                finally:
+                    enhanced_app.db_manager.engine.dispose()
+                    shutil.rmtree(workdir, ignore_errors=True)
+    finally:
+        enhanced_app.USE_DATABASE, enhanced_app.CSV_FILE, enhanced_app.db_manager, enhanced_app.write_queue = original
+    return results
+
+def run_benchmarks(sizes, backends, repeat=10, migrate_limit=10000):
+    """Run the suite and return the JSON-serializable result document"""
+    original = (enhanced_app.USE_DATABASE, enhanced_app.CSV_FILE, getattr(enhanced_app, 'db_manager', None))
+    results = []
+    try:
+        for size in sizes:
+            for backend in backends:
+                results.extend(benchmark_backend(backend, size, repeat, migrate_limit))
+    finally:
+        enhanced_app.USE_DATABASE, enhanced_app.CSV_FILE, enhanced_app.db_manager = original
+    return {
+        'meta': {
+            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'sizes': sizes,
+            'backends': backends,
+            'repeat': repeat,
+            'migrate_limit': migrate_limit
+        },
+        'results': results
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark ticket storage backends')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='Ticket counts to seed (default: 1000 100000 1000000)')
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=BACKENDS)
+    parser.add_argument('--repeat', type=int, default=10,
+                        help='Iterations for single-ticket operations')
+    parser.add_argument('--migrate-limit', type=int, default=10000,
+                        help='Maximum rows used for the migrate_from_csv benchmark')
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--report-scaling', action='store_true',
+                        help='Compare the reports summary with the old per-block loop instead')
+    parser.add_argument('--blocks', type=int, nargs='+', default=REPORT_SCALING_BLOCKS,
+                        help='Distinct block counts for --report-scaling (default: 5 50 500)')
+    parser.add_argument('--write-contention', action='store_true',
+                        help='Compare per-ticket commits with the group-commit write queue instead')
+    parser.add_argument('--clients', type=int, nargs='+', default=WRITE_CONTENTION_CLIENTS,
+                        help='Concurrent submitters for --write-contention (default: 1 8 32)')
+    args = parser.parse_args()
+
+    if args.write_contention:
+        print(f"Running write contention benchmark for {args.clients} clients...")
+        report = {
+            'meta': {
+                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'python': platform.python_version(),
+                'clients': args.clients
+            },
+            'results': benchmark_write_contention(args.clients)
+        }
+    elif args.report_scaling:
+        print(f"Running report scaling benchmark for sizes {args.sizes} and blocks {args.blocks}...")
+        report = {
+            'meta': {
+                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'python': platform.python_version(),
+                'sizes': args.sizes,
+                'blocks': args.blocks
+            },
+            'results': benchmark_report_scaling(args.sizes, args.blocks)
+        }
+    else:
+        print(f"Running benchmarks for sizes {args.sizes} on {', '.join(args.backends)}...")
+        report = run_benchmarks(args.sizes, args.backends, args.repeat, args.migrate_limit)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Benchmark baseline store and regression gate.
+
+Runs the project's benchmarks (storage operations from benchmark.py,
+/reports and /export through the Flask test client, and the HTTP load test
+from load_test.py), flattens them into named metrics and compares them
+against a versioned JSON baseline kept in benchmarks/. Exits non-zero with
+a readable diff when any metric regresses beyond its tolerance, or when a
+data-integrity count (http.integrity.*) is not zero.
+
+Usage:
+    python benchmark_gate.py                      # run the quick profile and compare
+    python benchmark_gate.py --update-baseline    # run and save a new baseline
+    python benchmark_gate.py --tolerance 0.2 --tolerance-for 'http.*=0.5'
+    python benchmark_gate.py --compare old.json new.json
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import enhanced_app
+import benchmark
+import load_test
+from data_generator import TicketGenerator, write_csv, insert_database
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks')
+SCHEMA_VERSION = 1
+
+PROFILES = {
+    'quick': {
+        'db_sizes': [1000, 10000],
+        'repeat': 5,
+        'migrate_limit': 1000,
+        'app_size': 5000,
+        'app_repeat': 3,
+        'http_clients': 5,
+        'http_duration': 5
+    },
+    'full': {
+        'db_sizes': [1000, 100000, 1000000],
+        'repeat': 10,
+        'migrate_limit': 10000,
+        'app_size': 100000,
+        'app_repeat': 3,
+        'http_clients': 20,
+        'http_duration': 30
+    }
+}
+
+# Metric name suffixes and whether a larger value is better
+HIGHER_IS_BETTER = ('rows_per_sec', 'throughput_rps')
+DEFAULT_TOLERANCE = 0.30
+DEFAULT_MIN_DELTA_MS = 2.0  # Ignore sub-noise changes on very fast operations
+# Correctness counts, not timings: any non-zero value fails, whatever the baseline says
+ABSOLUTE_ZERO_METRICS = ('*.integrity.*',)
+
+def run_db_suite(profile):
+    """Storage operation timings from benchmark.py"""
+    report = benchmark.run_benchmarks(profile['db_sizes'], benchmark.BACKENDS,
+                                      profile['repeat'], profile['migrate_limit'])
+    metrics = {}
+    for result in report['results']:
+        if result['operation'] == 'seed':
+            continue
+        prefix = f"db.{result['backend']}.{result['size']}.{result['operation']}"
+        metrics[f'{prefix}.mean_ms'] = result['mean_ms']
+        if 'rows_per_sec' in result:
+            metrics[f'{prefix}.rows_per_sec'] = result['rows_per_sec']
+    return metrics
+
+def run_app_suite(profile):
+    """Timings of /reports and /export through the Flask test client"""
+    metrics = {}
+    size = profile['app_size']
+    original = (enhanced_app.USE_DATABASE, enhanced_app.CSV_FILE, enhanced_app.db_manager)
+    try:
+        for backend in benchmark.BACKENDS:
+            workdir = tempfile.mkdtemp(prefix=f'gate_{backend}_')
+            cwd = os.getcwd()
+            try:
+                os.chdir(workdir)  # /export writes its workbook to the working directory
+                csv_path = benchmark.use_backend(backend, workdir)
+                generator = TicketGenerator(end_date=benchmark.SEED_END_DATE)
+                write_csv(csv_path, size, generator)
+                if backend == 'sqlite':
+                    insert_database(enhanced_app.db_manager, size,
+                                    TicketGenerator(end_date=benchmark.SEED_END_DATE), start=1)
+
+                client = enhanced_app.app.test_client()
+                with client.session_transaction() as session:
+                    session['logged_in'] = True
+                    session['username'] = 'admin'
+                    session['role'] = 'admin'
+
+                for name, path in (('reports', '/reports'), ('export', '/export')):
+                    timings = []
+                    for _ in range(profile['app_repeat']):
+                        start = time.perf_counter()
+                        response = client.get(path)
+                        timings.append(time.perf_counter() - start)
+                        if response.status_code != 200:
+                            raise RuntimeError(f'{path} returned HTTP {response.status_code} on {backend}')
+                    mean_ms = round(sum(timings) / len(timings) * 1000, 3)
+                    metrics[f'app.{backend}.{size}.{name}.mean_ms'] = mean_ms
+                    print(f"  {backend:<7} {size:>9,} {path:<20} mean {mean_ms:>11.3f} ms")
+            finally:
+                os.chdir(cwd)
+                if enhanced_app.USE_DATABASE:
+                    enhanced_app.db_manager.engine.dispose()
+                shutil.rmtree(workdir, ignore_errors=True)
+    finally:
+        enhanced_app.USE_DATABASE, enhanced_app.CSV_FILE, enhanced_app.db_manager = original
+    return metrics
+
+def run_http_suite(profile):
+    """Per-endpoint latency and throughput from the HTTP load test"""
+    workdir = tempfile.mkdtemp(prefix='gate_http_')
+    process = None
+    try:
+        process, base_url = load_test.start_server(load_test.DEFAULT_PORT, workdir, rate_limit=False)
+        report = load_test.run_load_test(base_url, profile['http_clients'], profile['http_duration'],
+                                           seed_tickets=20)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    metrics = {}
+    for row in report['endpoints']:
+        prefix = f"http.{row['endpoint']}"
+        metrics[f'{prefix}.p95_ms'] = row['p95_ms']
+        metrics[f'{prefix}.throughput_rps'] = row['throughput_rps']
+        metrics[f'{prefix}.error_rate'] = row['error_rate']
+    integrity = report['integrity']
+    metrics['http.integrity.problems'] = (len(integrity['duplicate_ticket_ids']) +
+                                          len(integrity['lost_submissions']) +
+                                          len(integrity['lost_updates']))
+    return metrics
+
+SUITES = {
+    'db': run_db_suite,
+    'app': run_app_suite,
+    'http': run_http_suite
+}
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+def run_profile(profile_name, suites):
+    profile = PROFILES[profile_name]
+    metrics = {}
+    for suite in suites:
+        print(f"Running {suite} benchmarks ({profile_name} profile)...")
+        metrics.update(SUITES[suite](profile))
+    return {
+        'schema_version': SCHEMA_VERSION,
+        'meta': {
+            'profile': profile_name,
+            'suites': suites,
+            'git_commit': git_commit(),
+            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform()
+        },
+        'metrics': metrics
+    }
+
+def baseline_path(profile_name):
+    return os.path.join(BASELINE_DIR, f'baseline_{profile_name}.json')
+
+def load_run(path):
+    with open(path) as f:
+        run = json.load(f)
+    if run.get('schema_version') != SCHEMA_VERSION:
+        raise ValueError(f'{path} has schema version {run.get("schema_version")}, expected {SCHEMA_VERSION}')
+    return run
+
+def higher_is_better(metric):
+    return metric.endswith(HIGHER_IS_BETTER)
+
+def must_be_zero(metric):
+    return any(fnmatch.fnmatch(metric, pattern) for pattern in ABSOLUTE_ZERO_METRICS)
+
+def tolerance_for(metric, default, overrides):
+    for pattern, tolerance in overrides:
+        if fnmatch.fnmatch(metric, pattern):
+            return tolerance
+    return default
+
+def compare_runs(baseline, current, tolerance=DEFAULT_TOLERANCE, overrides=(), min_delta_ms=DEFAULT_MIN_DELTA_MS):
+    """Classify every metric as regressed, improved, unchanged, new or missing"""
+    rows = []
+    # Only compare suites that ran in the current run
+    suites = set(current['meta'].get('suites') or SUITES)
+    base_metrics = {name: value for name, value in baseline['metrics'].items()
+                    if name.split('.', 1)[0] in suites}
+    current_metrics = current['metrics']
+    for metric in sorted(set(base_metrics) | set(current_metrics)):
+        old = base_metrics.get(metric)
+        new = current_metrics.get(metric)
+        if must_be_zero(metric):
+            change = None if old is None or new is None else new - old
+            rows.append((metric, old, new, change, 'missing' if new is None else 'REGRESSED' if new else 'ok'))
+            continue
+        if old is None:
+            rows.append((metric, old, new, None, 'new'))
+            continue
+        if new is None:
+            rows.append((metric, old, new, None, 'missing'))
+            continue
+        change = (new - old) / old if old else (0.0 if new == old else float('inf'))
+        worse = -change if higher_is_better(metric) else change
+        allowed = tolerance_for(metric, tolerance, overrides)
+        if metric.endswith('_ms') and abs(new - old) < min_delta_ms:
+            status = 'ok'
+        elif worse > allowed:
+            status = 'REGRESSED'
+        elif worse < -allowed:
+            status = 'improved'
+        else:
+            status = 'ok'
+        rows.append((metric, old, new, change, status))
+    return rows
+
+def print_diff(rows, verbose=False):
+    print("=" * 96)
+    print(f"{'Metric':<52}{'Baseline':>12}{'Current':>12}{'Change':>10}  Status")
+    print("-" * 96)
+    for metric, old, new, change, status in rows:
+        if status == 'ok' and not verbose:
+            continue
+        old_text = '-' if old is None else f'{old:g}'
+        new_text = '-' if new is None else f'{new:g}'
+        if change is None:
+            change_text = ''
+        elif must_be_zero(metric):
+            change_text = f'{change:+g}'
+        else:
+            change_text = f'{change:+.1%}'
+        print(f"{metric:<52}{old_text:>12}{new_text:>12}{change_text:>10}  {status}")
+    counts = {}
+    for row in rows:
+        counts[row[4]] = counts.get(row[4], 0) + 1
+    print("-" * 96)
+    print(', '.join(f'{count} {status}' for status, count in sorted(counts.items())))
+    print("=" * 96)
+
+def parse_overrides(values):
+    overrides = []
+    for value in values or []:
+        pattern, _, tolerance = value.rpartition('=')
+        if not pattern:
+            raise argparse.ArgumentTypeError(f'Expected PATTERN=TOLERANCE, got {value!r}')
+        overrides.append((pattern, float(tolerance)))
+    return overrides
+
+def main():
+    parser = argparse.ArgumentParser(description='Run benchmarks and gate on regressions against a baseline')
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='quick')
+    parser.add_argument('--suites', nargs='+', choices=list(SUITES), default=list(SUITES))
+    parser.add_argument('--update-baseline', action='store_true',
+                        help='Save this run as the baseline for the profile instead of comparing')
+    parser.add_argument('--baseline', help='Baseline file (default: benchmarks/baseline_<profile>.json)')
+    parser.add_argument('--output', help='Also write this run to a JSON file')
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'),
+                        help='Compare two saved runs without running anything')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Allowed relative regression (default: 0.30 = 30%%)')
+    parser.add_argument('--tolerance-for', action='append', metavar='PATTERN=TOLERANCE',
+                        help="Per-metric tolerance, e.g. 'http.*.p95_ms=0.5' (repeatable)")
+    parser.add_argument('--min-delta-ms', type=float, default=DEFAULT_MIN_DELTA_MS,
+                        help='Ignore timing changes smaller than this many milliseconds')
+    parser.add_argument('--verbose', action='store_true', help='Show unchanged metrics too')
+    args = parser.parse_args()
+    overrides = parse_overrides(args.tolerance_for)
+
+    if args.compare:
+        baseline, current = load_run(args.compare[0]), load_run(args.compare[1])
+    else:
+        current = run_profile(args.profile, args.suites)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(current, f, indent=2, sort_keys=True)
+        path = args.baseline or baseline_path(args.profile)
+        if args.update_baseline:
+            problems = {name: value for name, value in current['metrics'].items() if must_be_zero(name) and value}
+            if problems:
+                print(f"Not saving a baseline with data-integrity problems: {problems}")
+                return 1
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                json.dump(current, f, indent=2, sort_keys=True)
+                f.write('\n')
+            print(f"Baseline saved to {path} ({len(current['metrics'])} metrics)")
+            return 0
+        if not os.path.exists(path):
+            print(f"No baseline at {path}. Run with --update-baseline first.")
+            return 2
+        baseline = load_run(path)
+
+    rows = compare_runs(baseline, current, args.tolerance, overrides, args.min_delta_ms)
+    print(f"\nBaseline: {baseline['meta'].get('git_commit') or 'unknown'} ({baseline['meta'].get('timestamp', '')})")
+    print_diff(rows, args.verbose)
+    regressions = [row for row in rows if row[4] == 'REGRESSED']
+    if regressions:
+        print(f"❌ {len(regressions)} metric(s) regressed beyond tolerance")
+        return 1
+    print("✅ No regressions beyond tolerance")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""
+Shared pytest fixtures: a throwaway SQLite database per test, a factory
+for the ticket dicts /submit builds, and a short ticket history written
+through the same paths as the app.
+"""
+
+import pytest
+from database import DatabaseManager
+
+@pytest.fixture
+def manager(tmp_path):
+    """DatabaseManager on an empty SQLite file"""
+    manager = DatabaseManager(f"sqlite:///{tmp_path / 'tickets.db'}")
+    manager.create_tables()
+    yield manager
+    manager.engine.dispose()
+
+@pytest.fixture
+def ticket_data():
+    """Builds a submitted ticket dict; keyword arguments override its CSV-header fields"""
+    def build(**fields):
+        data = {
+            'Flat No': '101',
+            'Block No': 'A',
+            'Problem Type': 'Plumbing',
+            'Date Raised': '2026-01-05',
+            'Contact Number': '9876543210',
+            'Description': 'Leaking tap',
+            'Status': 'Open',
+            'Due Date': '2026-01-12',
+            'Created At': '2026-01-05 08:00:00',
+            'Updated At': '2026-01-05 08:00:00'
+        }
+        data.update({key.replace('_', ' '): value for key, value in fields.items()})
+        return data
+    return build
+
+@pytest.fixture
+def history(manager, ticket_data):
+    """Tickets raised days ago, then resolved, closed, reopened and edited through the write paths"""
+    for number, (block, problem, status) in enumerate([
+            ('A', 'Plumbing', 'Open'), ('A', 'Plumbing', 'Open'), ('A', 'Electrical', 'Open'),
+            ('B', 'Plumbing', 'Resolved'), ('B', 'Civil', 'Open'), ('B', 'Civil', 'Closed')], start=1):
+        manager.add_ticket(ticket_data(Ticket_ID=f'TKT{number:03d}', Flat_No=str(100 + number), Block_No=block,
+                                       Problem_Type=problem, Status=status,
+                                       Created_At=f'2026-01-0{number} 08:00:00',
+                                       Updated_At=f'2026-01-0{number} 09:30:00'))
+    manager.update_ticket('TKT001', 'status', 'Resolved')
+    manager.update_ticket('TKT001', 'status', 'Closed')
+    manager.update_ticket('TKT002', 'status', 'Resolved')
+    manager.update_ticket('TKT002', 'status', 'Open')  # Reopened: no longer resolved
+    manager.update_ticket('TKT004', 'notes', 'Checked again')  # Notes edits don't move the resolution time
+    manager.update_ticket('TKT005', 'status', 'Closed')
+    return manager
+
+@pytest.fixture
+def app_client(tmp_path, monkeypatch):
+    """Flask test client on an empty CSV backend, working in tmp_path"""
+    import enhanced_app
+    monkeypatch.chdir(tmp_path)  # /export writes its workbook to the working directory
+    monkeypatch.setattr(enhanced_app, 'USE_DATABASE', False)
+    monkeypatch.setattr(enhanced_app, 'CSV_FILE', str(tmp_path / 'tickets.csv'))
+    enhanced_app.initialize_csv()
+    return enhanced_app.app.test_client()
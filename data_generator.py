@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Synthetic ticket data generator for scale testing and capacity planning.
+
+Produces tickets with realistic distributions across blocks, problem types,
+statuses and staff, with plausible dates, due dates and text lengths. Rows
+are generated in vectorized NumPy chunks and streamed straight to a CSV
+file or bulk inserted into any get_database_config() backend, so
+multi-million-row datasets can be built in minutes.
+
+Usage:
+    python data_generator.py 100000 --csv tickets_100k.csv
+    python data_generator.py 10000000 --database
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+from database import DatabaseManager, Ticket, get_database_config
+from ticket_options import CSV_HEADERS, BLOCK_OPTIONS, PROBLEM_TYPES, STATUS_OPTIONS, STAFF_MEMBERS
+
+# Residential blocks raise most tickets; common areas far fewer
+BLOCK_WEIGHTS = {
+    'A': 10, 'B': 10, 'C': 10, 'D': 10, 'P': 9, 'Q': 9, 'R': 9, 'S': 9, 'T': 8, 'U': 8,
+    'General Area': 3, 'Basement Parking': 2, 'Podium': 1.5, 'Club House': 1.5
+}
+PROBLEM_WEIGHTS = {
+    'Plumbing': 18, 'Electrical': 15, 'Water Supply': 10, 'Light': 9, 'Drainage': 8,
+    'Civil': 7, 'Door/Window': 6, 'Cleaning': 6, 'AC/Heating': 5, 'Elevator': 4,
+    'Painting': 4, 'Flooring': 3, 'Security': 3, 'Other': 3
+}
+# Staff member who normally handles each problem type
+PROBLEM_STAFF = {
+    'Plumbing': 'John Doe (Plumber)', 'Water Supply': 'John Doe (Plumber)', 'Drainage': 'John Doe (Plumber)',
+    'Electrical': 'Jane Smith (Electrician)', 'Light': 'Jane Smith (Electrician)',
+    'AC/Heating': 'Jane Smith (Electrician)', 'Elevator': 'Jane Smith (Electrician)',
+    'Cleaning': 'Sarah Wilson (Cleaner)'
+}
+DEFAULT_STAFF = 'Mike Johnson (Maintenance)'
+DONE_STATUSES = ['Resolved', 'Closed']
+OPEN_STATUS_WEIGHTS = {'Open': 50, 'In Progress': 40, 'On Hold': 10}
+DUE_DAYS = 7  # Matches calculate_due_date() in enhanced_app.py
+
+DESCRIPTION_WORDS = {
+    'Plumbing': ['leak', 'tap', 'pipe', 'bathroom', 'kitchen', 'sink', 'flush', 'dripping', 'pressure', 'valve'],
+    'Electrical': ['switch', 'socket', 'wiring', 'tripping', 'MCB', 'sparking', 'fan', 'power', 'board', 'short'],
+    'Water Supply': ['no water', 'low pressure', 'tank', 'overhead', 'muddy', 'supply', 'motor', 'line'],
+    'Light': ['bulb', 'tube light', 'corridor', 'staircase', 'flickering', 'fused', 'lobby', 'lamp'],
+    'Drainage': ['blocked', 'overflow', 'smell', 'drain', 'sewage', 'chamber', 'backflow', 'clogged'],
+    'Civil': ['crack', 'plaster', 'seepage', 'wall', 'ceiling', 'dampness', 'tiles', 'balcony'],
+    'Door/Window': ['hinge', 'lock', 'glass', 'sliding', 'handle', 'jammed', 'latch', 'frame'],
+    'Cleaning': ['garbage', 'corridor', 'dust', 'stairs', 'spill', 'lift lobby', 'terrace', 'waste'],
+    'AC/Heating': ['not cooling', 'geyser', 'heater', 'noise', 'water leak', 'remote', 'compressor'],
+    'Elevator': ['stuck', 'door', 'noise', 'button', 'jerking', 'display', 'alarm', 'floor level'],
+    'Painting': ['peeling', 'patches', 'repaint', 'stain', 'fading', 'touch up', 'exterior'],
+    'Flooring': ['loose tile', 'crack', 'hollow', 'grout', 'uneven', 'marble', 'chipped'],
+    'Security': ['gate', 'CCTV', 'intercom', 'visitor', 'guard', 'access card', 'boom barrier'],
+    'Other': ['request', 'inspection', 'noise', 'pest', 'parking', 'signage', 'misc']
+}
+FILLER_WORDS = ['the', 'in', 'near', 'since', 'yesterday', 'please', 'check', 'urgent', 'again', 'not', 'working', 'flat']
+ACTION_PHRASES = ['Inspected and fixed', 'Replaced part', 'Cleaned and cleared', 'Repaired on site',
+                  'Vendor called', 'Temporary fix applied', 'Adjusted and tested', 'Resealed']
+NOTE_PHRASES = ['Resident informed', 'Follow up next week', 'Spare part ordered', 'Recurring issue',
+                'Checked with resident', 'Access given by owner', 'Materials from store']
+
+TEXT_POOL_SIZE = 2048
+DEFAULT_CHUNK_SIZE = 100000
+
+def _weights(options, weights):
+    """Options with normalized probabilities; options without a weight get 1"""
+    values = np.array([weights.get(option, 1) for option in options], dtype=float)
+    return list(options), values / values.sum()
+
+def _text_pool(rng, words, mean_words, max_words, filler=True):
+    """Pre-generated texts with log-normal lengths; rows index into the pool"""
+    lengths = np.clip(rng.lognormal(np.log(mean_words), 0.6, TEXT_POOL_SIZE).astype(int), 1, max_words)
+    vocabulary = np.array(words + (FILLER_WORDS if filler else []), dtype=object)
+    pool = [' '.join(rng.choice(vocabulary, n)).capitalize() for n in lengths]
+    return np.array(pool, dtype=object)
+
+class TicketGenerator:
+    """Vectorized generator yielding DataFrames of synthetic tickets"""
+
+    def __init__(self, days=730, end_date=None, seed=42):
+        self.rng = np.random.default_rng(seed)
+        self.days = days
+        self.end = pd.Timestamp(end_date or datetime.now().strftime('%Y-%m-%d'))
+        self.blocks, self.block_p = _weights(BLOCK_OPTIONS, BLOCK_WEIGHTS)
+        self.problems, self.problem_p = _weights(PROBLEM_TYPES, PROBLEM_WEIGHTS)
+        self.open_statuses, self.open_status_p = _weights(
+            [s for s in STATUS_OPTIONS if s not in DONE_STATUSES], OPEN_STATUS_WEIGHTS)
+        self.problem_staff = np.array([PROBLEM_STAFF.get(p, DEFAULT_STAFF) for p in self.problems], dtype=object)
+        self.descriptions = [_text_pool(self.rng, DESCRIPTION_WORDS.get(p, DESCRIPTION_WORDS['Other']), 10, 60)
+                             for p in self.problems]
+        self.actions = _text_pool(self.rng, ACTION_PHRASES, 2, 6, filler=False)
+        self.notes = _text_pool(self.rng, NOTE_PHRASES, 2, 6, filler=False)
+
+    def chunk(self, start, count):
+        """Tickets TKT<start> .. TKT<start + count - 1> as a DataFrame in CSV layout"""
+        rng = self.rng
+        block_idx = rng.choice(len(self.blocks), count, p=self.block_p)
+        problem_idx = rng.choice(len(self.problems), count, p=self.problem_p)
+
+        # Ticket volume grows over time: denser towards the end of the window
+        age_days = np.floor(self.days * (1 - np.sqrt(rng.random(count)))).astype(int)
+        seconds = rng.integers(7 * 3600, 22 * 3600, count)  # Raised during waking hours
+        raised = self.end - pd.to_timedelta(age_days, unit='D')
+        created = raised + pd.to_timedelta(seconds, unit='s')
+
+        # Older tickets are more likely to be finished
+        done = rng.random(count) < 1 - np.exp(-age_days / 6.0)
+        status = np.where(done,
+                          np.where(rng.random(count) < 0.6, 'Closed', 'Resolved'),
+                          np.array(self.open_statuses, dtype=object)[
+                              rng.choice(len(self.open_statuses), count, p=self.open_status_p)])
+        resolution_hours = np.minimum(rng.lognormal(np.log(36), 1.0, count),
+                                      np.maximum(age_days, 1) * 24.0)
+        progress_hours = np.where(status == 'Open', 0.0, resolution_hours * rng.random(count))
+        updated = created + pd.to_timedelta(np.where(done, resolution_hours, progress_hours) * 3600, unit='s')
+        latest = self.end + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
+        updated = updated.where(updated <= latest, latest).where(updated >= created, created)
+
+        assigned = self.problem_staff[problem_idx]
+        assigned = np.where((status == 'Open') & (rng.random(count) < 0.6), STAFF_MEMBERS[0], assigned)
+
+        floor = rng.integers(0, 15, count)
+        unit = rng.integers(1, 9, count)
+        flat_no = floor * 100 + unit
+        # Contact is stable per flat so repeat reporters share a number
+        contact = 9000000000 + (block_idx * 100000 + flat_no) * 7919 % 999999999
+
+        text_idx = rng.integers(0, TEXT_POOL_SIZE, count)
+        description = np.empty(count, dtype=object)
+        for i in range(len(self.problems)):
+            mask = problem_idx == i
+            description[mask] = self.descriptions[i][text_idx[mask]]
+        action_taken = np.where(done, self.actions[text_idx], '')
+        notes = np.where(rng.random(count) < np.where(done, 0.4, 0.1), self.notes[text_idx[::-1]], '')
+
+        ids = pd.Series(np.arange(start, start + count)).astype(str).str.zfill(3)
+        return pd.DataFrame({
+            'Ticket ID': ('TKT' + ids).values,
+            'Flat No': flat_no.astype(str),
+            'Block No': np.array(self.blocks, dtype=object)[block_idx],
+            'Problem Type': np.array(self.problems, dtype=object)[problem_idx],
+            'Date Raised': raised.values,
+            'Contact Number': contact.astype(str),
+            'Description': description,
+            'Status': status,
+            'Assigned To': assigned,
+            'Due Date': (raised + pd.Timedelta(days=DUE_DAYS)).values,
+            'Action Taken': action_taken,
+            'Notes': notes,
+            'Created At': created.floor('s').values,
+            'Updated At': updated.floor('s').values
+        }, columns=CSV_HEADERS)
+
+    def chunks(self, total, start=1, chunk_size=DEFAULT_CHUNK_SIZE):
+        for offset in range(0, total, chunk_size):
+            yield self.chunk(start + offset, min(chunk_size, total - offset))
+
+TIME_OF_DAY = np.array([f'{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}' for s in range(86400)], dtype=object)
+
+def format_datetimes(values, with_time=True):
+    """Format datetime64 values as strings via lookup tables instead of per-row strftime"""
+    values = np.asarray(values, dtype='datetime64[s]')
+    days = values.astype('datetime64[D]')
+    unique_days, day_index = np.unique(days, return_inverse=True)
+    day_strings = np.array([str(day) for day in unique_days], dtype=object)[day_index]
+    if not with_time:
+        return day_strings
+    seconds = (values - days).astype(int)
+    return day_strings + ' ' + TIME_OF_DAY[seconds]
+
+def format_chunk(df):
+    """Copy of a generated chunk with date columns formatted like the app writes them"""
+    df = df.copy()
+    for column in ('Date Raised', 'Due Date'):
+        df[column] = format_datetimes(df[column].values, with_time=False)
+    for column in ('Created At', 'Updated At'):
+        df[column] = format_datetimes(df[column].values)
+    return df
+
+def to_records(df):
+    """Ticket dicts in the CSV layout with date columns formatted as strings"""
+    return format_chunk(df).to_dict('records')
+
+DB_COLUMNS = ['ticket_id', 'flat_no', 'block_no', 'problem_type', 'date_raised', 'contact_number', 'description', 'status', 'assigned_to', 'due_date', 'action_taken', 'notes', 'created_at', 'updated_at']
+
+# Microseconds suffix SQLAlchemy's DateTime writes ('%Y-%m-%d %H:%M:%S.%f'); generated times are whole seconds
+DB_MICROSECONDS = '.000000'
+
+def to_db_rows(df):
+    """Row tuples in DB_COLUMNS order; ISO date strings are accepted by every backend
+    
+    Timestamps use the same text as rows written through the ORM, so SQLite
+    never holds the same column in two formats.
+    """
+    df = format_chunk(df)
+    for column in ('Created At', 'Updated At'):
+        df[column] = df[column] + DB_MICROSECONDS
+    return list(df[CSV_HEADERS].itertuples(index=False, name=None))
+
+def next_csv_ticket_number(path):
+    """Number after the highest ticket ID in a CSV file (1 if it has none)"""
+    if not os.path.exists(path):
+        return 1
+    ticket_ids = pd.read_csv(path, usecols=['Ticket ID'], dtype=str)['Ticket ID'].dropna()
+    return max((int(ticket_id[3:]) for ticket_id in ticket_ids), default=0) + 1
+
+def write_csv(path, total, generator=None, start=None, append=False, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Stream `total` tickets into a CSV file in the app's format
+    
+    Without `start`, numbering begins at TKT001, or after the file's last
+    ticket ID when appending.
+    """
+    generator = generator or TicketGenerator()
+    if start is None:
+        start = next_csv_ticket_number(path) if append else 1
+    first = not append
+    for df in generator.chunks(total, start, chunk_size):
+        format_chunk(df).to_csv(path, mode='w' if first else 'a', header=first, index=False)
+        first = False
+
+def insert_database(manager, total, generator=None, start=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Bulk insert `total` tickets, continuing after the last existing ticket ID"""
+    generator = generator or TicketGenerator()
+    manager.create_tables()
+    if start is None:
+        start = int(manager.get_next_ticket_id()[3:])
+    with manager.engine.begin() as conn:
+        # Driver-level executemany skips per-row SQLAlchemy type processing
+        placeholder = '?' if conn.dialect.paramstyle == 'qmark' else '%s'
+        sql = (f"INSERT INTO {Ticket.__tablename__} ({', '.join(DB_COLUMNS)}) "
+               f"VALUES ({', '.join([placeholder] * len(DB_COLUMNS))})")
+        for df in generator.chunks(total, start, chunk_size):
+            conn.exec_driver_sql(sql, to_db_rows(df))
+    manager.backfill_daily_rollup()
+    manager.backfill_sketches()
+    return start
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic tickets for scale testing')
+    parser.add_argument('count', type=int, help='Number of tickets to generate')
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--csv', help='Write tickets to this CSV file')
+    target.add_argument('--database', action='store_true',
+                        help='Insert into the database from get_database_config() (DB_TYPE, DB_PATH, ...)')
+    parser.add_argument('--append', action='store_true', help='Append to an existing CSV file')
+    parser.add_argument('--start-id', type=int, default=None,
+                        help='First ticket number (default: next free ID, or 1 for a new CSV file)')
+    parser.add_argument('--days', type=int, default=730, help='Spread tickets over this many days')
+    parser.add_argument('--end-date', help='Latest Date Raised (YYYY-MM-DD, default: today)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    generator = TicketGenerator(days=args.days, end_date=args.end_date, seed=args.seed)
+    start_time = time.time()
+    if args.csv:
+        write_csv(args.csv, args.count, generator, args.start_id, args.append, args.chunk_size)
+        destination = args.csv
+    else:
+        database_url = get_database_config()
+        manager = DatabaseManager(database_url)
+        insert_database(manager, args.count, generator, args.start_id, args.chunk_size)
+        destination = database_url.split('@')[-1]  # Hide credentials
+    elapsed = time.time() - start_time
+    print(f"Generated {args.count:,} tickets into {destination} in {elapsed:.1f}s "
+          f"({args.count / max(elapsed, 1e-9):,.0f} rows/sec)")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,18 +1,25 @@
 import os
 import sqlite3
+import threading
+import time
+import weakref
+from contextvars import ContextVar
+from itertools import cycle
 import pandas as pd
-from datetime import datetime
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Date
+from datetime import datetime, date, timedelta
+from sqlalchemy import (create_engine, Column, Integer, String, Text, DateTime, Date, LargeBinary, Index, func, select,
+                        case, cast, literal, union_all, or_, and_, inspect, text)
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import sessionmaker
 from flask_sqlalchemy import SQLAlchemy
+from sketches import QuantileSketch, HyperLogLog, SKETCH_COLUMNS, fold_tickets
+from ticket_rows import TicketRow, TICKET_HEADERS, row_layout
 
 Base = declarative_base()
 
-class Ticket(Base):
-    __tablename__ = 'tickets'
-    
-    id = Column(Integer, primary_key=True)
+class TicketColumns:
+    """Columns shared by the active tickets table and its archive"""
     ticket_id = Column(String(10), unique=True, nullable=False)
     flat_no = Column(String(10), nullable=False)
     block_no = Column(String(20), nullable=False)
@@ -28,6 +35,8 @@ class Ticket(Base):
     notes = Column(Text, default='')
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # When the ticket entered its current status (NULL for bulk-loaded rows: use updated_at)
+    status_changed_at = Column(DateTime)
     
     def to_dict(self):
         return {
@@ -47,8 +56,354 @@ class Ticket(Base):
             'Updated At': self.updated_at.strftime('%Y-%m-%d %H:%M:%S') if self.updated_at else ''
         }
 
+class Ticket(TicketColumns, Base):
+    __tablename__ = 'tickets'
+    
+    id = Column(Integer, primary_key=True)
+    
+    __table_args__ = (
+        # Staff workload: per-assignee/status seeks, covering the columns it aggregates
+        Index('ix_tickets_assignee_status', 'assigned_to', 'status', 'due_date', 'date_raised'),
+        # Delta sync: keyset pagination over (updated_at, id)
+        Index('ix_tickets_updated_at', 'updated_at', 'id'),
+        # Flat history: one range per flat in date order, covering FLAT_HISTORY_COLUMNS
+        Index('ix_tickets_flat_history', 'block_no', 'flat_no', 'date_raised', 'ticket_id', 'problem_type', 'status'),
+    )
+
+class TicketArchive(TicketColumns, Base):
+    """Resolved/closed tickets moved out of the active table"""
+    __tablename__ = 'tickets_archive'
+    
+    id = Column(Integer, primary_key=True, autoincrement=False)  # Keeps the original ticket id
+    archived_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index('ix_tickets_archive_date_raised', 'date_raised'),
+        Index('ix_tickets_archive_flat_history', 'block_no', 'flat_no', 'date_raised', 'ticket_id', 'problem_type',
+              'status'),
+    )
+
+class TicketEvent(Base):
+    """Append-only log of ticket changes, written in the same transaction as the change"""
+    __tablename__ = 'ticket_events'
+    
+    id = Column(Integer, primary_key=True)
+    ticket_id = Column(String(10), nullable=False)
+    field = Column(String(50), nullable=False)  # Changed column, or 'created' / 'deleted'
+    old_value = Column(Text)
+    new_value = Column(Text)
+    actor = Column(String(100), nullable=False)
+    ts = Column(DateTime, nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index('ix_ticket_events_ticket_ts', 'ticket_id', 'ts'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'ticket_id': self.ticket_id,
+            'field': self.field,
+            'old_value': self.old_value,
+            'new_value': self.new_value,
+            'actor': self.actor,
+            'ts': self.ts.strftime('%Y-%m-%d %H:%M:%S')
+        }
+
+class TicketTombstone(Base):
+    """Deleted ticket ids, so delta-sync consumers learn about deletions"""
+    __tablename__ = 'ticket_tombstones'
+    
+    id = Column(Integer, primary_key=True)
+    ticket_id = Column(String(10), nullable=False)
+    deleted_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index('ix_ticket_tombstones_deleted_at', 'deleted_at', 'id'),
+    )
+
+def event_value(value):
+    """Text form of a column value for the event log"""
+    if value is None:
+        return None
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+# Every column of a ticket row, in table order (used to copy rows into the archive)
+TICKET_ROW_COLUMNS = [column.name for column in Ticket.__table__.columns]
+
+# Columns of a flat's ticket history, all carried by the flat history indexes
+FLAT_HISTORY_COLUMNS = ['ticket_id', 'date_raised', 'problem_type', 'status']
+
+# Columns a resident status lookup needs (contact_number only to verify the caller)
+STATUS_LOOKUP_COLUMNS = ['ticket_id', 'contact_number', 'status', 'problem_type', 'date_raised', 'due_date',
+                         'updated_at']
+
+def ticket_models(start_date=None, end_date=None):
+    """Tables a read should cover: the archive only joins in when a date range is given"""
+    return (Ticket, TicketArchive) if start_date or end_date else (Ticket,)
+
+def date_range_filters(model, start_date=None, end_date=None):
+    """Conditions restricting date_raised to the range (ISO strings work with raw driver reads)"""
+    filters = []
+    if start_date:
+        filters.append(model.date_raised >= start_date.isoformat())
+    if end_date:
+        filters.append(model.date_raised <= end_date.isoformat())
+    return filters
+
+# Statuses counted as resolved/closed in the daily rollup
+ROLLUP_STATUS_COLUMNS = {'Resolved': 'resolved', 'Closed': 'closed'}
+
+def rollup_keys(ticket):
+    """Rollup counters one ticket contributes 1 to, as (day, block_no, problem_type, column)
+    
+    A ticket counts as opened on its date raised and, while it is Resolved
+    or Closed, in that status's column on the day it entered the status.
+    Writes apply the difference between a ticket's keys before and after;
+    backfill_daily_rollup() counts the same keys from the tables.
+    """
+    keys = [(ticket.date_raised, ticket.block_no, ticket.problem_type, 'opened')]
+    if ticket.status in ROLLUP_STATUS_COLUMNS:
+        changed = ticket.status_changed_at or ticket.updated_at
+        keys.append((changed.date() if changed else None, ticket.block_no, ticket.problem_type,
+                     ROLLUP_STATUS_COLUMNS[ticket.status]))
+    return keys
+
+class TicketDailyRollup(Base):
+    """Per-day ticket counts by block and problem type, maintained on every write"""
+    __tablename__ = 'ticket_daily_rollup'
+    
+    day = Column(Date, primary_key=True)
+    block_no = Column(String(20), primary_key=True)
+    problem_type = Column(String(50), primary_key=True)
+    opened = Column(Integer, nullable=False, default=0)
+    resolved = Column(Integer, nullable=False, default=0)
+    closed = Column(Integer, nullable=False, default=0)
+
+class TicketSketch(Base):
+    """Mergeable resolution-time and reporting-flat sketches per block and problem type"""
+    __tablename__ = 'ticket_sketches'
+    
+    block_no = Column(String(20), primary_key=True)
+    problem_type = Column(String(50), primary_key=True)
+    tickets = Column(Integer, nullable=False, default=0)
+    resolution_hours = Column(Text, nullable=False, default='')  # QuantileSketch JSON
+    flats = Column(LargeBinary, nullable=False)  # HyperLogLog registers
+
+def flat_key(block_no, flat_no):
+    return f'{block_no}/{flat_no}'
+
+def resolution_hours(created_at, resolved_at):
+    if created_at is None or resolved_at is None:
+        return None
+    return max(0.0, (resolved_at - created_at).total_seconds() / 3600.0)
+
+def sketch_entry(ticket):
+    """What a ticket contributes to the sketches: (block_no, problem_type, flat key, resolution hours or None)
+    
+    Resolution time runs from created_at to when a Resolved/Closed ticket
+    entered that status (status_changed_at, or updated_at for bulk-loaded
+    rows), as fold_tickets() measures it for backfill_sketches().
+    """
+    hours = None
+    if ticket.status in ROLLUP_STATUS_COLUMNS:
+        hours = resolution_hours(ticket.created_at, ticket.status_changed_at or ticket.updated_at)
+    return ticket.block_no, ticket.problem_type, flat_key(ticket.block_no, ticket.flat_no), hours
+
+def update_sketch(session, entry, delta=1):
+    """Add (delta=1) or take back (delta=-1) one ticket's sketch_entry() in its group's sketches
+    
+    The ticket count and resolution time come back out exactly; HyperLogLog
+    registers cannot forget a flat, so distinct-flat estimates only drop
+    when backfill_sketches() rebuilds them.
+    """
+    block_no, problem_type, flat, hours = entry
+    table = TicketSketch.__table__
+    key = {'block_no': block_no, 'problem_type': problem_type}
+    dialect = session.get_bind().dialect.name
+    # Create the row first; the write also takes the lock before the read below
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        session.execute(insert(table).values(tickets=0, resolution_hours='', flats=HyperLogLog().to_bytes(), **key)
+                        .on_conflict_do_nothing(index_elements=['block_no', 'problem_type']))
+    elif dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert
+        session.execute(insert(table).values(tickets=0, resolution_hours='', flats=HyperLogLog().to_bytes(), **key)
+                        .prefix_with('IGNORE'))
+    sketch = session.query(TicketSketch).filter_by(**key).with_for_update().first()
+    if sketch is None:
+        sketch = TicketSketch(tickets=0, resolution_hours='', flats=HyperLogLog().to_bytes(), **key)
+        session.add(sketch)
+    sketch.tickets = max(0, (sketch.tickets or 0) + delta)
+    if delta > 0:
+        flats = HyperLogLog(registers=sketch.flats)
+        flats.add(flat)
+        sketch.flats = flats.to_bytes()
+    if hours is not None:
+        quantiles = QuantileSketch.from_json(sketch.resolution_hours)
+        if delta > 0:
+            quantiles.add(hours)
+        else:
+            quantiles.remove(hours)
+        sketch.resolution_hours = quantiles.to_json()
+
+def move_sketch(session, old_entry, new_entry):
+    """Apply a ticket's change of sketch_entry() (reopened, resolved, moved to another group)"""
+    if old_entry != new_entry:
+        update_sketch(session, old_entry, delta=-1)
+        update_sketch(session, new_entry)
+
+def next_ticket_number(session):
+    """Number after the highest TKT number ever handed out (active, archived or deleted), so IDs are never reused"""
+    number = 0
+    for model in (Ticket, TicketArchive):
+        last_ticket = session.query(model.ticket_id).order_by(model.id.desc()).first()
+        if last_ticket:
+            number = max(number, int(last_ticket.ticket_id[3:]))
+    # Tickets are deleted in any order, so the newest tombstone need not hold the highest number
+    deleted = session.query(func.max(cast(func.substr(TicketTombstone.ticket_id, 4), Integer))).scalar()
+    return max(number, deleted or 0) + 1
+
+def parse_timestamp(value):
+    """datetime from an ISO string (fast path) or anything pandas can parse"""
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return pd.to_datetime(value).to_pydatetime()
+
+def is_ticket_id_conflict(error):
+    """Whether an IntegrityError is a duplicate ticket_id (another writer took the ID) rather than bad data"""
+    message = str(error.orig).lower()
+    return 'ticket_id' in message and ('unique' in message or 'duplicate' in message)
+
+def insert_ticket(session, ticket_data, actor, rollup_counts=None):
+    """Add a new ticket with its created event, rollup counts and sketch updates to the session
+    
+    With rollup_counts, rollup increments are added to that dict keyed by
+    (day, block_no, problem_type, column) for the caller to apply once.
+    """
+    # Map dictionary keys to model field names
+    ticket = Ticket(
+        ticket_id=str(ticket_data['Ticket ID']),
+        flat_no=str(ticket_data['Flat No']),
+        block_no=str(ticket_data['Block No']),
+        problem_type=str(ticket_data['Problem Type']),
+        date_raised=parse_timestamp(ticket_data['Date Raised']).date() if ticket_data.get('Date Raised') else None,
+        contact_number=str(ticket_data['Contact Number']),
+        description=str(ticket_data.get('Description', '')),
+        status=str(ticket_data.get('Status', 'Open')),
+        # Priority removed from ticket creation
+        assigned_to=str(ticket_data.get('Assigned To', 'Unassigned')),
+        due_date=parse_timestamp(ticket_data['Due Date']).date() if ticket_data.get('Due Date') else None,
+        action_taken=str(ticket_data.get('Action Taken', '')),
+        created_at=parse_timestamp(ticket_data['Created At']) if ticket_data.get('Created At') else datetime.utcnow(),
+        updated_at=parse_timestamp(ticket_data['Updated At']) if ticket_data.get('Updated At') else datetime.utcnow()
+    )
+    ticket.status_changed_at = ticket.updated_at
+    session.add(ticket)
+    # Server time like every other event; created_at may come from the caller (imports, generated data)
+    session.add(TicketEvent(ticket_id=ticket.ticket_id, field='created', new_value=ticket.status,
+                            actor=actor, ts=datetime.utcnow()))
+    for key in rollup_keys(ticket):
+        if rollup_counts is None:
+            bump_rollup(session, *key)
+        else:
+            rollup_counts[key] = rollup_counts.get(key, 0) + 1
+    update_sketch(session, sketch_entry(ticket))
+    return ticket
+
+# Statuses counted as outstanding work on the staff workload view
+WORKLOAD_STATUSES = ['Open', 'In Progress', 'On Hold']
+
+def days_since(column, today, dialect):
+    """SQL expression for the whole days between a Date column and today"""
+    if dialect == 'sqlite':
+        return func.julianday(today.isoformat()) - func.julianday(column)
+    elif dialect == 'mysql':
+        return func.datediff(today, column)
+    else:
+        return literal(today) - column
+
+def bump_rollup(session, day, block_no, problem_type, column, delta=1):
+    """Add delta to one rollup counter, creating the row if needed"""
+    if day is None:
+        return
+    table = TicketDailyRollup.__table__
+    values = {'day': day, 'block_no': block_no, 'problem_type': problem_type,
+              'opened': 0, 'resolved': 0, 'closed': 0}
+    values[column] = delta
+    dialect = session.get_bind().dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(table).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['day', 'block_no', 'problem_type'],
+            set_={column: table.c[column] + delta}
+        )
+    elif dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(table).values(**values).on_duplicate_key_update(
+            **{column: table.c[column] + delta}
+        )
+    else:
+        updated = session.query(TicketDailyRollup).filter_by(
+            day=day, block_no=block_no, problem_type=problem_type
+        ).update({column: getattr(TicketDailyRollup, column) + delta})
+        if not updated:
+            session.add(TicketDailyRollup(**values))
+        return
+    session.execute(stmt)
+
+# Read replica configuration (override with environment variables)
+REPLICA_CONFIG = {
+    'urls': [url.strip() for url in os.getenv('DB_REPLICA_URLS', '').split(',') if url.strip()],
+    # Reads stay on the primary this long after the same request/user wrote, to hide replica lag
+    'sticky_seconds': float(os.getenv('DB_REPLICA_STICKY_SECONDS', '30'))
+}
+
+# Who is making changes in the current context (the app sets it per request from the session)
+current_actor = ContextVar('current_actor', default='system')
+
+# Time of the current context's last write (the app restores it per user from the session)
+last_write = ContextVar('last_write', default=0.0)
+
+# Callables run on every engine a DatabaseManager creates (query metrics, profiling)
+ENGINE_HOOKS = []
+
+# Engines created so far, so hooks registered after import still reach db_manager's
+ENGINES = weakref.WeakSet()
+
+# Callables run after every committed ticket write (e.g. shared cache invalidation)
+WRITE_HOOKS = []
+
+def register_write_hook(hook):
+    if hook not in WRITE_HOOKS:
+        WRITE_HOOKS.append(hook)
+
+def register_engine_hook(hook):
+    """Run hook(engine) on every DatabaseManager engine, existing ones included
+    
+    db_manager and its replica engines are built when this module is
+    imported, before the app registers its hooks, so hooks must be safe to
+    run on the same engine twice.
+    """
+    if hook not in ENGINE_HOOKS:
+        ENGINE_HOOKS.append(hook)
+        for engine in list(ENGINES):
+            hook(engine)
+
 class DatabaseManager:
-    def __init__(self, database_url=None):
+    def __init__(self, database_url=None, replica_urls=None):
         if database_url:
             self.database_url = database_url
         else:
@@ -56,13 +411,63 @@ class DatabaseManager:
             self.database_url = 'sqlite:///tickets.db'
         
         self.engine = create_engine(self.database_url)
+        # Read-only copies of the primary; schema and replication are managed outside the app
+        self.replica_engines = [create_engine(url) for url in replica_urls or []]
+        self.replica_cycle = cycle(self.replica_engines)
+        for engine in [self.engine] + self.replica_engines:
+            ENGINES.add(engine)
+            for hook in ENGINE_HOOKS:
+                hook(engine)
         self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        # Serializes ticket ID allocation between this process's request threads
+        self.ticket_id_lock = threading.Lock()
+    
+    def reads_from_primary(self):
+        """Whether read_engine() gives this context the primary (no replicas, or a recent write)"""
+        return not self.replica_engines or time.time() - last_write.get() < REPLICA_CONFIG['sticky_seconds']
+    
+    def read_engine(self):
+        """Engine for read-only queries: the next replica, or the primary after a recent write"""
+        if self.reads_from_primary():
+            return self.engine
+        return next(self.replica_cycle)
+    
+    def read_session(self):
+        return self.SessionLocal(bind=self.read_engine())
+    
+    def record_write(self):
+        last_write.set(time.time())
+        for hook in WRITE_HOOKS:
+            hook()
         
     def create_tables(self):
         """Create all database tables"""
         Base.metadata.create_all(bind=self.engine)
+        # create_all skips indexes on tables that already exist
+        for model in (Ticket, TicketArchive, TicketEvent, TicketTombstone):
+            for index in model.__table__.indexes:
+                index.create(bind=self.engine, checkfirst=True)
         # Check if notes column exists, if not add it
         self.migrate_add_notes_column()
+        added_status_changed = self.migrate_add_status_changed_column()
+        # Build the daily rollup for databases created before it existed
+        has_tickets = self.has_tickets()
+        session = self.SessionLocal()
+        needs_backfill = has_tickets and (added_status_changed or session.query(TicketDailyRollup.day).first() is None)
+        needs_sketches = has_tickets and session.query(TicketSketch.block_no).first() is None
+        session.close()
+        if needs_backfill:
+            self.backfill_daily_rollup()
+        if needs_sketches:
+            self.backfill_sketches()
+    
+    def has_tickets(self):
+        """Whether the tickets table has any row (reads one id, not the whole table)"""
+        session = self.SessionLocal()
+        try:
+            return session.query(Ticket.id).first() is not None
+        finally:
+            session.close()
     
     def migrate_add_notes_column(self):
         """Add notes column if it doesn't exist"""
@@ -80,6 +485,23 @@ class DatabaseManager:
             print(f"Migration error: {str(e)}")
             pass
         
+    def migrate_add_status_changed_column(self):
+        """Add status_changed_at to the ticket tables if missing; True if added (the rollup then needs a rebuild)"""
+        added = False
+        try:
+            column_type = DateTime().compile(dialect=self.engine.dialect)
+            for model in (Ticket, TicketArchive):
+                table = model.__tablename__
+                columns = [column['name'] for column in inspect(self.engine).get_columns(table)]
+                if 'status_changed_at' not in columns:
+                    with self.engine.begin() as conn:
+                        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN status_changed_at {column_type}"))
+                    print(f"Added 'status_changed_at' column to {table} table")
+                    added = True
+        except Exception as e:
+            print(f"Migration error: {str(e)}")
+        return added
+    
     def migrate_from_csv(self, csv_file='tickets.csv'):
         """Migrate existing CSV data to database"""
         if not os.path.exists(csv_file):
@@ -116,6 +538,8 @@ class DatabaseManager:
             
             session.commit()
             session.close()
+            self.backfill_daily_rollup()
+            self.backfill_sketches()
             print(f"Successfully migrated {len(df)} tickets from CSV to database.")
             
         except Exception as e:
@@ -123,38 +547,28 @@ class DatabaseManager:
             session.rollback()
             session.close()
     
-    def get_all_tickets(self):
-        """Get all tickets as list of dictionaries"""
-        session = self.SessionLocal()
-        tickets = session.query(Ticket).all()
-        result = [ticket.to_dict() for ticket in tickets]
-        session.close()
+    def get_all_tickets(self, start_date=None, end_date=None, columns=None):
+        """All tickets as TicketRow objects (archived ones too when a date range is given)
+        
+        columns limits the read to those model attributes (default: every CSV column).
+        """
+        columns = list(columns or TICKET_HEADERS)
+        layout = row_layout(columns)
+        result = []
+        for model in ticket_models(start_date, end_date):
+            query = select(*[model.__table__.c[name] for name in columns]).where(
+                *date_range_filters(model, start_date, end_date))
+            result.extend(TicketRow(layout, tuple(values)) for values in self.fetch_raw(query))
         return result
     
     def add_ticket(self, ticket_data):
         """Add new ticket to database"""
         session = self.SessionLocal()
         try:
-            # Map dictionary keys to model field names
-            ticket = Ticket(
-                ticket_id=str(ticket_data['Ticket ID']),
-                flat_no=str(ticket_data['Flat No']),
-                block_no=str(ticket_data['Block No']),
-                problem_type=str(ticket_data['Problem Type']),
-                date_raised=pd.to_datetime(ticket_data['Date Raised']).date() if ticket_data.get('Date Raised') else None,
-                contact_number=str(ticket_data['Contact Number']),
-                description=str(ticket_data.get('Description', '')),
-                status=str(ticket_data.get('Status', 'Open')),
-                # Priority removed from ticket creation
-                assigned_to=str(ticket_data.get('Assigned To', 'Unassigned')),
-                due_date=pd.to_datetime(ticket_data['Due Date']).date() if ticket_data.get('Due Date') else None,
-                action_taken=str(ticket_data.get('Action Taken', '')),
-                created_at=pd.to_datetime(ticket_data['Created At']) if ticket_data.get('Created At') else datetime.utcnow(),
-                updated_at=pd.to_datetime(ticket_data['Updated At']) if ticket_data.get('Updated At') else datetime.utcnow()
-            )
-            session.add(ticket)
+            insert_ticket(session, ticket_data, current_actor.get())
             session.commit()
             session.close()
+            self.record_write()
             return True
         except Exception as e:
             session.rollback()
@@ -162,16 +576,115 @@ class DatabaseManager:
             print(f"Error adding ticket: {str(e)}")
             return False
     
+    def add_new_ticket(self, ticket_data):
+        """Add a ticket under the next free ticket ID; returns the ID, or None on failure"""
+        try:
+            ticket_id = self.insert_ticket_batch([ticket_data], [current_actor.get()])[0]
+        except Exception as e:
+            print(f"Error adding ticket: {str(e)}")
+            return None
+        self.record_write()
+        return ticket_id
+    
+    def add_tickets(self, tickets, actors, retries=3):
+        """Insert new tickets in one transaction, allocating consecutive ticket IDs
+        
+        Returns one entry per ticket: its ticket ID, or the exception that
+        kept it from being stored. Used by the group-commit write queue from
+        its writer thread, so it does not call record_write(): the waiting
+        requests do that in their own context. If the batch fails for any
+        reason other than an ID collision, it is stored again one ticket per
+        transaction so only the bad ticket fails.
+        """
+        try:
+            return self.insert_ticket_batch(tickets, actors, retries)
+        except Exception as e:
+            print(f"Error adding ticket batch, storing tickets one at a time: {str(e)}")
+        results = []
+        for ticket_data, actor in zip(tickets, actors):
+            try:
+                results.extend(self.insert_ticket_batch([ticket_data], [actor], retries))
+            except Exception as e:
+                print(f"Error adding ticket: {str(e)}")
+                results.append(e)
+        return results
+    
+    def insert_ticket_batch(self, tickets, actors, retries=3):
+        """Insert tickets in one transaction; returns their IDs or raises
+        
+        created_at/updated_at are set to the server's UTC time at insert,
+        whatever ticket_data says. Threads of this process take ticket_id_lock around it; if another
+        process takes the same IDs first, the unique ticket_id constraint
+        fails the batch and it is retried with fresh IDs. Other errors are
+        raised at once.
+        """
+        with self.ticket_id_lock:
+            for attempt in range(retries):
+                session = self.SessionLocal()
+                try:
+                    number = next_ticket_number(session)
+                    # Server time, stamped inside the transaction: the delta-sync feed orders by it
+                    now = datetime.utcnow()
+                    ticket_ids = []
+                    rollup_counts = {}
+                    for offset, (ticket_data, actor) in enumerate(zip(tickets, actors)):
+                        ticket_id = f'TKT{number + offset:03d}'
+                        stamped = {'Ticket ID': ticket_id, 'Created At': now, 'Updated At': now}
+                        insert_ticket(session, dict(ticket_data, **stamped), actor, rollup_counts)
+                        ticket_ids.append(ticket_id)
+                    for (day, block_no, problem_type, column), delta in rollup_counts.items():
+                        bump_rollup(session, day, block_no, problem_type, column, delta)
+                    session.commit()
+                    return ticket_ids
+                except IntegrityError as e:
+                    session.rollback()
+                    if not is_ticket_id_conflict(e) or attempt == retries - 1:
+                        raise
+                except Exception:
+                    session.rollback()
+                    raise
+                finally:
+                    session.close()
+    
     def update_ticket(self, ticket_id, field, value):
         """Update specific field of a ticket"""
+        return self.update_ticket_fields(ticket_id, {field: value})
+    
+    def update_ticket_fields(self, ticket_id, updates):
+        """Update several fields of a ticket in one transaction, logging each change to ticket_events"""
         session = self.SessionLocal()
         try:
             ticket = session.query(Ticket).filter_by(ticket_id=ticket_id).first()
             if ticket:
-                setattr(ticket, field.lower().replace(' ', '_'), value)
-                ticket.updated_at = datetime.utcnow()
+                now = datetime.utcnow()
+                actor = current_actor.get()
+                old_keys = rollup_keys(ticket)
+                old_sketch = sketch_entry(ticket)
+                for field, value in updates.items():
+                    column = field.lower().replace(' ', '_')
+                    if isinstance(value, str) and isinstance(Ticket.__table__.c[column].type, Date):
+                        # Forms send ISO strings; Date columns (SQLite in particular) need date objects
+                        value = datetime.strptime(value, '%Y-%m-%d').date() if value else None
+                    if column == 'status' and value != ticket.status:
+                        ticket.status_changed_at = now
+                    old_value = event_value(getattr(ticket, column))
+                    setattr(ticket, column, value)
+                    if event_value(value) != old_value:
+                        session.add(TicketEvent(ticket_id=ticket_id, field=column, old_value=old_value,
+                                                new_value=event_value(value), actor=actor, ts=now))
+                ticket.updated_at = now
+                # Move the ticket's rollup counts (e.g. reopened: no longer resolved)
+                new_keys = rollup_keys(ticket)
+                for key in old_keys:
+                    if key not in new_keys:
+                        bump_rollup(session, *key, delta=-1)
+                for key in new_keys:
+                    if key not in old_keys:
+                        bump_rollup(session, *key)
+                move_sketch(session, old_sketch, sketch_entry(ticket))
                 session.commit()
                 session.close()
+                self.record_write()
                 return True
             session.close()
             return False
@@ -187,9 +700,17 @@ class DatabaseManager:
         try:
             ticket = session.query(Ticket).filter_by(ticket_id=ticket_id).first()
             if ticket:
+                for key in rollup_keys(ticket):
+                    bump_rollup(session, *key, delta=-1)
+                update_sketch(session, sketch_entry(ticket), delta=-1)
+                now = datetime.utcnow()
+                session.add(TicketEvent(ticket_id=ticket.ticket_id, field='deleted', old_value=ticket.status,
+                                        actor=current_actor.get(), ts=now))
+                session.add(TicketTombstone(ticket_id=ticket.ticket_id, deleted_at=now))
                 session.delete(ticket)
                 session.commit()
                 session.close()
+                self.record_write()
                 return True
             session.close()
             return False
@@ -199,18 +720,327 @@ class DatabaseManager:
             print(f"Error deleting ticket: {str(e)}")
             return False
     
+    def get_ticket_status(self, ticket_id):
+        """Status columns of one active or archived ticket, or None; a seek on the unique ticket_id index"""
+        session = self.read_session()
+        try:
+            for model in (Ticket, TicketArchive):
+                row = session.execute(
+                    select(*[model.__table__.c[name] for name in STATUS_LOOKUP_COLUMNS]).where(
+                        model.ticket_id == ticket_id)
+                ).first()
+                if row is not None:
+                    return {
+                        'Ticket ID': row.ticket_id,
+                        'Contact Number': row.contact_number,
+                        'Status': row.status,
+                        'Problem Type': row.problem_type,
+                        'Date Raised': row.date_raised.strftime('%Y-%m-%d') if row.date_raised else '',
+                        'Due Date': row.due_date.strftime('%Y-%m-%d') if row.due_date else '',
+                        'Updated At': row.updated_at.strftime('%Y-%m-%d %H:%M:%S') if row.updated_at else ''
+                    }
+            return None
+        finally:
+            session.close()
+    
+    def get_ticket_events(self, ticket_id):
+        """Change history of one ticket, oldest first"""
+        session = self.read_session()
+        try:
+            events = session.query(TicketEvent).filter_by(ticket_id=ticket_id).order_by(
+                TicketEvent.ts, TicketEvent.id)
+            return [event.to_dict() for event in events]
+        finally:
+            session.close()
+    
+    def get_changes(self, ticket_cursor, tombstone_cursor, limit, settle_seconds=10):
+        """Tickets updated and deleted after the (timestamp, id) cursors, merged oldest first
+        
+        Returns (changes, next ticket cursor, next tombstone cursor, has_more).
+        Writes stamp updated_at/deleted_at with server UTC time before they
+        commit, so only changes older than settle_seconds are returned: it must
+        exceed the longest a stamped write can wait for its commit (e.g. on
+        the SQLite write lock), or that write lands behind a cursor already
+        handed out. Reads the primary: replica lag could otherwise skip rows
+        for good.
+        """
+        upper = datetime.utcnow() - timedelta(seconds=settle_seconds)
+        session = self.SessionLocal()
+        try:
+            def after(ts_column, id_column, cursor):
+                ts, last_id = cursor
+                return or_(ts_column > ts, and_(ts_column == ts, id_column > last_id))
+            
+            tickets = session.query(Ticket).filter(
+                after(Ticket.updated_at, Ticket.id, ticket_cursor), Ticket.updated_at <= upper
+            ).order_by(Ticket.updated_at, Ticket.id).limit(limit).all()
+            tombstones = session.query(TicketTombstone).filter(
+                after(TicketTombstone.deleted_at, TicketTombstone.id, tombstone_cursor),
+                TicketTombstone.deleted_at <= upper
+            ).order_by(TicketTombstone.deleted_at, TicketTombstone.id).limit(limit).all()
+            
+            merged = sorted(
+                [(ticket.updated_at, 0, ticket.id, ticket) for ticket in tickets] +
+                [(tombstone.deleted_at, 1, tombstone.id, tombstone) for tombstone in tombstones],
+                key=lambda item: item[:3]
+            )
+            has_more = len(merged) > limit or len(tickets) == limit or len(tombstones) == limit
+            changes = []
+            for ts, kind, row_id, row in merged[:limit]:
+                if kind == 0:
+                    ticket_cursor = (ts, row_id)
+                    changes.append({'op': 'upsert', 'ticket_id': row.ticket_id,
+                                    'ts': ts.strftime('%Y-%m-%d %H:%M:%S'), 'ticket': row.to_dict()})
+                else:
+                    tombstone_cursor = (ts, row_id)
+                    changes.append({'op': 'delete', 'ticket_id': row.ticket_id,
+                                    'ts': ts.strftime('%Y-%m-%d %H:%M:%S')})
+            return changes, ticket_cursor, tombstone_cursor, has_more
+        finally:
+            session.close()
+    
     def get_next_ticket_id(self):
         """Generate next ticket ID"""
         session = self.SessionLocal()
-        last_ticket = session.query(Ticket).order_by(Ticket.id.desc()).first()
+        try:
+            return f'TKT{next_ticket_number(session):03d}'
+        finally:
+            session.close()
+
+    def backfill_daily_rollup(self):
+        """Rebuild the daily rollup from the tickets table with grouped queries"""
+        session = self.SessionLocal()
+        try:
+            counts = {}
+            def row(day, block_no, problem_type):
+                return counts.setdefault((day, block_no, problem_type), {'opened': 0, 'resolved': 0, 'closed': 0})
+            
+            # History covers archived tickets as well as active ones
+            for model in (Ticket, TicketArchive):
+                opened = session.query(
+                    model.date_raised, model.block_no, model.problem_type, func.count(model.id)
+                ).group_by(model.date_raised, model.block_no, model.problem_type)
+                for day, block_no, problem_type, count in opened:
+                    if day is not None:
+                        row(day, block_no, problem_type)['opened'] += count
+                
+                # Same keys as rollup_keys(): finished tickets count on the day they entered their status
+                updated_day = func.date(func.coalesce(model.status_changed_at, model.updated_at))
+                finished = session.query(
+                    updated_day, model.block_no, model.problem_type, model.status, func.count(model.id)
+                ).filter(model.status.in_(list(ROLLUP_STATUS_COLUMNS))).group_by(
+                    updated_day, model.block_no, model.problem_type, model.status)
+                for day, block_no, problem_type, status, count in finished:
+                    if day is None:
+                        continue
+                    if isinstance(day, str):
+                        day = datetime.strptime(day, '%Y-%m-%d').date()
+                    row(day, block_no, problem_type)[ROLLUP_STATUS_COLUMNS[status]] += count
+            
+            session.query(TicketDailyRollup).delete()
+            if counts:
+                session.execute(TicketDailyRollup.__table__.insert(), [
+                    dict(day=day, block_no=block_no, problem_type=problem_type, **values)
+                    for (day, block_no, problem_type), values in counts.items()
+                ])
+            session.commit()
+            return len(counts)
+        except Exception as e:
+            session.rollback()
+            print(f"Error backfilling daily rollup: {str(e)}")
+            return 0
+        finally:
+            session.close()
+    
+    def backfill_sketches(self, chunk_size=100000):
+        """Rebuild the per-group sketches from the tickets table, streaming it in chunks"""
+        groups = {}
+        try:
+            with self.engine.connect() as connection:
+                for model in (Ticket, TicketArchive):
+                    query = select(*[model.__table__.c[name] for name in SKETCH_COLUMNS]).compile(self.engine)
+                    result = connection.exec_driver_sql(str(query))
+                    while True:
+                        rows = result.fetchmany(chunk_size)
+                        if not rows:
+                            break
+                        fold_tickets(groups, pd.DataFrame.from_records(rows, columns=SKETCH_COLUMNS))
+            session = self.SessionLocal()
+            try:
+                session.query(TicketSketch).delete()
+                if groups:
+                    session.execute(TicketSketch.__table__.insert(), [
+                        {'block_no': block_no, 'problem_type': problem_type, 'tickets': tickets,
+                         'resolution_hours': quantiles.to_json(), 'flats': flats.to_bytes()}
+                        for (block_no, problem_type), (tickets, quantiles, flats) in groups.items()
+                    ])
+                session.commit()
+            finally:
+                session.close()
+            return len(groups)
+        except Exception as e:
+            print(f"Error backfilling sketches: {str(e)}")
+            return 0
+    
+    def get_sketches(self):
+        """All stored sketches as (block_no, problem_type, tickets, QuantileSketch, HyperLogLog)"""
+        session = self.read_session()
+        try:
+            return [
+                (sketch.block_no, sketch.problem_type, sketch.tickets,
+                 QuantileSketch.from_json(sketch.resolution_hours), HyperLogLog(registers=sketch.flats))
+                for sketch in session.query(TicketSketch)
+            ]
+        finally:
+            session.close()
+    
+    def get_daily_rollup(self, start_date, end_date=None):
+        """Total opened/resolved/closed per day between start_date and end_date"""
+        session = self.read_session()
+        try:
+            query = session.query(
+                TicketDailyRollup.day,
+                func.sum(TicketDailyRollup.opened),
+                func.sum(TicketDailyRollup.resolved),
+                func.sum(TicketDailyRollup.closed)
+            ).filter(TicketDailyRollup.day >= start_date)
+            if end_date:
+                query = query.filter(TicketDailyRollup.day <= end_date)
+            return [
+                {'day': day, 'opened': int(opened or 0), 'resolved': int(resolved or 0), 'closed': int(closed or 0)}
+                for day, opened, resolved, closed in query.group_by(TicketDailyRollup.day)
+            ]
+        finally:
+            session.close()
+
+    def fetch_raw(self, query):
+        """Run a Core select through the raw driver, skipping per-value type processing"""
+        engine = self.read_engine()
+        compiled = query.compile(engine)
+        params = compiled.params
+        if compiled.positional:
+            params = tuple(params[name] for name in compiled.positiontup)
+        with engine.connect() as connection:
+            return connection.exec_driver_sql(str(compiled), params).fetchall()
+    
+    def get_ticket_columns(self, columns, start_date=None, end_date=None):
+        """Selected ticket columns as a DataFrame, one array per column (no ORM objects)"""
+        # Callers parse dates vectorized
+        queries = [
+            select(*[model.__table__.c[name] for name in columns]).where(
+                *date_range_filters(model, start_date, end_date))
+            for model in ticket_models(start_date, end_date)
+        ]
+        query = queries[0] if len(queries) == 1 else union_all(*queries)
+        return pd.DataFrame.from_records(self.fetch_raw(query), columns=columns)
+
+    def get_flat_history(self, block_no, flat_no):
+        """One flat's active and archived tickets in date order, as a DataFrame read from the flat history indexes"""
+        queries = [
+            select(*[model.__table__.c[name] for name in FLAT_HISTORY_COLUMNS]).where(
+                model.block_no == block_no, model.flat_no == flat_no).order_by(model.date_raised, model.ticket_id)
+            for model in (Ticket, TicketArchive)
+        ]
+        frames = [pd.DataFrame.from_records(self.fetch_raw(query), columns=FLAT_HISTORY_COLUMNS) for query in queries]
+        return pd.concat(frames, ignore_index=True)
+
+    def get_status_counts(self, start_date=None, end_date=None):
+        """Ticket counts per (block, problem type, status) in a single GROUP BY per table"""
+        session = self.read_session()
+        try:
+            rows = []
+            for model in ticket_models(start_date, end_date):
+                rows.extend(session.query(
+                    model.block_no, model.problem_type, model.status, func.count(model.id)
+                ).filter(*date_range_filters(model, start_date, end_date)).group_by(
+                    model.block_no, model.problem_type, model.status).all())
+            counts = pd.DataFrame.from_records(rows, columns=['block_no', 'problem_type', 'status', 'count'])
+            if len(ticket_models(start_date, end_date)) > 1:
+                counts = counts.groupby(['block_no', 'problem_type', 'status'], as_index=False)['count'].sum()
+            return counts
+        finally:
+            session.close()
+
+    def archive_closed_tickets(self, max_age_days, batch_size=1000):
+        """Move Resolved/Closed tickets not updated for max_age_days into the archive table
+        
+        Each batch of batch_size rows is copied and deleted in its own short
+        transaction. The newest ticket always stays active so new ticket IDs
+        keep counting up from it.
+        """
+        now = datetime.utcnow()
+        cutoff = now - timedelta(days=max_age_days)
+        session = self.SessionLocal()
+        newest = session.query(func.max(Ticket.id)).scalar()
         session.close()
+        if newest is None:
+            return 0
         
-        if not last_ticket:
-            return 'TKT001'
+        moved = 0
+        last_id = 0
+        while True:
+            session = self.SessionLocal()
+            try:
+                ids = [row[0] for row in session.query(Ticket.id).filter(
+                    Ticket.id > last_id,
+                    Ticket.id < newest,
+                    Ticket.status.in_(list(ROLLUP_STATUS_COLUMNS)),
+                    Ticket.updated_at < cutoff
+                ).order_by(Ticket.id).limit(batch_size)]
+                if not ids:
+                    break
+                source = select(*[Ticket.__table__.c[name] for name in TICKET_ROW_COLUMNS],
+                                literal(now)).where(Ticket.id.in_(ids))
+                session.execute(TicketArchive.__table__.insert().from_select(
+                    TICKET_ROW_COLUMNS + ['archived_at'], source))
+                session.query(Ticket).filter(Ticket.id.in_(ids)).delete(synchronize_session=False)
+                session.commit()
+                self.record_write()
+                moved += len(ids)
+                last_id = ids[-1]
+            except Exception as e:
+                session.rollback()
+                print(f"Error archiving tickets: {str(e)}")
+                break
+            finally:
+                session.close()
+        return moved
+
+    def get_workload(self, today=None):
+        """Outstanding tickets per assignee and status, read from the assignee/status index
         
-        last_id = last_ticket.ticket_id
-        num = int(last_id[3:]) + 1
-        return f'TKT{num:03d}'
+        Distinct assignees are found with one index seek each (a loose index
+        scan), so only the outstanding (assignee, status) ranges are read
+        rather than every resolved and closed ticket.
+        """
+        today = today or date.today()
+        session = self.read_session()
+        try:
+            assignees = []
+            current = session.query(func.min(Ticket.assigned_to)).scalar()
+            while current is not None:
+                assignees.append(current)
+                current = session.query(func.min(Ticket.assigned_to)).filter(
+                    Ticket.assigned_to > current).scalar()
+            if not assignees:
+                return []
+            rows = session.query(
+                Ticket.assigned_to,
+                Ticket.status,
+                func.count(),
+                func.sum(case((Ticket.due_date < today, 1), else_=0)),
+                func.avg(days_since(Ticket.date_raised, today, self.engine.dialect.name))
+            ).filter(
+                Ticket.assigned_to.in_(assignees),
+                Ticket.status.in_(WORKLOAD_STATUSES)
+            ).group_by(Ticket.assigned_to, Ticket.status)
+            return [
+                {'assigned_to': assigned_to, 'status': status, 'count': int(count),
+                 'overdue': int(overdue or 0), 'avg_age_days': float(avg_age or 0)}
+                for assigned_to, status, count, overdue, avg_age in rows
+            ]
+        finally:
+            session.close()
 
 # Database configuration based on environment
 def get_database_config():
@@ -238,4 +1068,4 @@ def get_database_config():
         return f'sqlite:///{db_path}'
 
 # Initialize database manager
-db_manager = DatabaseManager(get_database_config())
\ No newline at end of file
+db_manager = DatabaseManager(get_database_config(), REPLICA_CONFIG['urls'])
\ No newline at end of file
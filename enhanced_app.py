@@ -1,7 +1,14 @@
 from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_file, session
+from flask.json.provider import DefaultJSONProvider
+import base64
 import csv
+import hmac
+import io
 import os
+from collections import Counter
+from collections.abc import Mapping
 from datetime import datetime, timedelta
+import numpy as np
 import pandas as pd
 from werkzeug.utils import secure_filename
 import smtplib
@@ -9,17 +16,54 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import json
 from functools import wraps
+from rate_limiter import admission_control, lookup_rate_limit
+from metrics import init_metrics, instrument_engine, METRICS_CONFIG, collect_metrics, record_csv_read, record_csv_write
+from query_profiler import init_query_profiler, profile_engine, PROFILE_CONFIG, profile as query_profile
+from memory_profiling import init_memory_profiler, memory_checkpoint, MEMORY_PROFILE_CONFIG, profile as memory_profile
+from analytics import resolution_analytics
+from sketches import SKETCH_COLUMNS, fold_tickets, summarize_sketches
+from report_scheduler import init_report_scheduler, REPORT_SCHEDULER_CONFIG
+from shared_cache import cached, invalidate, register_key_hook
+from write_queue import write_queue, WRITE_QUEUE_CONFIG
+from ticket_options import CSV_HEADERS, BLOCK_OPTIONS, PROBLEM_TYPES, STATUS_OPTIONS, STAFF_MEMBERS
+from ticket_rows import TICKET_HEADERS, tickets_frame
+from complexes import (ComplexMiddleware, ComplexRegistry, current_complex, complex_path,
+                       complex_database_url, COMPLEX_CONFIG, DEFAULT_COMPLEX)
 
 # Import database manager
 try:
-    from database import db_manager
+    from database import (db_manager, DatabaseManager, register_engine_hook, register_write_hook,
+                          last_write, current_actor, REPLICA_CONFIG)
     USE_DATABASE = True
 except ImportError:
     USE_DATABASE = False
     print("Database module not available. Using CSV fallback.")
 
+class TicketJSONProvider(DefaultJSONProvider):
+    """JSON provider that also serializes TicketRow (any mapping) like a dict"""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, Mapping):
+            return dict(o)
+        return DefaultJSONProvider.default(o)
+
 app = Flask(__name__)
+app.json = TicketJSONProvider(app)
 app.secret_key = 'your-secret-key-change-this-in-production'
+init_metrics(app)
+init_query_profiler(app)
+init_memory_profiler(app)
+if USE_DATABASE:
+    # Reaches db_manager's primary and replica engines, and per-complex engines opened later
+    if METRICS_CONFIG['enabled']:
+        register_engine_hook(instrument_engine)
+    if PROFILE_CONFIG['enabled']:
+        register_engine_hook(profile_engine)
+    # Every committed ticket write invalidates the shared cache of its complex
+    register_write_hook(invalidate)
+if COMPLEX_CONFIG['complexes']:
+    app.wsgi_app = ComplexMiddleware(app.wsgi_app)
 
 # Authentication configuration
 USER_CREDENTIALS = {
@@ -35,14 +79,11 @@ USER_CREDENTIALS = {
 
 # Configuration
 CSV_FILE = 'tickets.csv'
-CSV_HEADERS = ['Ticket ID', 'Flat No', 'Block No', 'Problem Type', 'Date Raised', 'Contact Number', 'Description', 'Status', 'Assigned To', 'Due Date', 'Action Taken', 'Notes', 'Created At', 'Updated At']
 
-# Enhanced options
-BLOCK_OPTIONS = ['A', 'B', 'C', 'D', 'P', 'Q', 'R', 'S', 'T', 'U', 'General Area', 'Basement Parking', 'Podium', 'Club House']
-PROBLEM_TYPES = ['Plumbing', 'Electrical', 'Civil', 'Light', 'Flooring', 'AC/Heating', 'Water Supply', 'Drainage', 'Painting', 'Door/Window', 'Elevator', 'Security', 'Cleaning', 'Other']
-STATUS_OPTIONS = ['Open', 'In Progress', 'Resolved', 'Closed', 'On Hold']
-# Priority system removed - all tickets are equal priority
-STAFF_MEMBERS = ['Unassigned', 'John Doe (Plumber)', 'Jane Smith (Electrician)', 'Mike Johnson (Maintenance)', 'Sarah Wilson (Cleaner)']
+# Trend windows shown on the reports page (label, days)
+TREND_WINDOWS = [('Last 7 days', 7), ('Last 30 days', 30)]
+TREND_CHART_DAYS = 30
+ROLLING_AVERAGE_DAYS = 7
 
 # Email configuration (set these in production)
 EMAIL_CONFIG = {
@@ -53,6 +94,61 @@ EMAIL_CONFIG = {
     'enabled': False  # Set to True to enable email notifications
 }
 
+# Archiving of old resolved/closed tickets (override with environment variables)
+ARCHIVE_CONFIG = {
+    'after_days': int(os.getenv('ARCHIVE_AFTER_DAYS', '365')),
+    'batch_size': int(os.getenv('ARCHIVE_BATCH_SIZE', '1000'))
+}
+
+# Delta-sync API configuration (override with environment variables)
+SYNC_CONFIG = {
+    'token': os.getenv('SYNC_API_TOKEN', ''),  # Bearer token for consumers without a login session
+    'page_size': int(os.getenv('SYNC_PAGE_SIZE', '500')),
+    'max_page_size': int(os.getenv('SYNC_MAX_PAGE_SIZE', '5000')),
+    # Held-back window for in-flight writes; keep it above the write-queue timeout and database lock waits
+    'settle_seconds': float(os.getenv('SYNC_SETTLE_SECONDS', str(max(10.0, WRITE_QUEUE_CONFIG['timeout']))))
+}
+
+# Flat history: a ticket is a repeat when the same flat raised the same problem type this recently
+FLAT_HISTORY_CONFIG = {
+    'repeat_days': int(os.getenv('REPEAT_ISSUE_DAYS', '30'))
+}
+
+# Public resident status lookup (override with environment variables)
+STATUS_LOOKUP_CONFIG = {
+    'cache_ttl': float(os.getenv('STATUS_LOOKUP_CACHE_TTL', '15'))  # Server-side cache and browser max-age
+}
+STATUS_LOOKUP_CSV_COLUMNS = ['Ticket ID', 'Contact Number', 'Status', 'Problem Type', 'Date Raised', 'Due Date',
+                             'Updated At']
+
+def utc_timestamp():
+    """Created At / Updated At value; stored timestamps are UTC in both backends"""
+    return datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+
+@app.before_request
+def scope_session_to_complex():
+    """A login is only valid on the complex it was made on (path routing shares one cookie)"""
+    if session.get('logged_in') and session.get('complex', DEFAULT_COMPLEX) != current_complex():
+        session.clear()
+
+@app.before_request
+def set_current_actor():
+    """Attribute ticket changes in this request to the logged-in user, or to a resident"""
+    if USE_DATABASE:
+        current_actor.set(session.get('username') if session.get('logged_in') else 'resident')
+
+@app.before_request
+def restore_last_write():
+    """Read-your-writes: a user's reads stay on the primary shortly after their own writes"""
+    if USE_DATABASE and REPLICA_CONFIG['urls']:
+        last_write.set(session.get('last_write', 0.0))
+
+@app.after_request
+def remember_last_write(response):
+    if USE_DATABASE and REPLICA_CONFIG['urls'] and last_write.get() > session.get('last_write', 0.0):
+        session['last_write'] = last_write.get()
+    return response
+
 def login_required(f):
     """Decorator to require login for certain routes"""
     @wraps(f)
@@ -63,6 +159,17 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def sync_auth_required(f):
+    """Decorator allowing a login session or the SYNC_API_TOKEN bearer token"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        supplied = request.headers.get('Authorization', '')
+        token_ok = SYNC_CONFIG['token'] and hmac.compare_digest(supplied, f"Bearer {SYNC_CONFIG['token']}")
+        if not (session.get('logged_in') or token_ok):
+            return jsonify({'error': 'Authentication required'}), 401
+        return f(*args, **kwargs)
+    return decorated_function
+
 def superadmin_required(f):
     """Decorator to require superadmin role for certain routes"""
     @wraps(f)
@@ -76,22 +183,85 @@ def superadmin_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def current_csv_file():
+    """Tickets CSV of the current request's complex"""
+    complex_id = current_complex()
+    return CSV_FILE if complex_id == DEFAULT_COMPLEX else complex_path(complex_id, 'tickets.csv')
+
+def open_complex_database(complex_id):
+    manager = DatabaseManager(complex_database_url(complex_id))
+    manager.create_tables()
+    return manager
+
+# Open per-complex databases, least recently used disposed first
+complex_databases = ComplexRegistry(open_complex_database, lambda manager: manager.engine.dispose())
+
+def current_db():
+    """DatabaseManager of the current request's complex"""
+    complex_id = current_complex()
+    return db_manager if complex_id == DEFAULT_COMPLEX else complex_databases.get(complex_id)
+
+def read_source():
+    """Where this request's reads go: 'primary' or 'replica'"""
+    return 'primary' if current_db().reads_from_primary() else 'replica'
+
+if USE_DATABASE and REPLICA_CONFIG['urls']:
+    # Replica reads may lag the version they are cached under; never serve them to a writer
+    register_key_hook(read_source)
+
 def initialize_csv():
     """Initialize CSV file with headers if it doesn't exist"""
-    if not os.path.exists(CSV_FILE):
-        with open(CSV_FILE, 'w', newline='', encoding='utf-8') as file:
+    if not os.path.exists(current_csv_file()):
+        with open(current_csv_file(), 'w', newline='', encoding='utf-8') as file:
             writer = csv.writer(file)
             writer.writerow(CSV_HEADERS)
 
+def read_tickets_csv(**kwargs):
+    """Read the tickets CSV file"""
+    record_csv_read(current_csv_file())
+    return pd.read_csv(current_csv_file(), **kwargs)
+
+def write_tickets_csv(df):
+    """Write the tickets CSV file"""
+    df.to_csv(current_csv_file(), index=False)
+    record_csv_write(current_csv_file())
+    invalidate()
+
+def archive_csv_file():
+    """Archive CSV kept next to the tickets CSV"""
+    root, ext = os.path.splitext(current_csv_file())
+    return f'{root}_archive{ext}'
+
+def read_tickets_in_range(start_date=None, end_date=None, **kwargs):
+    """Read the tickets CSV; with a date range, also the archive CSV, filtered on Date Raised"""
+    if not (start_date or end_date):
+        return read_tickets_csv(**kwargs)
+    usecols = kwargs.get('usecols')
+    if usecols is not None and 'Date Raised' not in usecols:
+        kwargs['usecols'] = list(usecols) + ['Date Raised']
+    frames = [read_tickets_csv(**kwargs)]
+    if os.path.exists(archive_csv_file()):
+        record_csv_read(archive_csv_file())
+        frames.append(pd.read_csv(archive_csv_file(), **kwargs))
+    df = pd.concat(frames, ignore_index=True)
+    raised = pd.to_datetime(df['Date Raised'], errors='coerce')
+    mask = pd.Series(True, index=df.index)
+    if start_date:
+        mask &= raised >= pd.Timestamp(start_date)
+    if end_date:
+        mask &= raised <= pd.Timestamp(end_date)
+    df = df[mask]
+    return df[list(usecols)] if usecols is not None else df
+
 def initialize_database():
     """Initialize database and migrate CSV data if needed"""
     if USE_DATABASE:
         try:
-            db_manager.create_tables()
+            current_db().create_tables()
             # Migrate existing CSV data if database is empty
-            tickets = db_manager.get_all_tickets()
-            if not tickets and os.path.exists(CSV_FILE):
-                db_manager.migrate_from_csv(CSV_FILE)
+            if not current_db().has_tickets() and os.path.exists(current_csv_file()):
+                current_db().migrate_from_csv(current_csv_file())
+                invalidate()
                 print("CSV data migrated to database successfully.")
         except Exception as e:
             print(f"Database initialization error: {str(e)}")
@@ -101,25 +271,35 @@ def initialize_database():
 def get_next_ticket_id():
     """Generate next ticket ID"""
     if USE_DATABASE:
-        return db_manager.get_next_ticket_id()
+        return current_db().get_next_ticket_id()
     else:
         try:
-            df = pd.read_csv(CSV_FILE)
-            if len(df) == 0:
-                return 'TKT001'
-            last_id = df['Ticket ID'].iloc[-1]
-            num = int(last_id[3:]) + 1
+            ticket_ids = list(read_tickets_csv(usecols=['Ticket ID'], dtype=str)['Ticket ID'].tail(1))
+            # Archived tickets keep their IDs too, in archive order rather than ID order
+            if os.path.exists(archive_csv_file()):
+                record_csv_read(archive_csv_file())
+                ticket_ids += list(pd.read_csv(archive_csv_file(), usecols=['Ticket ID'], dtype=str)['Ticket ID'])
+            num = max((int(ticket_id[3:]) for ticket_id in ticket_ids), default=0) + 1
             return f'TKT{num:03d}'
         except:
             return 'TKT001'
 
-def get_all_tickets():
-    """Get all tickets from database or CSV"""
+# Columns the ticket list page shows (plus Due Date for the overdue count)
+TICKET_LIST_COLUMNS = ['ticket_id', 'flat_no', 'block_no', 'problem_type', 'description', 'status', 'assigned_to',
+                       'due_date', 'action_taken']
+
+@cached('tickets')
+def get_all_tickets(start_date=None, end_date=None, columns=None):
+    """Get all tickets from database or CSV (archived ones too when a date range is given)
+    
+    columns limits the read to those model attributes; rows are read like dicts keyed by CSV header.
+    """
     if USE_DATABASE:
-        return db_manager.get_all_tickets()
+        return current_db().get_all_tickets(start_date, end_date, columns)
     else:
         try:
-            df = pd.read_csv(CSV_FILE)
+            usecols = [TICKET_HEADERS[name] for name in columns] if columns else None
+            df = read_tickets_in_range(start_date, end_date, usecols=usecols)
             # Fill NaN values with empty strings to prevent float subscriptable errors
             df = df.fillna('')
             # Convert to records and ensure all values are strings
@@ -137,37 +317,109 @@ def get_all_tickets():
 def add_ticket(ticket_data):
     """Add ticket to database or CSV"""
     if USE_DATABASE:
-        return db_manager.add_ticket(ticket_data)
+        return current_db().add_ticket(ticket_data)
     else:
         try:
             # Save to CSV
-            df = pd.read_csv(CSV_FILE)
+            df = read_tickets_csv()
             new_row = pd.DataFrame([ticket_data])
             df = pd.concat([df, new_row], ignore_index=True)
-            df.to_csv(CSV_FILE, index=False)
+            write_tickets_csv(df)
             return True
         except Exception as e:
             print(f"Error adding ticket to CSV: {str(e)}")
             return False
 
+def save_new_ticket(ticket_data):
+    """Allocate a ticket ID and store the ticket; returns the ID, or None on failure"""
+    if USE_DATABASE and write_queue is not None:
+        # Group commit: the writer thread allocates the ID and stores a whole batch at once
+        try:
+            ticket_id = write_queue.add(current_db(), ticket_data, current_actor.get())
+        except Exception as e:
+            print(f"Error adding ticket: {str(e)}")
+            return None
+        current_db().record_write()
+        return ticket_id
+    if USE_DATABASE:
+        # Allocate the ID in the insert's own transaction, retrying if a concurrent request took it
+        return current_db().add_new_ticket(ticket_data)
+    ticket_data['Ticket ID'] = get_next_ticket_id()
+    return ticket_data['Ticket ID'] if add_ticket(ticket_data) else None
+
+@cached('status', ttl=STATUS_LOOKUP_CONFIG['cache_ttl'], local_fallback=True)
+def get_ticket_status(ticket_id):
+    """Status fields of one active or archived ticket, or None"""
+    if USE_DATABASE:
+        return current_db().get_ticket_status(ticket_id)
+    try:
+        kwargs = {'usecols': STATUS_LOOKUP_CSV_COLUMNS, 'dtype': str, 'keep_default_na': False}
+        df = read_tickets_csv(**kwargs)
+        match = df[df['Ticket ID'] == ticket_id]
+        if match.empty and os.path.exists(archive_csv_file()):
+            record_csv_read(archive_csv_file())
+            archive = pd.read_csv(archive_csv_file(), **kwargs)
+            match = archive[archive['Ticket ID'] == ticket_id]
+        return match.iloc[0].to_dict() if not match.empty else None
+    except Exception as e:
+        print(f"Error reading ticket status from CSV: {str(e)}")
+        return None
+
 def update_ticket_data(ticket_id, field, value):
     """Update ticket in database or CSV"""
     if USE_DATABASE:
-        return db_manager.update_ticket(ticket_id, field, value)
+        return current_db().update_ticket(ticket_id, field, value)
     else:
         try:
-            df = pd.read_csv(CSV_FILE)
+            df = read_tickets_csv()
             mask = df['Ticket ID'] == ticket_id
             if mask.any():
                 df.loc[mask, field] = value
-                df.loc[mask, 'Updated At'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                df.to_csv(CSV_FILE, index=False)
+                df.loc[mask, 'Updated At'] = utc_timestamp()
+                write_tickets_csv(df)
                 return True
             return False
         except Exception as e:
             print(f"Error updating ticket in CSV: {str(e)}")
             return False
 
+def archive_closed_tickets(max_age_days=None, batch_size=None):
+    """Move Resolved/Closed tickets older than max_age_days out of the active set"""
+    max_age_days = ARCHIVE_CONFIG['after_days'] if max_age_days is None else max_age_days
+    batch_size = batch_size or ARCHIVE_CONFIG['batch_size']
+    if USE_DATABASE:
+        return current_db().archive_closed_tickets(max_age_days, batch_size)
+    else:
+        # The CSV file is rewritten whole on every change, so archive it in one pass
+        df = read_tickets_csv(dtype=str).fillna('')
+        if df.empty:
+            return 0
+        cutoff = pd.Timestamp(datetime.utcnow() - timedelta(days=max_age_days))
+        updated = pd.to_datetime(df['Updated At'], format='ISO8601', errors='coerce')
+        mask = df['Status'].isin(['Resolved', 'Closed']) & (updated < cutoff)
+        mask.iloc[-1] = False  # Newest ticket stays so new IDs keep counting up from it
+        if not mask.any():
+            return 0
+        archive_file = archive_csv_file()
+        df[mask].to_csv(archive_file, mode='a', header=not os.path.exists(archive_file), index=False)
+        record_csv_write(archive_file)
+        write_tickets_csv(df[~mask])
+        return int(mask.sum())
+
+def delete_ticket_data(ticket_id):
+    """Delete ticket from database or CSV"""
+    if USE_DATABASE:
+        return current_db().delete_ticket(ticket_id)
+    else:
+        df = read_tickets_csv(dtype=str)
+        df = df.fillna('')
+        mask = df['Ticket ID'] == ticket_id
+        if mask.any():
+            df = df[~mask]
+            write_tickets_csv(df)
+            return True
+        return False
+
 def calculate_due_date():
     """Calculate standard due date for all tickets"""
     return (datetime.now() + timedelta(days=7)).strftime('%Y-%m-%d')
@@ -214,6 +466,14 @@ def validate_form_data(data):
     elif len(data['contact_number'].strip()) < 10:
         errors.append('Contact number must be at least 10 digits')
     
+    if not data.get('date_raised') or not data['date_raised'].strip():
+        errors.append('Date raised is required')
+    else:
+        try:
+            datetime.strptime(data['date_raised'].strip(), '%Y-%m-%d')
+        except ValueError:
+            errors.append('Date raised must be a valid date (YYYY-MM-DD)')
+    
     return errors
 
 @app.route('/login', methods=['GET', 'POST'])
@@ -227,6 +487,7 @@ def login():
             session['logged_in'] = True
             session['username'] = username
             session['role'] = USER_CREDENTIALS[username]['role']
+            session['complex'] = current_complex()
             flash('Login successful!', 'success')
             
             # Redirect to next page or tickets view
@@ -255,6 +516,7 @@ def index():
                          today=datetime.now().strftime('%Y-%m-%d'))
 
 @app.route('/submit', methods=['POST'])
+@admission_control
 def submit_ticket():
     """Handle ticket submission"""
     errors = validate_form_data(request.form)
@@ -265,30 +527,30 @@ def submit_ticket():
         return redirect(url_for('index'))
     
     # Prepare enhanced ticket data
-    ticket_id = get_next_ticket_id()
     problem_type = request.form['problem_type']
     # Set standard due date for all tickets
     due_date = calculate_due_date()
     
     ticket_data = {
-        'Ticket ID': ticket_id,
+        'Ticket ID': None,  # Allocated when the ticket is saved
         'Flat No': request.form['flat_no'].strip(),
         'Block No': request.form['block_no'],
         'Problem Type': problem_type,
-        'Date Raised': request.form['date_raised'],
+        'Date Raised': request.form['date_raised'].strip(),
         'Contact Number': request.form['contact_number'].strip(),
         'Description': request.form.get('description', '').strip(),
         'Status': 'Open',
         # Priority removed - all tickets equal
         
         'Due Date': due_date,
-        'Created At': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-        'Updated At': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        'Created At': utc_timestamp(),
+        'Updated At': utc_timestamp()
     }
     
     # Save ticket
     try:
-        if not add_ticket(ticket_data):
+        ticket_id = save_new_ticket(ticket_data)
+        if not ticket_id:
             flash('Error saving ticket. Please try again.', 'error')
             return redirect(url_for('index'))
         
@@ -320,15 +582,15 @@ def submit_ticket():
 def view_tickets():
     """View all tickets with enhanced features"""
     try:
-        tickets = get_all_tickets()
-        df = pd.DataFrame(tickets) if tickets else pd.DataFrame()
+        tickets = get_all_tickets(columns=TICKET_LIST_COLUMNS)
+        status_counts = Counter(ticket['Status'] for ticket in tickets)
         
         # Calculate statistics
         stats = {
             'total': len(tickets),
-            'open': len(df[df['Status'] == 'Open']),
-            'in_progress': len(df[df['Status'] == 'In Progress']),
-            'resolved': len(df[df['Status'] == 'Resolved']),
+            'open': status_counts['Open'],
+            'in_progress': status_counts['In Progress'],
+            'resolved': status_counts['Resolved'],
             # Priority stats removed - all tickets equal
             'overdue': 0  # Calculate overdue tickets
         }
@@ -367,28 +629,13 @@ def update_ticket():
 
     try:
         if USE_DATABASE:
-            # Update multiple fields in database
+            # Update multiple fields in database, in one transaction
+            fields = {'status': status, 'due_date': due_date, 'action_taken': action_taken,
+                      'assigned_to': assigned_to, 'notes': notes}
+            updates = {field: value for field, value in fields.items() if value}
             updates_made = []
-            
-            if status:
-                if db_manager.update_ticket(ticket_id, 'status', status):
-                    updates_made.append('status')
-            
-            if due_date:
-                if db_manager.update_ticket(ticket_id, 'due_date', due_date):
-                    updates_made.append('due date')
-            
-            if action_taken:
-                if db_manager.update_ticket(ticket_id, 'action_taken', action_taken):
-                    updates_made.append('action taken')
-            
-            if assigned_to:
-                if db_manager.update_ticket(ticket_id, 'assigned_to', assigned_to):
-                    updates_made.append('assigned to')
-            
-            if notes:
-                if db_manager.update_ticket(ticket_id, 'notes', notes):
-                    updates_made.append('notes')
+            if updates and current_db().update_ticket_fields(ticket_id, updates):
+                updates_made = [field.replace('_', ' ') for field in updates]
             
             if updates_made:
                 success_message = f'Ticket {ticket_id} updated successfully! Updated: {", ".join(updates_made)}'
@@ -397,7 +644,7 @@ def update_ticket():
                 
         else:
             # Update in CSV
-            df = pd.read_csv(CSV_FILE, dtype=str)
+            df = read_tickets_csv(dtype=str)
             # Fill NaN values with empty strings to prevent dtype issues
             df = df.fillna('')
             
@@ -428,10 +675,10 @@ def update_ticket():
                     updates_made.append('notes')
                 
                 # Update timestamp
-                df.loc[mask, 'Updated At'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                df.loc[mask, 'Updated At'] = utc_timestamp()
                 
                 # Save back to CSV
-                df.to_csv(CSV_FILE, index=False)
+                write_tickets_csv(df)
                 
                 if updates_made:
                     success_message = f'Ticket {ticket_id} updated successfully! Updated: {", ".join(updates_made)}'
@@ -459,126 +706,404 @@ def update_ticket():
 def delete_ticket(ticket_id):
     """Delete a ticket - SuperAdmin only"""
     try:
-        if USE_DATABASE:
-            # Delete from database
-            if db_manager.delete_ticket(ticket_id):
-                flash(f'Ticket {ticket_id} has been permanently deleted.', 'success')
-            else:
-                flash(f'Ticket {ticket_id} not found or could not be deleted.', 'error')
+        if delete_ticket_data(ticket_id):
+            flash(f'Ticket {ticket_id} has been permanently deleted.', 'success')
         else:
-            # Delete from CSV
-            df = pd.read_csv(CSV_FILE, dtype=str)
-            df = df.fillna('')
-            
-            # Find the ticket
-            mask = df['Ticket ID'] == ticket_id
-            if mask.any():
-                # Remove the ticket row
-                df = df[~mask]
-                # Save back to CSV
-                df.to_csv(CSV_FILE, index=False)
-                flash(f'Ticket {ticket_id} has been permanently deleted.', 'success')
-            else:
-                flash(f'Ticket {ticket_id} not found.', 'error')
-                
+            flash(f'Ticket {ticket_id} not found or could not be deleted.', 'error')
     except Exception as e:
         flash(f'Error deleting ticket: {str(e)}', 'error')
     
     return redirect(url_for('view_tickets'))
 
 @app.route('/api/tickets')
+@sync_auth_required
 def api_tickets():
-    """API endpoint for tickets data"""
+    """API endpoint for tickets data (contact numbers included: staff or SYNC_API_TOKEN consumers only)"""
     try:
-        df = pd.read_csv(CSV_FILE)
-        return jsonify(df.to_dict('records'))
+        return jsonify(get_all_tickets())
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/tickets/<ticket_id>/events')
+@login_required
+def api_ticket_events(ticket_id):
+    """API endpoint for a ticket's change history (database mode only)"""
+    if not USE_DATABASE:
+        return jsonify({'error': 'Ticket history requires the database backend'}), 404
+    try:
+        return jsonify(current_db().get_ticket_events(ticket_id))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/tickets/<ticket_id>/status')
+@lookup_rate_limit
+def api_ticket_status(ticket_id):
+    """Public status check for residents: ticket ID plus the contact number it was raised with"""
+    contact = ''.join(ch for ch in request.args.get('contact_number', '') if ch.isdigit())
+    ticket_id = ticket_id.strip().upper()
+    try:
+        ticket = get_ticket_status(ticket_id) if contact else None
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    stored_contact = ''.join(ch for ch in str(ticket['Contact Number']) if ch.isdigit()) if ticket else ''
+    # Same answer for unknown tickets and wrong numbers, so IDs can't be probed
+    if not ticket or not hmac.compare_digest(stored_contact, contact):
+        return jsonify({'error': 'No ticket found for that ticket ID and contact number'}), 404
+    response = jsonify({key: ticket[key] for key in STATUS_LOOKUP_CSV_COLUMNS if key != 'Contact Number'})
+    response.headers['Cache-Control'] = f"private, max-age={int(STATUS_LOOKUP_CONFIG['cache_ttl'])}"
+    return response
+
+SYNC_START = (datetime.min, 0)
+
+def encode_sync_cursor(ticket_cursor, tombstone_cursor):
+    data = [[ticket_cursor[0].isoformat(), ticket_cursor[1]], [tombstone_cursor[0].isoformat(), tombstone_cursor[1]]]
+    return base64.urlsafe_b64encode(json.dumps(data, separators=(',', ':')).encode()).decode().rstrip('=')
+
+def decode_sync_cursor(since):
+    """(ticket cursor, tombstone cursor) from a cursor token or an ISO timestamp; ValueError if neither"""
+    if not since:
+        return SYNC_START, SYNC_START
+    try:
+        # A plain watermark: everything changed at or after this UTC time
+        start = (datetime.fromisoformat(since), 0)
+        return start, start
+    except ValueError:
+        pass
+    try:
+        data = json.loads(base64.urlsafe_b64decode(since + '=' * (-len(since) % 4)))
+        return tuple((datetime.fromisoformat(ts), int(last_id)) for ts, last_id in data)
+    except Exception:
+        raise ValueError('Invalid since cursor')
+
+@app.route('/api/tickets/changes')
+@sync_auth_required
+def api_ticket_changes():
+    """Tickets created, updated or deleted since a cursor, oldest first, with the next cursor"""
+    if not USE_DATABASE:
+        return jsonify({'error': 'Delta sync requires the database backend'}), 404
+    try:
+        ticket_cursor, tombstone_cursor = decode_sync_cursor(request.args.get('since', ''))
+        limit = min(max(request.args.get('limit', SYNC_CONFIG['page_size'], type=int), 1),
+                    SYNC_CONFIG['max_page_size'])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        changes, ticket_cursor, tombstone_cursor, has_more = current_db().get_changes(
+            ticket_cursor, tombstone_cursor, limit, SYNC_CONFIG['settle_seconds'])
+        return jsonify({
+            'changes': changes,
+            'next': encode_sync_cursor(ticket_cursor, tombstone_cursor),
+            'has_more': has_more
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+STATUS_COUNT_COLUMNS = ['block_no', 'problem_type', 'status']
+
+def count_by_status(columns):
+    """Ticket counts per (block, problem type, status) from column data, in one groupby"""
+    if columns.empty:
+        return pd.DataFrame(columns=STATUS_COUNT_COLUMNS + ['count'])
+    return columns.groupby(STATUS_COUNT_COLUMNS, sort=False).size().reset_index(name='count')
+
+@cached('status_counts')
+def get_status_counts(start_date=None, end_date=None):
+    """Ticket counts per (block, problem type, status) - a SQL GROUP BY in database mode"""
+    if USE_DATABASE:
+        return current_db().get_status_counts(start_date, end_date)
+    else:
+        return count_by_status(get_ticket_columns(STATUS_COUNT_COLUMNS, start_date, end_date))
+
+def completion_rate(completed, total):
+    return round(completed / total * 100, 1) if total else 0
+
+def build_reports_data(status_counts):
+    """Compute summary statistics and chart data for the reports page
+    
+    Works on the grouped (block, problem type, status) counts, so its cost
+    depends on the number of groups rather than the number of tickets.
+    """
+    if status_counts.empty:
+        # Handle empty dataframe
+        reports_data = {
+            'total_tickets': 0,
+            'open_tickets': 0,
+            'in_progress_tickets': 0,
+            'resolved_tickets': 0,
+            'completion_rate': 0,
+            'block_summary': {},
+            # Priority summary removed
+
+            'status_chart_data': {'labels': [], 'data': []},
+            # Priority chart data removed
+            'block_chart_data': {'labels': [], 'data': []},
+            'problem_chart_data': {'labels': [], 'data': []}
+        }
+    else:
+        # Block x status matrix; every other figure is a sum over it
+        matrix = status_counts.pivot_table(index='block_no', columns='status', values='count',
+                                           aggfunc='sum', fill_value=0)
+        matrix = matrix.reindex(columns=STATUS_OPTIONS + [c for c in matrix.columns if c not in STATUS_OPTIONS],
+                                fill_value=0)
+        block_totals = matrix.sum(axis=1)
+        completed = matrix['Resolved'] + matrix['Closed']
+        status_totals = matrix.sum(axis=0)
+        
+        total_tickets = int(block_totals.sum())
+        
+        # Block summary with detailed breakdown
+        block_summary = {}
+        for block, row in matrix.iterrows():
+            block_summary[block] = {
+                'total': int(block_totals[block]),
+                'open': int(row['Open']),
+                'in_progress': int(row['In Progress']),
+                'resolved': int(row['Resolved']),
+                'completed': int(completed[block]),
+                'completion_rate': completion_rate(int(completed[block]), int(block_totals[block]))
+            }
+        
+        # Priority summary removed - all tickets equal
+        
+        # Chart data
+        status_counts_series = status_totals[status_totals > 0].sort_values(ascending=False)
+        # Priority counts removed
+        block_counts = block_totals.sort_values(ascending=False)
+        problem_counts = status_counts.groupby('problem_type')['count'].sum().sort_values(ascending=False)
+        
+        reports_data = {
+            'total_tickets': total_tickets,
+            'open_tickets': int(status_totals['Open']),
+            'in_progress_tickets': int(status_totals['In Progress']),
+            'resolved_tickets': int(status_totals['Resolved']),
+            'completion_rate': completion_rate(int(completed.sum()), total_tickets),
+            'block_summary': block_summary,
+            # Priority summary removed
+
+            'status_chart_data': {
+                'labels': status_counts_series.index.tolist(),
+                'data': [int(v) for v in status_counts_series.values]
+            },
+            # Priority chart data removed,
+            'block_chart_data': {
+                'labels': block_counts.index.tolist(),
+                'data': [int(v) for v in block_counts.values]
+            },
+            'problem_chart_data': {
+                'labels': problem_counts.index.tolist(),
+                'data': [int(v) for v in problem_counts.values]
+            }
+        }
+    
+    return reports_data
+
+def get_daily_counts(start_date):
+    """Opened/resolved/closed ticket counts per day since start_date"""
+    if USE_DATABASE:
+        return current_db().get_daily_rollup(start_date)
+    else:
+        # CSV mode has no rollup table; group the raw rows instead
+        df = read_tickets_csv(dtype=str).fillna('')
+        if df.empty:
+            return []
+        counts = {}
+        raised = pd.to_datetime(df['Date Raised'], errors='coerce').dt.date
+        for day, count in raised[raised >= start_date].value_counts().items():
+            counts.setdefault(day, {'day': day, 'opened': 0, 'resolved': 0, 'closed': 0})['opened'] = int(count)
+        finished = df[df['Status'].isin(['Resolved', 'Closed'])]
+        updated = pd.to_datetime(finished['Updated At'], format='ISO8601', errors='coerce').dt.date
+        grouped = finished.assign(day=updated)[updated >= start_date].groupby(['day', 'Status']).size()
+        for (day, status), count in grouped.items():
+            counts.setdefault(day, {'day': day, 'opened': 0, 'resolved': 0, 'closed': 0})[status.lower()] = int(count)
+        return list(counts.values())
+
+def build_trends(daily_counts, today=None):
+    """Window totals and a daily series with rolling averages for the reports page"""
+    today = today or datetime.now().date()
+    by_day = {row['day']: row for row in daily_counts}
+    
+    def totals(first, last):
+        opened = completed = 0
+        day = first
+        while day <= last:
+            row = by_day.get(day)
+            if row:
+                opened += row['opened']
+                completed += row['resolved'] + row['closed']
+            day += timedelta(days=1)
+        return opened, completed
+    
+    windows = []
+    for label, days in TREND_WINDOWS:
+        opened, completed = totals(today - timedelta(days=days - 1), today)
+        prev_opened, prev_completed = totals(today - timedelta(days=2 * days - 1), today - timedelta(days=days))
+        windows.append({
+            'label': label,
+            'opened': opened,
+            'completed': completed,
+            'prev_opened': prev_opened,
+            'prev_completed': prev_completed,
+            'daily_opened': round(opened / days, 1),
+            'daily_completed': round(completed / days, 1)
+        })
+    
+    # Daily series with trailing rolling averages (needs ROLLING_AVERAGE_DAYS - 1 earlier days)
+    history = TREND_CHART_DAYS + ROLLING_AVERAGE_DAYS - 1
+    days = [today - timedelta(days=offset) for offset in range(history - 1, -1, -1)]
+    opened = [by_day[d]['opened'] if d in by_day else 0 for d in days]
+    completed = [by_day[d]['resolved'] + by_day[d]['closed'] if d in by_day else 0 for d in days]
+    
+    def rolling(values):
+        return [round(sum(values[i - ROLLING_AVERAGE_DAYS + 1:i + 1]) / ROLLING_AVERAGE_DAYS, 2)
+                for i in range(ROLLING_AVERAGE_DAYS - 1, len(values))]
+    
+    skip = ROLLING_AVERAGE_DAYS - 1
+    return {
+        'windows': windows,
+        'labels': [d.strftime('%Y-%m-%d') for d in days[skip:]],
+        'opened': opened[skip:],
+        'completed': completed[skip:],
+        'opened_avg': rolling(opened),
+        'completed_avg': rolling(completed)
+    }
+
+def get_ticket_trends():
+    """Trend data covering the longest window and its previous period"""
+    today = datetime.now().date()
+    longest = max([days for _, days in TREND_WINDOWS] + [TREND_CHART_DAYS + ROLLING_AVERAGE_DAYS - 1])
+    return build_trends(get_daily_counts(today - timedelta(days=2 * longest)), today)
+
+# Ticket model attributes and their CSV headers, for column-oriented reads
+TICKET_COLUMNS = {
+    'ticket_id': 'Ticket ID',
+    'flat_no': 'Flat No',
+    'block_no': 'Block No',
+    'problem_type': 'Problem Type',
+    'date_raised': 'Date Raised',
+    'contact_number': 'Contact Number',
+    'status': 'Status',
+    'assigned_to': 'Assigned To',
+    'due_date': 'Due Date',
+    'created_at': 'Created At',
+    'updated_at': 'Updated At'
+}
+ANALYTICS_COLUMNS = ['status', 'block_no', 'problem_type', 'assigned_to', 'created_at', 'updated_at',
+                     'status_changed_at', 'due_date']
+
+def get_ticket_columns(columns, start_date=None, end_date=None):
+    """Only the requested ticket columns, as a DataFrame keyed by model attribute name"""
+    if USE_DATABASE:
+        return current_db().get_ticket_columns(columns, start_date, end_date)
+    else:
+        # The CSV has no status_changed_at; readers fall back to updated_at
+        columns = [name for name in columns if name in TICKET_COLUMNS]
+        headers = [TICKET_COLUMNS[name] for name in columns]
+        df = read_tickets_in_range(start_date, end_date, usecols=headers, dtype=str)
+        return df.rename(columns={header: name for name, header in zip(columns, headers)})
+
+def get_history_sketches():
+    """Approximate per-block history stats merged from the stored sketches"""
+    if USE_DATABASE:
+        return summarize_sketches(current_db().get_sketches())
+    else:
+        # CSV mode keeps no sketch table; build them from the file
+        groups = fold_tickets({}, get_ticket_columns(SKETCH_COLUMNS))
+        return summarize_sketches([(block_no, problem_type, *entry)
+                                   for (block_no, problem_type), entry in groups.items()])
+
+def get_date_range():
+    """Optional ?from=YYYY-MM-DD&to=YYYY-MM-DD range; invalid values are ignored"""
+    dates = []
+    for name in ('from', 'to'):
+        try:
+            dates.append(datetime.strptime(request.args.get(name, ''), '%Y-%m-%d').date())
+        except ValueError:
+            dates.append(None)
+    return tuple(dates)
+
+@cached('reports')
+def build_full_report(start_date=None, end_date=None):
+    """Everything the reports page renders, including chart data"""
+    reports_data = build_reports_data(get_status_counts(start_date, end_date))
+    reports_data['trends'] = get_ticket_trends()
+    reports_data['resolution'] = resolution_analytics(get_ticket_columns(ANALYTICS_COLUMNS, start_date, end_date))
+    reports_data['history'] = get_history_sketches()
+    return reports_data
+
+# Precomputes the unfiltered report in the background when REPORT_PRECOMPUTE is enabled
+report_scheduler = init_report_scheduler(build_full_report)
+
 @app.route('/reports')
 @login_required
 def reports():
     """Generate reports and analytics - requires admin login"""
     try:
-        tickets = get_all_tickets()
-        df = pd.DataFrame(tickets) if tickets else pd.DataFrame()
-        
-        if df.empty:
-            # Handle empty dataframe
-            reports_data = {
-                'total_tickets': 0,
-                'open_tickets': 0,
-                'in_progress_tickets': 0,
-                'resolved_tickets': 0,
-                'block_summary': {},
-                # Priority summary removed
-
-                'status_chart_data': {'labels': [], 'data': []},
-                # Priority chart data removed
-                'block_chart_data': {'labels': [], 'data': []},
-                'problem_chart_data': {'labels': [], 'data': []}
-            }
+        start_date, end_date = get_date_range()
+        snapshot = None
+        # Snapshots cover the default complex only; other complexes are computed live
+        if REPORT_SCHEDULER_CONFIG['enabled'] and not (start_date or end_date) and current_complex() == DEFAULT_COMPLEX:
+            # Serve the latest precomputed snapshot; ?refresh=1 recomputes and republishes it
+            if not request.args.get('refresh'):
+                snapshot = report_scheduler.latest()
+            if snapshot is None:
+                snapshot = report_scheduler.refresh()
+            reports_data = snapshot['reports']
         else:
-            # Calculate summary statistics
-            total_tickets = len(df)
-            open_tickets = len(df[df['Status'] == 'Open'])
-            in_progress_tickets = len(df[df['Status'] == 'In Progress'])
-            resolved_tickets = len(df[df['Status'] == 'Resolved'])
-            
-            # Block summary with detailed breakdown
-            block_summary = {}
-            for block in df['Block No'].unique():
-                block_df = df[df['Block No'] == block]
-                block_summary[block] = {
-                    'total': len(block_df),
-                    'open': len(block_df[block_df['Status'] == 'Open']),
-                    'in_progress': len(block_df[block_df['Status'] == 'In Progress']),
-                    'resolved': len(block_df[block_df['Status'] == 'Resolved']),
-                    'completed': len(block_df[block_df['Status'].isin(['Resolved', 'Closed'])])
-                }
-            
-            # Priority summary removed - all tickets equal
-            
-            # Chart data
-            status_counts = df['Status'].value_counts()
-            # Priority counts removed
-            block_counts = df['Block No'].value_counts()
-            problem_counts = df['Problem Type'].value_counts()
-            
-            reports_data = {
-                'total_tickets': total_tickets,
-                'open_tickets': open_tickets,
-                'in_progress_tickets': in_progress_tickets,
-                'resolved_tickets': resolved_tickets,
-                'block_summary': block_summary,
-                # Priority summary removed
-
-                'status_chart_data': {
-                    'labels': status_counts.index.tolist(),
-                    'data': status_counts.values.tolist()
-                },
-                # Priority chart data removed,
-                'block_chart_data': {
-                    'labels': block_counts.index.tolist(),
-                    'data': block_counts.values.tolist()
-                },
-                'problem_chart_data': {
-                    'labels': problem_counts.index.tolist(),
-                    'data': problem_counts.values.tolist()
-                }
-            }
-        
-        return render_template('reports.html', reports=reports_data)
+            reports_data = build_full_report(start_date, end_date)
+        date_range = {name: value.isoformat() for name, value in (('from', start_date), ('to', end_date)) if value}
+        return render_template('reports.html', reports=reports_data, date_range=date_range, snapshot=snapshot)
     except Exception as e:
         flash('Error generating reports. Please try again.', 'error')
         return redirect(url_for('view_tickets'))
 
+# Export summary sheets: (sheet name, row columns, column spread across the sheet or None)
+EXPORT_SUMMARIES = [
+    ('By Status', ['Status'], None),
+    ('By Block', ['Block No'], None),
+    ('By Problem Type', ['Problem Type'], None),
+    ('Block x Status', ['Block No'], 'Status'),
+    ('By Assignee', ['Assigned To'], 'Status')
+]
+EXPORT_BLANK_LABEL = '(blank)'
+
+def build_export_summaries(df, summaries=EXPORT_SUMMARIES):
+    """Every summary sheet, derived from one grouped count over all of their columns"""
+    dimensions = list(dict.fromkeys(
+        column for _, rows, spread in summaries for column in rows + ([spread] if spread else [])))
+    # The only pass over the tickets: hash-encode each column and count the combined codes
+    codes, labels = [], []
+    for column in dimensions:
+        column_codes, column_labels = pd.factorize(df[column], use_na_sentinel=False)
+        column_labels = pd.Index(column_labels).fillna('').astype(str)
+        codes.append(column_codes)
+        labels.append(column_labels.where(column_labels != '', EXPORT_BLANK_LABEL))
+    shape = tuple(max(len(column_labels), 1) for column_labels in labels)
+    combined, counts = np.unique(np.ravel_multi_index(codes, shape), return_counts=True)
+    cube = pd.Series(counts, index=pd.MultiIndex.from_arrays(
+        [column_labels.take(column_codes)
+         for column_labels, column_codes in zip(labels, np.unravel_index(combined, shape))],
+        names=dimensions))
+    # Each sheet re-aggregates the small cube, not the tickets
+    sheets = {}
+    for name, rows, spread in summaries:
+        if spread:
+            table = cube.groupby(level=rows + [spread]).sum().unstack(spread, fill_value=0)
+            table['Total'] = table.sum(axis=1)
+        else:
+            table = cube.groupby(level=rows).sum().to_frame('Count')
+        sheets[name] = table
+    return sheets
+
 @app.route('/export')
+@sync_auth_required
 def export_tickets():
     """Export tickets as Excel file with enhanced data"""
     try:
-        df = pd.read_csv(CSV_FILE)
-        excel_file = 'tickets_export.xlsx'
+        start_date, end_date = get_date_range()
+        tickets = get_all_tickets(start_date, end_date)
+        df = tickets_frame(tickets) if tickets else pd.DataFrame(columns=CSV_HEADERS)
+        # Built in memory so concurrent exports never share a file on disk
+        excel_file = io.BytesIO()
         
         # Create Excel writer with multiple sheets
         with pd.ExcelWriter(excel_file, engine='openpyxl') as writer:
@@ -586,17 +1111,209 @@ def export_tickets():
             df.to_excel(writer, sheet_name='All Tickets', index=False)
             
             # Summary sheets
-            df.groupby('Status').size().to_excel(writer, sheet_name='By Status')
-            df.groupby('Block No').size().to_excel(writer, sheet_name='By Block')
-            df.groupby('Problem Type').size().to_excel(writer, sheet_name='By Problem Type')
-            # Priority grouping removed
+            for sheet_name, table in build_export_summaries(df).items():
+                table.to_excel(writer, sheet_name=sheet_name)
+            
+            # Workbook and DataFrame are both in memory here
+            memory_checkpoint()
         
-        return send_file(excel_file, as_attachment=True, 
-                        download_name=f'tickets_report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx')
+        excel_file.seek(0)
+        export_prefix = '' if current_complex() == DEFAULT_COMPLEX else f'{current_complex()}_'
+        return send_file(excel_file, as_attachment=True,
+                        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+                        download_name=f'tickets_report_{export_prefix}{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx')
     except Exception as e:
         flash(f'Error exporting tickets: {str(e)}', 'error')
         return redirect(url_for('view_tickets'))
 
+# Outstanding statuses shown on the workload dashboard and their summary keys
+WORKLOAD_STATUS_KEYS = {'Open': 'open', 'In Progress': 'in_progress', 'On Hold': 'on_hold'}
+WORKLOAD_REFRESH_SECONDS = 30
+
+@cached('workload')
+def get_workload_counts(today):
+    """Outstanding ticket count, overdue count and average age per (assignee, status)"""
+    if USE_DATABASE:
+        return current_db().get_workload(today)
+    else:
+        df = get_ticket_columns(['assigned_to', 'status', 'due_date', 'date_raised'])
+        df = df[df['status'].isin(list(WORKLOAD_STATUS_KEYS))]
+        if df.empty:
+            return []
+        today = pd.Timestamp(today)
+        df = df.assign(
+            assigned_to=df['assigned_to'].fillna('Unassigned'),
+            overdue=pd.to_datetime(df['due_date'], errors='coerce') < today,
+            age=(today - pd.to_datetime(df['date_raised'], errors='coerce')).dt.days
+        )
+        grouped = df.groupby(['assigned_to', 'status']).agg(
+            count=('status', 'size'), overdue=('overdue', 'sum'), avg_age_days=('age', 'mean'))
+        return [
+            {'assigned_to': assigned_to, 'status': status, 'count': int(row['count']),
+             'overdue': int(row['overdue']), 'avg_age_days': float(row['avg_age_days'] or 0)}
+            for (assigned_to, status), row in grouped.fillna(0).iterrows()
+        ]
+
+def build_workload(counts):
+    """Per-assignee open/in-progress/on-hold/overdue counts and average age, busiest first"""
+    staff = {name: {'assigned_to': name, 'open': 0, 'in_progress': 0, 'on_hold': 0,
+                    'total': 0, 'overdue': 0, 'avg_age_days': 0}
+             for name in STAFF_MEMBERS}
+    age_totals = {}
+    for row in counts:
+        entry = staff.setdefault(row['assigned_to'], {'assigned_to': row['assigned_to'], 'open': 0,
+                                                      'in_progress': 0, 'on_hold': 0, 'total': 0,
+                                                      'overdue': 0, 'avg_age_days': 0})
+        entry[WORKLOAD_STATUS_KEYS[row['status']]] += row['count']
+        entry['total'] += row['count']
+        entry['overdue'] += row['overdue']
+        age_totals[row['assigned_to']] = age_totals.get(row['assigned_to'], 0) + row['avg_age_days'] * row['count']
+    for name, entry in staff.items():
+        if entry['total']:
+            entry['avg_age_days'] = round(age_totals[name] / entry['total'], 1)
+    rows = sorted(staff.values(), key=lambda r: (-r['total'], r['assigned_to']))
+    totals = {key: sum(r[key] for r in rows) for key in ('open', 'in_progress', 'on_hold', 'total', 'overdue')}
+    return {'staff': rows, 'totals': totals}
+
+def get_staff_workload():
+    today = datetime.now().date()
+    workload = build_workload(get_workload_counts(today))
+    workload['generated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    return workload
+
+@app.route('/workload')
+@login_required
+def workload():
+    """Staff workload dashboard - requires admin login"""
+    try:
+        return render_template('workload.html', workload=get_staff_workload(),
+                               refresh_seconds=WORKLOAD_REFRESH_SECONDS)
+    except Exception as e:
+        flash('Error loading staff workload. Please try again.', 'error')
+        return redirect(url_for('view_tickets'))
+
+@app.route('/api/workload')
+@login_required
+def api_workload():
+    """API endpoint for the staff workload dashboard"""
+    try:
+        return jsonify(get_staff_workload())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+FLAT_HISTORY_COLUMNS = ['ticket_id', 'date_raised', 'problem_type', 'status']
+
+def get_flat_tickets(block_no, flat_no):
+    """One flat's active and archived tickets (FLAT_HISTORY_COLUMNS) as a DataFrame"""
+    if USE_DATABASE:
+        return current_db().get_flat_history(block_no, flat_no)
+    else:
+        # No index in CSV mode: a column-pruned scan of both files
+        headers = [TICKET_COLUMNS[name] for name in ['block_no', 'flat_no'] + FLAT_HISTORY_COLUMNS]
+        frames = [read_tickets_csv(usecols=headers, dtype=str)]
+        if os.path.exists(archive_csv_file()):
+            record_csv_read(archive_csv_file())
+            frames.append(pd.read_csv(archive_csv_file(), usecols=headers, dtype=str))
+        df = pd.concat(frames, ignore_index=True)
+        df = df[(df['Block No'] == block_no) & (df['Flat No'] == flat_no)]
+        return df.rename(columns={header: name for name, header in zip(['block_no', 'flat_no'] + FLAT_HISTORY_COLUMNS,
+                                                                        headers)})[FLAT_HISTORY_COLUMNS]
+
+def build_flat_history(df, repeat_days):
+    """Tickets in date order, each flagged as a repeat of the flat's previous ticket of the same problem type"""
+    df = df.assign(raised=pd.to_datetime(df['date_raised'], errors='coerce')).sort_values(
+        ['raised', 'ticket_id'], kind='stable')
+    by_type = df.groupby('problem_type', sort=False)
+    gap = (df['raised'] - by_type['raised'].shift()).dt.days
+    previous = by_type['ticket_id'].shift()
+    repeat = gap.notna() & (gap <= repeat_days)
+    tickets = [
+        {'ticket_id': row.ticket_id,
+         'date_raised': row.raised.strftime('%Y-%m-%d') if pd.notna(row.raised) else '',
+         'problem_type': row.problem_type,
+         'status': row.status,
+         'repeat_of': previous[index] if repeat[index] else None,
+         'days_since_previous': int(gap[index]) if pd.notna(gap[index]) else None}
+        for index, row in zip(df.index, df.itertuples())
+    ]
+    repeats = df.loc[repeat, 'problem_type'].value_counts()
+    return {
+        'tickets': tickets,
+        'total': len(tickets),
+        'repeat_days': repeat_days,
+        'repeats': int(repeat.sum()),
+        'repeats_by_problem_type': {problem_type: int(count) for problem_type, count in repeats.items()}
+    }
+
+def get_flat_history(block_no, flat_no, repeat_days=None):
+    history = build_flat_history(get_flat_tickets(block_no, flat_no),
+                                 repeat_days if repeat_days is not None else FLAT_HISTORY_CONFIG['repeat_days'])
+    history.update(block_no=block_no, flat_no=flat_no)
+    return history
+
+def flat_history_args():
+    """(block_no, flat_no, repeat_days) from the query string"""
+    repeat_days = request.args.get('repeat_days', type=int)
+    return (request.args.get('block_no', '').strip(), request.args.get('flat_no', '').strip(),
+            max(repeat_days, 0) if repeat_days is not None else None)
+
+@app.route('/flat_history')
+@login_required
+def flat_history():
+    """Every ticket one flat has raised, with repeat issues flagged - requires admin login"""
+    block_no, flat_no, repeat_days = flat_history_args()
+    history = None
+    if block_no and flat_no:
+        try:
+            history = get_flat_history(block_no, flat_no, repeat_days)
+        except Exception as e:
+            flash('Error loading flat history. Please try again.', 'error')
+    return render_template('flat_history.html', history=history, block_no=block_no, flat_no=flat_no,
+                           block_options=BLOCK_OPTIONS)
+
+@app.route('/api/flat_history')
+@login_required
+def api_flat_history():
+    """API endpoint for one flat's ticket history"""
+    block_no, flat_no, repeat_days = flat_history_args()
+    if not (block_no and flat_no):
+        return jsonify({'error': 'block_no and flat_no are required'}), 400
+    try:
+        return jsonify(get_flat_history(block_no, flat_no, repeat_days))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/admin/archive', methods=['POST'])
+@superadmin_required
+def archive_tickets():
+    """Archive Resolved/Closed tickets older than ARCHIVE_AFTER_DAYS (or ?after_days=N)"""
+    after_days = request.args.get('after_days', ARCHIVE_CONFIG['after_days'], type=int)
+    try:
+        return jsonify({'archived': archive_closed_tickets(after_days), 'after_days': after_days})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus metrics endpoint"""
+    return collect_metrics(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+@app.route('/admin/query_profile')
+@superadmin_required
+def query_profile_report():
+    """Per-route database profiling summary (enable with DB_PROFILE=true)"""
+    if not PROFILE_CONFIG['enabled']:
+        return jsonify({'error': 'Query profiling is disabled. Set DB_PROFILE=true to enable it.'}), 404
+    return jsonify(query_profile.summary())
+
+@app.route('/admin/memory_profile')
+@superadmin_required
+def memory_profile_report():
+    """Per-route memory profiling summary (enable with MEMORY_PROFILE=true)"""
+    if not MEMORY_PROFILE_CONFIG['enabled']:
+        return jsonify({'error': 'Memory profiling is disabled. Set MEMORY_PROFILE=true to enable it.'}), 404
+    return jsonify(memory_profile.summary())
+
 # Cloud deployment configuration
 if __name__ == '__main__':
     # Get port from environment (for cloud platforms)
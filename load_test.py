@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Load test for the Apartment Issue Ticketing System.
+
+Starts enhanced_app.py locally (or targets --url) and drives a mix of
+/submit, /tickets, /update_ticket, /reports and /export from many
+concurrent clients. Reports throughput, p50/p95/p99 latency and error rate
+per endpoint, then verifies data integrity: no duplicate ticket IDs, no
+lost submissions and no lost updates.
+
+Usage:
+    python load_test.py
+    python load_test.py --clients 20 --duration 30
+    python load_test.py --url http://localhost:5002 --clients 5
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import requests
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PORT = 5099
+ADMIN_CREDENTIALS = {'username': 'admin', 'password': 'admin'}
+
+# Relative weight of each endpoint in the request mix
+ENDPOINT_MIX = {
+    'submit': 40,
+    'tickets': 20,
+    'update_ticket': 25,
+    'reports': 10,
+    'export': 5
+}
+
+class LoadStats:
+    """Latency samples and error counts per endpoint"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.error_samples = defaultdict(list)
+
+    def record(self, endpoint, elapsed, ok, detail=''):
+        with self.lock:
+            self.latencies[endpoint].append(elapsed)
+            if not ok:
+                self.errors[endpoint] += 1
+                if len(self.error_samples[endpoint]) < 3:
+                    self.error_samples[endpoint].append(detail)
+
+    def summary(self, wall_time):
+        rows = []
+        for endpoint in ENDPOINT_MIX:
+            samples = sorted(self.latencies.get(endpoint, []))
+            if not samples:
+                continue
+            rows.append({
+                'endpoint': endpoint,
+                'requests': len(samples),
+                'throughput_rps': round(len(samples) / wall_time, 2),
+                'p50_ms': round(percentile(samples, 50) * 1000, 1),
+                'p95_ms': round(percentile(samples, 95) * 1000, 1),
+                'p99_ms': round(percentile(samples, 99) * 1000, 1),
+                'error_rate': round(self.errors[endpoint] / len(samples), 4),
+                'error_samples': self.error_samples.get(endpoint, [])
+            })
+        return rows
+
+def percentile(sorted_samples, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    index = max(0, int(round(pct / 100.0 * len(sorted_samples))) - 1)
+    return sorted_samples[min(index, len(sorted_samples) - 1)]
+
+def start_server(port, workdir, rate_limit):
+    """Run enhanced_app.py from a scratch directory so test data stays isolated"""
+    env = dict(os.environ,
+               PORT=str(port),
+               FLASK_ENV='production',
+               DB_PATH=os.path.join(workdir, 'tickets.db'),
+               RATE_LIMIT_ENABLED='true' if rate_limit else 'false')
+    log = open(os.path.join(workdir, 'server.log'), 'w')
+    process = subprocess.Popen([sys.executable, os.path.join(APP_DIR, 'enhanced_app.py')],
+                               cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT)
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'Server exited early; see {log.name}')
+        try:
+            if requests.get(base_url, timeout=1).status_code == 200:
+                return process, base_url
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('Server did not start within 30 seconds')
+
+def logged_in_session(base_url):
+    client = requests.Session()
+    client.post(f'{base_url}/login', data=ADMIN_CREDENTIALS, allow_redirects=False, timeout=10)
+    return client
+
+def fetch_tickets(client, base_url):
+    response = client.get(f'{base_url}/api/tickets', timeout=60)
+    response.raise_for_status()
+    return response.json()
+
+def ticket_form(flat_no):
+    return {
+        'flat_no': flat_no,
+        'block_no': random.choice(['A', 'B', 'C', 'D']),
+        'problem_type': random.choice(['Plumbing', 'Electrical', 'Civil']),
+        'date_raised': datetime.now().strftime('%Y-%m-%d'),
+        'contact_number': f'9{random.randint(100000000, 999999999)}',
+        'description': 'Load test ticket'
+    }
+
+def run_client(client_id, base_url, deadline, stats, owned_tickets, submitted, last_notes):
+    """One simulated user issuing weighted random requests until the deadline"""
+    client = logged_in_session(base_url)
+    endpoints = list(ENDPOINT_MIX)
+    weights = list(ENDPOINT_MIX.values())
+    seq = 0
+    while time.time() < deadline:
+        endpoint = random.choices(endpoints, weights)[0]
+        seq += 1
+        start = time.perf_counter()
+        try:
+            if endpoint == 'submit':
+                flat_no = f'LT{client_id}-{seq}'
+                response = client.post(f'{base_url}/submit', data=ticket_form(flat_no),
+                                       allow_redirects=False, timeout=60)
+                ok = response.status_code == 302
+                if ok:
+                    submitted.append(flat_no)
+            elif endpoint == 'update_ticket':
+                if not owned_tickets:
+                    continue
+                ticket_id = random.choice(owned_tickets)
+                note = f'client {client_id} update {seq}'
+                response = client.post(f'{base_url}/update_ticket',
+                                       data={'ticket_id': ticket_id, 'notes': note},
+                                       headers={'X-Requested-With': 'XMLHttpRequest'}, timeout=60)
+                ok = response.status_code == 200 and response.json().get('success', False)
+                if ok:
+                    last_notes[ticket_id] = note
+            elif endpoint == 'tickets':
+                response = client.get(f'{base_url}/tickets', allow_redirects=False, timeout=60)
+                ok = response.status_code == 200
+            elif endpoint == 'reports':
+                response = client.get(f'{base_url}/reports', allow_redirects=False, timeout=60)
+                ok = response.status_code == 200
+            else:
+                response = client.get(f'{base_url}/export', allow_redirects=False, timeout=60)
+                ok = response.status_code == 200
+            detail = '' if ok else f'HTTP {response.status_code}'
+        except (requests.exceptions.RequestException, ValueError) as e:
+            ok, detail = False, str(e)
+        stats.record(endpoint, time.perf_counter() - start, ok, detail)
+
+def verify_integrity(base_url, submitted, last_notes):
+    """Check the final dataset against what the clients believe they wrote"""
+    tickets = fetch_tickets(logged_in_session(base_url), base_url)
+    id_counts = Counter(t['Ticket ID'] for t in tickets)
+    duplicate_ids = sorted(tid for tid, count in id_counts.items() if count > 1)
+    flats = {str(t['Flat No']) for t in tickets}
+    lost_submissions = [flat for flat in submitted if flat not in flats]
+    notes = {t['Ticket ID']: t.get('Notes', '') for t in tickets}
+    lost_updates = [tid for tid, note in last_notes.items() if notes.get(tid) != note]
+    return {
+        'tickets': len(tickets),
+        'duplicate_ticket_ids': duplicate_ids,
+        'lost_submissions': lost_submissions,
+        'lost_updates': lost_updates
+    }
+
+def run_load_test(base_url, clients, duration, seed_tickets):
+    """Seed tickets, run concurrent clients, and return the report"""
+    admin = logged_in_session(base_url)
+    for i in range(seed_tickets):
+        admin.post(f'{base_url}/submit', data=ticket_form(f'SEED-{i}'), allow_redirects=False, timeout=60)
+    ticket_ids = [t['Ticket ID'] for t in fetch_tickets(admin, base_url)]
+
+    # Each client owns a disjoint set of tickets, so its last note per ticket must survive
+    stats = LoadStats()
+    submitted = []
+    notes_by_client = [dict() for _ in range(clients)]
+    deadline = time.time() + duration
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        futures = [pool.submit(run_client, i, base_url, deadline, stats, ticket_ids[i::clients],
+                               submitted, notes_by_client[i])
+                   for i in range(clients)]
+        for future in futures:
+            future.result()
+    wall_time = time.time() - start
+
+    last_notes = {}
+    for notes in notes_by_client:
+        last_notes.update(notes)
+    return {
+        'clients': clients,
+        'duration_s': round(wall_time, 2),
+        'total_requests': sum(len(v) for v in stats.latencies.values()),
+        'endpoints': stats.summary(wall_time),
+        'integrity': verify_integrity(base_url, submitted, last_notes)
+    }
+
+def print_report(report):
+    print("=" * 78)
+    print(f"{'Endpoint':<15}{'Requests':>9}{'RPS':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'Errors':>10}")
+    print("-" * 78)
+    for row in report['endpoints']:
+        print(f"{row['endpoint']:<15}{row['requests']:>9}{row['throughput_rps']:>9}"
+              f"{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}{row['error_rate']:>10.2%}")
+        for sample in row['error_samples']:
+            print(f"    e.g. {sample}")
+    print("-" * 78)
+    integrity = report['integrity']
+    print(f"Total: {report['total_requests']} requests from {report['clients']} clients "
+          f"in {report['duration_s']}s; {integrity['tickets']} tickets stored")
+    checks = [
+        ('Duplicate ticket IDs', integrity['duplicate_ticket_ids']),
+        ('Lost submissions', integrity['lost_submissions']),
+        ('Lost updates', integrity['lost_updates'])
+    ]
+    for name, problems in checks:
+        status = "✅ none" if not problems else f"❌ {len(problems)} (e.g. {', '.join(map(str, problems[:5]))})"
+        print(f"{name}: {status}")
+    print("=" * 78)
+
+def integrity_ok(report):
+    integrity = report['integrity']
+    return not (integrity['duplicate_ticket_ids'] or integrity['lost_submissions'] or integrity['lost_updates'])
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent load test for the ticketing app')
+    parser.add_argument('--url', help='Target a running server instead of starting one')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--clients', type=int, default=10)
+    parser.add_argument('--duration', type=float, default=15, help='Seconds of load')
+    parser.add_argument('--seed-tickets', type=int, default=20,
+                        help='Tickets submitted before the load phase (targets for updates)')
+    parser.add_argument('--rate-limit', action='store_true',
+                        help='Keep /submit rate limiting enabled on the local server')
+    parser.add_argument('--output', help='Write the report as JSON to this file')
+    args = parser.parse_args()
+
+    process = None
+    workdir = None
+    try:
+        if args.url:
+            base_url = args.url.rstrip('/')
+        else:
+            workdir = tempfile.mkdtemp(prefix='ticketing_load_')
+            process, base_url = start_server(args.port, workdir, args.rate_limit)
+        print(f"🚀 Load testing {base_url} with {args.clients} clients for {args.duration}s...\n")
+        report = run_load_test(base_url, args.clients, args.duration, args.seed_tickets)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0 if integrity_ok(report) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""
+Opt-in per-route memory profiling with tracemalloc.
+
+Enable with MEMORY_PROFILE=true (staging only - tracing slows every
+allocation). Each request records its peak traced allocation and the lines
+that allocated the most memory still live at the request's high-water
+checkpoint. Checkpoints are taken automatically just before a template is
+rendered, when a view holds its full ticket list and DataFrames, and can be
+added elsewhere with memory_checkpoint().
+
+tracemalloc is process-wide, so run the profiled worker with a single
+thread (e.g. gunicorn -w 1 --threads 1) for clean per-request attribution.
+"""
+
+import os
+import threading
+import tracemalloc
+from flask import g, has_request_context, before_render_template
+from metrics import current_route
+
+# Memory profiling configuration (override with environment variables)
+MEMORY_PROFILE_CONFIG = {
+    'enabled': os.getenv('MEMORY_PROFILE', 'false').lower() == 'true',
+    'top_lines': int(os.getenv('MEMORY_PROFILE_TOP', '10')),
+    'frames': int(os.getenv('MEMORY_PROFILE_FRAMES', '1'))
+}
+
+SNAPSHOT_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>')
+]
+
+class MemoryProfile:
+    """Per-route peak allocation statistics collected by this worker"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.routes = {}
+
+    def record(self, route, peak_bytes, top_lines):
+        with self.lock:
+            stats = self.routes.get(route)
+            if stats is None:
+                stats = {'requests': 0, 'total_peak_bytes': 0, 'max_peak_bytes': 0,
+                         'last_peak_bytes': 0, 'top_lines': []}
+                self.routes[route] = stats
+            stats['requests'] += 1
+            stats['total_peak_bytes'] += peak_bytes
+            stats['last_peak_bytes'] = peak_bytes
+            if peak_bytes >= stats['max_peak_bytes']:
+                # Keep the allocation breakdown of the worst request seen
+                stats['max_peak_bytes'] = peak_bytes
+                stats['top_lines'] = top_lines
+
+    def summary(self):
+        """Per-route report, largest peak first"""
+        with self.lock:
+            routes = [{
+                'route': route,
+                'requests': stats['requests'],
+                'avg_peak_mb': round(stats['total_peak_bytes'] / stats['requests'] / 1048576, 2),
+                'max_peak_mb': round(stats['max_peak_bytes'] / 1048576, 2),
+                'last_peak_mb': round(stats['last_peak_bytes'] / 1048576, 2),
+                'top_lines': stats['top_lines']
+            } for route, stats in self.routes.items()]
+        routes.sort(key=lambda r: r['max_peak_mb'], reverse=True)
+        current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        return {
+            'traced_current_mb': round(current / 1048576, 2),
+            'routes': routes
+        }
+
+profile = MemoryProfile()
+
+def _take_snapshot():
+    return tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+
+def memory_checkpoint():
+    """Snapshot live allocations if memory use is the highest seen in this request"""
+    if not has_request_context() or 'mem_baseline' not in g:
+        return
+    current = tracemalloc.get_traced_memory()[0]
+    if current > g.mem_checkpoint_size:
+        g.mem_checkpoint_size = current
+        g.mem_checkpoint = _take_snapshot()
+
+def _on_render_template(sender, template, context, **extra):
+    memory_checkpoint()
+
+def _start_request():
+    tracemalloc.reset_peak()
+    g.mem_start = tracemalloc.get_traced_memory()[0]
+    g.mem_checkpoint_size = g.mem_start
+    g.mem_checkpoint = None
+    g.mem_baseline = _take_snapshot()
+
+def _teardown_request(exc):
+    baseline = g.pop('mem_baseline', None)
+    if baseline is None:
+        return
+    peak_bytes = max(0, tracemalloc.get_traced_memory()[1] - g.mem_start)
+    snapshot = g.pop('mem_checkpoint', None) or _take_snapshot()
+    top_lines = []
+    for stat in snapshot.compare_to(baseline, 'lineno')[:MEMORY_PROFILE_CONFIG['top_lines']]:
+        if stat.size_diff <= 0:
+            break
+        frame = stat.traceback[0]
+        top_lines.append({
+            'location': f'{frame.filename}:{frame.lineno}',
+            'size_kb': round(stat.size_diff / 1024, 1),
+            'blocks': stat.count_diff
+        })
+    profile.record(current_route(), peak_bytes, top_lines)
+
+def init_memory_profiler(app):
+    """Start tracemalloc and register request hooks when MEMORY_PROFILE is enabled"""
+    if not MEMORY_PROFILE_CONFIG['enabled']:
+        return
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(MEMORY_PROFILE_CONFIG['frames'])
+    app.before_request(_start_request)
+    app.teardown_request(_teardown_request)
+    before_render_template.connect(_on_render_template, app)
@@ -0,0 +1,230 @@
+"""
+Request-level instrumentation with a Prometheus text exposition endpoint.
+
+Records per-route latency histograms, response status codes, database query
+counts and time (via SQLAlchemy engine events) and CSV bytes read/written.
+Under gunicorn set METRICS_DIR to a directory shared by the workers: each
+worker periodically writes its own snapshot there and /metrics merges them.
+"""
+
+import os
+import json
+import threading
+import time
+from flask import g, request, has_request_context
+from sqlalchemy import event
+
+# Metrics configuration (override with environment variables)
+METRICS_CONFIG = {
+    'enabled': os.getenv('METRICS_ENABLED', 'true').lower() == 'true',
+    'multiprocess_dir': os.getenv('METRICS_DIR', ''),  # Shared directory for per-worker snapshots
+    'flush_interval': float(os.getenv('METRICS_FLUSH_SECONDS', '5'))
+}
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 500)
+
+METRIC_HELP = {
+    'http_requests_total': ('counter', 'HTTP requests by route, method and status'),
+    'http_request_duration_seconds': ('histogram', 'HTTP request latency by route'),
+    'db_queries_total': ('counter', 'Database statements executed by route'),
+    'db_query_duration_seconds_total': ('counter', 'Time spent in database statements by route'),
+    'db_queries_per_request': ('histogram', 'Database statements issued per request'),
+    'csv_read_bytes_total': ('counter', 'Bytes read from the tickets CSV file'),
+    'csv_write_bytes_total': ('counter', 'Bytes written to the tickets CSV file')
+}
+
+class MetricsRegistry:
+    """Thread-safe counters and histograms for one worker process"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    def inc(self, name, labels, value=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, labels, value, buckets):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = {'buckets': list(buckets), 'counts': [0] * len(buckets), 'sum': 0.0, 'count': 0}
+                self.histograms[key] = hist
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    hist['counts'][i] += 1
+            hist['sum'] += value
+            hist['count'] += 1
+
+    def snapshot(self):
+        """JSON-serializable copy of all metrics"""
+        with self.lock:
+            return {
+                'counters': [[name, list(map(list, labels)), value]
+                             for (name, labels), value in self.counters.items()],
+                'histograms': [[name, list(map(list, labels)), dict(hist, counts=list(hist['counts']))]
+                               for (name, labels), hist in self.histograms.items()]
+            }
+
+registry = MetricsRegistry()
+_last_flush = [0.0]
+
+def merge_snapshots(snapshots):
+    """Sum counters and histogram buckets from several worker snapshots"""
+    counters = {}
+    histograms = {}
+    for snap in snapshots:
+        for name, labels, value in snap.get('counters', []):
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, hist in snap.get('histograms', []):
+            key = (name, tuple(map(tuple, labels)))
+            merged = histograms.get(key)
+            if merged is None:
+                histograms[key] = dict(hist, counts=list(hist['counts']))
+            else:
+                merged['counts'] = [a + b for a, b in zip(merged['counts'], hist['counts'])]
+                merged['sum'] += hist['sum']
+                merged['count'] += hist['count']
+    return counters, histograms
+
+def format_labels(labels, extra=None):
+    items = list(labels) + (list(extra) if extra else [])
+    if not items:
+        return ''
+    escaped = [(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')) for k, v in items]
+    return '{' + ','.join(f'{k}="{v}"' for k, v in escaped) + '}'
+
+def render_prometheus(counters, histograms):
+    """Render merged metrics in the Prometheus text exposition format"""
+    lines = []
+    names = sorted({name for name, _ in counters} | {name for name, _ in histograms})
+    for name in names:
+        metric_type, help_text = METRIC_HELP.get(name, ('untyped', name))
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        for (metric, labels), value in sorted(counters.items()):
+            if metric == name:
+                lines.append(f'{name}{format_labels(labels)} {value}')
+        for (metric, labels), hist in sorted(histograms.items()):
+            if metric != name:
+                continue
+            for bound, count in zip(hist['buckets'], hist['counts']):
+                lines.append(f'{name}_bucket{format_labels(labels, [("le", bound)])} {count}')
+            lines.append(f'{name}_bucket{format_labels(labels, [("le", "+Inf")])} {hist["count"]}')
+            lines.append(f'{name}_sum{format_labels(labels)} {hist["sum"]}')
+            lines.append(f'{name}_count{format_labels(labels)} {hist["count"]}')
+    return '\n'.join(lines) + '\n'
+
+def worker_snapshot_path():
+    return os.path.join(METRICS_CONFIG['multiprocess_dir'], f'metrics_{os.getpid()}.json')
+
+def flush_snapshot(force=False):
+    """Write this worker's snapshot to the shared directory"""
+    if not METRICS_CONFIG['multiprocess_dir']:
+        return
+    now = time.time()
+    if not force and now - _last_flush[0] < METRICS_CONFIG['flush_interval']:
+        return
+    _last_flush[0] = now
+    try:
+        os.makedirs(METRICS_CONFIG['multiprocess_dir'], exist_ok=True)
+        path = worker_snapshot_path()
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(registry.snapshot(), f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Error writing metrics snapshot: {str(e)}")
+
+def collect_metrics():
+    """Prometheus text for this worker, or for all workers when METRICS_DIR is set"""
+    if not METRICS_CONFIG['multiprocess_dir']:
+        return render_prometheus(*merge_snapshots([registry.snapshot()]))
+
+    flush_snapshot(force=True)
+    snapshots = []
+    directory = METRICS_CONFIG['multiprocess_dir']
+    for filename in os.listdir(directory):
+        if not (filename.startswith('metrics_') and filename.endswith('.json')):
+            continue
+        try:
+            with open(os.path.join(directory, filename)) as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            continue  # Snapshot being replaced or truncated; skip it this scrape
+    return render_prometheus(*merge_snapshots(snapshots))
+
+def current_route():
+    """Route template for the active request (bounded label cardinality)"""
+    if not has_request_context():
+        return 'background'
+    if request.url_rule is None:
+        return 'unmatched'
+    return request.url_rule.rule
+
+def record_csv_read(path):
+    if METRICS_CONFIG['enabled'] and os.path.exists(path):
+        registry.inc('csv_read_bytes_total', {'route': current_route()}, os.path.getsize(path))
+
+def record_csv_write(path):
+    if METRICS_CONFIG['enabled'] and os.path.exists(path):
+        registry.inc('csv_write_bytes_total', {'route': current_route()}, os.path.getsize(path))
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('metrics_query_start')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    route = current_route()
+    registry.inc('db_queries_total', {'route': route})
+    registry.inc('db_query_duration_seconds_total', {'route': route}, elapsed)
+    if has_request_context():
+        g.metrics_query_count = g.get('metrics_query_count', 0) + 1
+
+def instrument_engine(engine):
+    """Attach query counting hooks to a SQLAlchemy engine"""
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+def _start_request():
+    g.metrics_start = time.perf_counter()
+    g.metrics_query_count = 0
+
+def _record_request(status_code):
+    if g.get('metrics_recorded') or 'metrics_start' not in g:
+        return
+    g.metrics_recorded = True
+    route = current_route()
+    elapsed = time.perf_counter() - g.metrics_start
+    registry.inc('http_requests_total', {'route': route, 'method': request.method, 'status': str(status_code)})
+    registry.observe('http_request_duration_seconds', {'route': route}, elapsed, LATENCY_BUCKETS)
+    registry.observe('db_queries_per_request', {'route': route}, g.get('metrics_query_count', 0),
+                     QUERY_COUNT_BUCKETS)
+    flush_snapshot()
+
+def _after_request(response):
+    _record_request(response.status_code)
+    return response
+
+def _teardown_request(exc):
+    if exc is not None:
+        _record_request(500)
+
+def init_metrics(app, engine=None):
+    """Register request hooks on the Flask app and query hooks on the engine"""
+    if not METRICS_CONFIG['enabled']:
+        return
+    app.before_request(_start_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    if engine is not None:
+        instrument_engine(engine)
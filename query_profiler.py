@@ -0,0 +1,158 @@
+"""
+Opt-in database profiling: slow-query log and N+1 detector.
+
+Enable with DB_PROFILE=true. Statements slower than DB_SLOW_QUERY_MS are
+logged with the route that issued them, and requests that run the same
+statement shape more than DB_REPEAT_QUERY_THRESHOLD times are flagged.
+A per-route summary is kept in memory for the admin report endpoint.
+"""
+
+import os
+import re
+import threading
+import time
+from collections import Counter
+from flask import g, has_request_context
+from sqlalchemy import event
+from metrics import current_route
+
+# Profiling configuration (override with environment variables)
+PROFILE_CONFIG = {
+    'enabled': os.getenv('DB_PROFILE', 'false').lower() == 'true',
+    'slow_query_ms': float(os.getenv('DB_SLOW_QUERY_MS', '100')),
+    'repeat_threshold': int(os.getenv('DB_REPEAT_QUERY_THRESHOLD', '5')),
+    'max_slow_queries': 200  # Most recent slow statements kept for the report
+}
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN\s*\((?:\s*\?\s*,?)+\)', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+
+def statement_shape(statement):
+    """Normalize a SQL statement so queries differing only in values compare equal"""
+    shape = _STRING_LITERAL.sub('?', statement)
+    shape = _NUMBER_LITERAL.sub('?', shape)
+    shape = _WHITESPACE.sub(' ', shape).strip()
+    # Parameter placeholders differ by driver; fold them all to '?'
+    shape = re.sub(r'%\(\w+\)s|%s|:\w+', '?', shape)
+    return _IN_LIST.sub('IN (?)', shape)
+
+class QueryProfile:
+    """Per-route query statistics collected by this worker"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.routes = {}
+        self.slow_queries = []
+
+    def _route(self, route):
+        stats = self.routes.get(route)
+        if stats is None:
+            stats = {
+                'requests': 0,
+                'queries': 0,
+                'query_time_ms': 0.0,
+                'max_queries_per_request': 0,
+                'slow_queries': 0,
+                'repeated_statement_requests': 0,
+                'repeated_statements': Counter()
+            }
+            self.routes[route] = stats
+        return stats
+
+    def record_slow(self, route, shape, elapsed_ms):
+        print(f"[db-profile] slow query on {route}: {elapsed_ms:.1f} ms: {shape}")
+        with self.lock:
+            self._route(route)['slow_queries'] += 1
+            self.slow_queries.append({
+                'route': route,
+                'statement': shape,
+                'elapsed_ms': round(elapsed_ms, 2),
+                'at': time.strftime('%Y-%m-%d %H:%M:%S')
+            })
+            del self.slow_queries[:-PROFILE_CONFIG['max_slow_queries']]
+
+    def record_request(self, route, shapes, query_time_ms):
+        total = sum(shapes.values())
+        repeated = {shape: count for shape, count in shapes.items()
+                    if count > PROFILE_CONFIG['repeat_threshold']}
+        for shape, count in repeated.items():
+            print(f"[db-profile] possible N+1 on {route}: {count} x {shape}")
+        with self.lock:
+            stats = self._route(route)
+            stats['requests'] += 1
+            stats['queries'] += total
+            stats['query_time_ms'] += query_time_ms
+            stats['max_queries_per_request'] = max(stats['max_queries_per_request'], total)
+            if repeated:
+                stats['repeated_statement_requests'] += 1
+                stats['repeated_statements'].update(repeated)
+
+    def summary(self):
+        """Per-route report, busiest routes first"""
+        with self.lock:
+            routes = []
+            for route, stats in self.routes.items():
+                requests = stats['requests'] or 1
+                routes.append({
+                    'route': route,
+                    'requests': stats['requests'],
+                    'queries': stats['queries'],
+                    'avg_queries_per_request': round(stats['queries'] / requests, 2),
+                    'max_queries_per_request': stats['max_queries_per_request'],
+                    'avg_query_time_ms': round(stats['query_time_ms'] / requests, 2),
+                    'slow_queries': stats['slow_queries'],
+                    'repeated_statement_requests': stats['repeated_statement_requests'],
+                    'top_repeated_statements': [
+                        {'statement': shape, 'count': count}
+                        for shape, count in stats['repeated_statements'].most_common(5)
+                    ]
+                })
+            routes.sort(key=lambda r: r['queries'], reverse=True)
+            return {
+                'config': {key: PROFILE_CONFIG[key] for key in ('slow_query_ms', 'repeat_threshold')},
+                'routes': routes,
+                'slow_queries': list(reversed(self.slow_queries))
+            }
+
+profile = QueryProfile()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('profile_query_start', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('profile_query_start')
+    if not starts:
+        return
+    elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+    shape = statement_shape(statement)
+    if elapsed_ms >= PROFILE_CONFIG['slow_query_ms']:
+        profile.record_slow(current_route(), shape, elapsed_ms)
+    if has_request_context() and 'profile_shapes' in g:
+        g.profile_shapes[shape] += 1
+        g.profile_query_ms += elapsed_ms
+
+def profile_engine(engine):
+    """Attach profiling hooks to a SQLAlchemy engine"""
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+def _start_request():
+    g.profile_shapes = Counter()
+    g.profile_query_ms = 0.0
+
+def _teardown_request(exc):
+    shapes = g.pop('profile_shapes', None)
+    if shapes is not None:
+        profile.record_request(current_route(), shapes, g.pop('profile_query_ms', 0.0))
+
+def init_query_profiler(app, engine=None):
+    """Register profiling hooks when DB_PROFILE is enabled"""
+    if not PROFILE_CONFIG['enabled']:
+        return
+    app.before_request(_start_request)
+    app.teardown_request(_teardown_request)
+    if engine is not None:
+        profile_engine(engine)
@@ -0,0 +1,223 @@
+"""
+Admission control for the ticket submission and public status lookup endpoints.
+
+Provides a token-bucket rate limiter keyed by client (IP address and contact
+number) and a concurrency cap that sheds load before the database saturates.
+Bucket state lives in process memory by default; set RATE_LIMIT_STORE to a
+SQLite file path to share it across gunicorn workers. The concurrency cap is
+always per worker: the total across a deployment is MAX_CONCURRENT_SUBMISSIONS
+times the number of workers.
+"""
+
+import os
+import math
+import sqlite3
+import threading
+import time
+from functools import wraps
+from itertools import islice
+from flask import request, jsonify
+
+# Rate limiting configuration (override with environment variables)
+RATE_LIMIT_CONFIG = {
+    'enabled': os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true',
+    'burst': int(os.getenv('RATE_LIMIT_BURST', '5')),  # Bucket capacity
+    'per_minute': float(os.getenv('RATE_LIMIT_PER_MINUTE', '10')),  # Refill rate
+    'store': os.getenv('RATE_LIMIT_STORE', ''),  # Shared SQLite file, empty = in-process
+    'max_concurrent': int(os.getenv('MAX_CONCURRENT_SUBMISSIONS', '8')),  # Per worker
+    'lookup_burst': int(os.getenv('STATUS_LOOKUP_BURST', '20')),  # Public status checks per client
+    'lookup_per_minute': float(os.getenv('STATUS_LOOKUP_PER_MINUTE', '30')),
+    'trust_proxy': os.getenv('TRUST_PROXY', 'false').lower() == 'true'
+}
+
+class MemoryBucketStore:
+    """Token buckets held in process memory, oldest update first"""
+
+    MAX_KEYS = 10000
+
+    def __init__(self):
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def take(self, keys, capacity, rate, now=None):
+        """Take one token from every key, or from none; return (allowed, seconds until all have one)"""
+        now = now if now is not None else time.time()
+        with self.lock:
+            levels = {}
+            for key in keys:
+                tokens, updated = self.buckets.get(key, (capacity, now))
+                levels[key] = min(capacity, tokens + (now - updated) * rate)
+            retry_after = max([(1 - tokens) / rate for tokens in levels.values() if tokens < 1], default=0)
+            if retry_after:
+                return False, retry_after
+            for key, tokens in levels.items():
+                # Re-insert so dict order stays oldest update first for _prune
+                self.buckets.pop(key, None)
+                self.buckets[key] = (tokens - 1, now)
+
+            if len(self.buckets) > self.MAX_KEYS:
+                self._prune(capacity, rate, now)
+        return True, 0
+
+    def _prune(self, capacity, rate, now):
+        """Drop buckets that have refilled completely, then the oldest ones beyond MAX_KEYS"""
+        full_after = capacity / rate
+        self.buckets = {key: value for key, value in self.buckets.items()
+                        if now - value[1] < full_after}
+        for key in list(islice(self.buckets, max(0, len(self.buckets) - self.MAX_KEYS))):
+            del self.buckets[key]
+
+class SQLiteBucketStore:
+    """Token buckets in a SQLite file shared by all worker processes
+
+    Each row records when its bucket will have refilled completely
+    (full_at). A bucket past that point is indistinguishable from a missing
+    one, so every PRUNE_SECONDS each worker deletes those rows; otherwise
+    every client ever seen would stay in the table.
+    """
+
+    PRUNE_SECONDS = 60
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+        self.pruned = time.time()
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limit_buckets ("
+            "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, full_at REAL NOT NULL DEFAULT 0)"
+        )
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(rate_limit_buckets)")]
+        if 'full_at' not in columns:
+            # Older files: existing rows count as refilled and go at the next prune
+            conn.execute("ALTER TABLE rate_limit_buckets ADD COLUMN full_at REAL NOT NULL DEFAULT 0")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_rate_limit_buckets_full_at ON rate_limit_buckets (full_at)")
+
+    def _connect(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            self.local.conn = conn
+        return conn
+
+    def take(self, keys, capacity, rate, now=None):
+        """Take one token from every key, or from none; return (allowed, seconds until all have one)"""
+        now = now if now is not None else time.time()
+        conn = self._connect()
+        # BEGIN IMMEDIATE takes the write lock up front so read-modify-write is atomic
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            levels = {}
+            for key in keys:
+                row = conn.execute(
+                    "SELECT tokens, updated FROM rate_limit_buckets WHERE key = ?", (key,)
+                ).fetchone()
+                tokens, updated = row if row else (capacity, now)
+                levels[key] = min(capacity, tokens + (now - updated) * rate)
+            retry_after = max([(1 - tokens) / rate for tokens in levels.values() if tokens < 1], default=0)
+            if not retry_after:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO rate_limit_buckets (key, tokens, updated, full_at) VALUES (?, ?, ?, ?)",
+                    [(key, tokens - 1, now, now + (capacity - tokens + 1) / rate) for key, tokens in levels.items()]
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if now - self.pruned >= self.PRUNE_SECONDS:
+            self.prune(now)
+        return not retry_after, retry_after
+
+    def prune(self, now=None):
+        """Delete buckets that have refilled completely; returns how many"""
+        now = now if now is not None else time.time()
+        self.pruned = now
+        return self._connect().execute("DELETE FROM rate_limit_buckets WHERE full_at <= ?", (now,)).rowcount
+
+class RateLimiter:
+    """Token-bucket limiter that checks several client keys at once"""
+
+    def __init__(self, burst, per_minute, store_path=''):
+        self.capacity = burst
+        self.rate = per_minute / 60.0
+        self.store = SQLiteBucketStore(store_path) if store_path else MemoryBucketStore()
+
+    def check(self, keys):
+        """Return (allowed, retry_after_seconds) across all keys
+
+        A request is charged to every key only when all of them allow it, so
+        a denied request does not drain the buckets that still had tokens.
+        """
+        return self.store.take(keys, self.capacity, self.rate)
+
+class ConcurrencyLimiter:
+    """Caps in-flight requests; excess requests are rejected instead of queued"""
+
+    def __init__(self, max_concurrent):
+        self.semaphore = threading.BoundedSemaphore(max_concurrent)
+
+    def acquire(self):
+        return self.semaphore.acquire(blocking=False)
+
+    def release(self):
+        self.semaphore.release()
+
+rate_limiter = RateLimiter(RATE_LIMIT_CONFIG['burst'], RATE_LIMIT_CONFIG['per_minute'],
+                           RATE_LIMIT_CONFIG['store'])
+concurrency_limiter = ConcurrencyLimiter(RATE_LIMIT_CONFIG['max_concurrent'])
+lookup_rate_limiter = RateLimiter(RATE_LIMIT_CONFIG['lookup_burst'], RATE_LIMIT_CONFIG['lookup_per_minute'],
+                                  RATE_LIMIT_CONFIG['store'])
+
+def get_client_ip():
+    """Client IP, honouring X-Forwarded-For only behind a trusted proxy"""
+    if RATE_LIMIT_CONFIG['trust_proxy'] and request.access_route:
+        return request.access_route[0]
+    return request.remote_addr or 'unknown'
+
+def get_client_keys():
+    """Rate limit keys for the current request"""
+    keys = [f'ip:{get_client_ip()}']
+    contact = ''.join(ch for ch in request.form.get('contact_number', '') if ch.isdigit())
+    if contact:
+        keys.append(f'contact:{contact}')
+    return keys
+
+def reject(status_code, message, retry_after):
+    """Build a rejection response with a Retry-After header"""
+    response = jsonify({'success': False, 'message': message})
+    response.status_code = status_code
+    response.headers['Retry-After'] = str(max(1, int(math.ceil(retry_after))))
+    return response
+
+def admission_control(f):
+    """Decorator applying the concurrency cap and per-client rate limit"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not RATE_LIMIT_CONFIG['enabled']:
+            return f(*args, **kwargs)
+
+        if not concurrency_limiter.acquire():
+            return reject(503, 'Server is busy. Please try again shortly.', 1)
+        try:
+            allowed, retry_after = rate_limiter.check(get_client_keys())
+            if not allowed:
+                return reject(429, 'Too many submissions. Please wait before trying again.',
+                              retry_after)
+            return f(*args, **kwargs)
+        finally:
+            concurrency_limiter.release()
+    return decorated_function
+
+def lookup_rate_limit(f):
+    """Decorator applying the per-client rate limit for public status lookups"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not RATE_LIMIT_CONFIG['enabled']:
+            return f(*args, **kwargs)
+        # Own key prefix: the SQLite store may be shared with the submission limiter
+        allowed, retry_after = lookup_rate_limiter.check([f'lookup:ip:{get_client_ip()}'])
+        if not allowed:
+            return reject(429, 'Too many status checks. Please wait before trying again.', retry_after)
+        return f(*args, **kwargs)
+    return decorated_function
@@ -0,0 +1,116 @@
+"""
+Background precomputation of the /reports payload.
+
+With REPORT_PRECOMPUTE=true every worker starts a daemon thread, but only
+the one holding an exclusive lock on REPORT_SCHEDULER_LOCK does the work:
+it rebuilds the report every REPORT_PRECOMPUTE_SECONDS and writes it with a
+timestamp to REPORT_SNAPSHOT_FILE. The other workers retry the lock each
+interval and take over if the runner's process exits. Any worker can serve
+the latest snapshot, or recompute and publish one on demand.
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # No flock (Windows): every process runs its own schedule
+
+# Report scheduler configuration (override with environment variables)
+REPORT_SCHEDULER_CONFIG = {
+    'enabled': os.getenv('REPORT_PRECOMPUTE', 'false').lower() == 'true',
+    'interval': float(os.getenv('REPORT_PRECOMPUTE_SECONDS', '300')),
+    'snapshot_file': os.getenv('REPORT_SNAPSHOT_FILE', 'report_snapshot.json'),
+    'lock_file': os.getenv('REPORT_SCHEDULER_LOCK', 'report_scheduler.lock')
+}
+
+class ReportScheduler:
+    """Periodically computes the report and publishes it as a JSON snapshot"""
+
+    def __init__(self, compute, config=REPORT_SCHEDULER_CONFIG):
+        self.compute = compute
+        self.config = config
+        self.lock_handle = None
+        self.cache_lock = threading.Lock()
+        self.cached = (None, None)  # (snapshot file mtime, parsed snapshot)
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def is_runner(self):
+        """Take the scheduler lock if no other process holds it"""
+        if self.lock_handle is not None or fcntl is None:
+            return True
+        handle = open(self.config['lock_file'], 'a')
+        try:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+        # Held for the life of the process; the OS releases it if we die
+        self.lock_handle = handle
+        return True
+
+    def refresh(self):
+        """Compute the report now and publish it as the latest snapshot"""
+        start = time.time()
+        reports = self.compute()
+        snapshot = {
+            'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'duration_s': round(time.time() - start, 3),
+            'reports': reports
+        }
+        path = self.config['snapshot_file']
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, path)
+        with self.cache_lock:
+            self.cached = (os.stat(path).st_mtime_ns, snapshot)
+        return snapshot
+
+    def latest(self):
+        """Most recent snapshot published by any worker, or None"""
+        path = self.config['snapshot_file']
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        with self.cache_lock:
+            if self.cached[0] == mtime:
+                return self.cached[1]
+        try:
+            with open(path) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return None
+        with self.cache_lock:
+            self.cached = (mtime, snapshot)
+        return snapshot
+
+    def run(self):
+        while not self.stop_event.is_set():
+            if self.is_runner():
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"Error precomputing reports: {str(e)}")
+            self.stop_event.wait(self.config['interval'])
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name='report-scheduler', daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+def init_report_scheduler(compute):
+    """Create the scheduler and start its thread when REPORT_PRECOMPUTE is enabled"""
+    scheduler = ReportScheduler(compute)
+    if REPORT_SCHEDULER_CONFIG['enabled']:
+        scheduler.start()
+    return scheduler
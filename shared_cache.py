@@ -0,0 +1,284 @@
+"""
+Cache for hot read results shared by all gunicorn workers.
+
+Set SHARED_CACHE=sqlite to keep entries in a SQLite file on local disk, or
+SHARED_CACHE=redis to use any server speaking the Redis protocol (RESP) at
+SHARED_CACHE_REDIS_URL. Entries expire after SHARED_CACHE_TTL seconds. The
+SQLite store evicts the entries closest to expiry once it holds more than
+SHARED_CACHE_MAX_BYTES; a Redis server bounds itself with its own
+maxmemory policy (e.g. allkeys-lru). Reads marked local_fallback are cached
+in each worker's own memory when no shared store is configured; a write
+in another worker then shows up once their short TTL runs out.
+
+Every key embeds a per-complex data version. Write paths call invalidate(),
+which bumps the version, so the next read misses and recomputes; the stale
+entries age out on their own. Key hooks add request state that changes what
+a read returns to the key, e.g. whether it goes to the primary or a lagging
+replica, so a replica read cached after a write is never served to the
+writer.
+"""
+
+import os
+import pickle
+import socket
+import sqlite3
+import threading
+import time
+from functools import wraps
+from itertools import islice
+from urllib.parse import urlparse
+from complexes import current_complex
+
+# Shared cache configuration (override with environment variables)
+SHARED_CACHE_CONFIG = {
+    'backend': os.getenv('SHARED_CACHE', ''),  # sqlite, redis, empty = disabled
+    'path': os.getenv('SHARED_CACHE_PATH', 'shared_cache.db'),
+    'redis_url': os.getenv('SHARED_CACHE_REDIS_URL', 'redis://localhost:6379/0'),
+    'ttl': float(os.getenv('SHARED_CACHE_TTL', '60')),
+    'max_bytes': int(os.getenv('SHARED_CACHE_MAX_BYTES', str(64 * 1024 * 1024))),
+    'local_max_entries': int(os.getenv('LOCAL_CACHE_MAX_ENTRIES', '10000'))  # Per-process fallback bound
+}
+
+class MemoryCacheStore:
+    """Cache entries and version counters in this process only, oldest write first"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = {}
+        self.versions = {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        return entry[0] if entry and entry[1] > time.time() else None
+
+    def set(self, key, value, ttl):
+        with self.lock:
+            # Re-insert so the dict stays in write order and the oldest entries go first
+            self.entries.pop(key, None)
+            self.entries[key] = (value, time.time() + ttl)
+            for old_key in list(islice(self.entries, max(0, len(self.entries) - self.max_entries))):
+                del self.entries[old_key]
+
+    def version(self, scope):
+        return self.versions.get(scope, 0)
+
+    def bump(self, scope):
+        with self.lock:
+            self.versions[scope] = self.versions.get(scope, 0) + 1
+
+class SQLiteCacheStore:
+    """Cache entries and version counters in a SQLite file shared by all worker processes"""
+
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.local = threading.local()
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, expires REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_entries_expires ON cache_entries (expires)")
+        # Versions live apart from entries so eviction can never reset them
+        conn.execute("CREATE TABLE IF NOT EXISTS cache_versions (scope TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+
+    def _connect(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            self.local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._connect().execute(
+            "SELECT value FROM cache_entries WHERE key = ? AND expires > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value, ttl):
+        if len(value) > self.max_bytes:
+            return  # Would evict everything else and then itself
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, size, expires) VALUES (?, ?, ?, ?)",
+                (key, value, len(value), now + ttl)
+            )
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()[0]
+            if total > self.max_bytes:
+                conn.execute("DELETE FROM cache_entries WHERE expires <= ?", (now,))
+                self._evict(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _evict(self, conn):
+        """Drop the entries closest to expiry until the store is back under its size bound"""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()[0]
+        freed = 0
+        for key, size in conn.execute("SELECT key, size FROM cache_entries ORDER BY expires").fetchall():
+            if total - freed <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+            freed += size
+
+    def version(self, scope):
+        row = self._connect().execute("SELECT version FROM cache_versions WHERE scope = ?", (scope,)).fetchone()
+        return row[0] if row else 0
+
+    def bump(self, scope):
+        self._connect().execute(
+            "INSERT INTO cache_versions (scope, version) VALUES (?, 1) "
+            "ON CONFLICT(scope) DO UPDATE SET version = version + 1", (scope,)
+        )
+
+class RespClient:
+    """Minimal Redis protocol (RESP2) client, one connection per thread"""
+
+    def __init__(self, url):
+        parsed = urlparse(url)
+        self.address = (parsed.hostname or 'localhost', parsed.port or 6379)
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip('/') or 0)
+        self.local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            sock = socket.create_connection(self.address, timeout=2)
+            conn = (sock, sock.makefile('rb'))
+            self.local.conn = conn
+            if self.password:
+                self.command('AUTH', self.password)
+            if self.db:
+                self.command('SELECT', self.db)
+        return conn
+
+    def command(self, *args):
+        sock, reader = self._connect()
+        parts = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            arg = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+        try:
+            sock.sendall(b''.join(parts))
+            return self._read_reply(reader)
+        except (OSError, ConnectionError):
+            # Drop the broken connection; the next command reconnects
+            self.local.conn = None
+            sock.close()
+            raise
+
+    def _read_reply(self, reader):
+        line = reader.readline()
+        if not line:
+            raise ConnectionError('Connection closed by server')
+        kind, body = line[:1], line[1:-2]
+        if kind == b'+':
+            return body.decode()
+        if kind == b'-':
+            raise RuntimeError(body.decode())
+        if kind == b':':
+            return int(body)
+        if kind == b'$':
+            length = int(body)
+            if length < 0:
+                return None
+            data = reader.read(length + 2)
+            return data[:-2]
+        if kind == b'*':
+            count = int(body)
+            return None if count < 0 else [self._read_reply(reader) for _ in range(count)]
+        raise RuntimeError(f'Unexpected reply: {line!r}')
+
+class RedisCacheStore:
+    """Cache entries and version counters on a Redis-protocol server"""
+
+    def __init__(self, url):
+        self.client = RespClient(url)
+
+    def get(self, key):
+        return self.client.command('GET', key)
+
+    def set(self, key, value, ttl):
+        self.client.command('SET', key, value, 'PX', max(1, int(ttl * 1000)))
+
+    def version(self, scope):
+        key = f'cache_version:{scope}'
+        value = self.client.command('GET', key)
+        if value is None:
+            # First use, or the server lost the key: start past any version used before
+            self.client.command('SET', key, time.time_ns(), 'NX')
+            value = self.client.command('GET', key)
+        return int(value)
+
+    def bump(self, scope):
+        self.version(scope)
+        self.client.command('INCR', f'cache_version:{scope}')
+
+def create_store(config=SHARED_CACHE_CONFIG):
+    if config['backend'] == 'sqlite':
+        return SQLiteCacheStore(config['path'], config['max_bytes'])
+    if config['backend'] == 'redis':
+        return RedisCacheStore(config['redis_url'])
+    return None
+
+cache_store = create_store()
+local_store = MemoryCacheStore(SHARED_CACHE_CONFIG['local_max_entries'])
+
+# Callables whose return values become part of every cache key (e.g. primary vs replica reads)
+KEY_HOOKS = []
+
+def register_key_hook(hook):
+    if hook not in KEY_HOOKS:
+        KEY_HOOKS.append(hook)
+
+def cached(namespace, ttl=None, local_fallback=False):
+    """Decorator caching a read function's result per complex, arguments and data version
+    
+    With local_fallback and no shared store configured, results are cached
+    in this process instead; only worth it for short TTLs, since writes
+    made by other workers go unseen until the entry expires.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            store = cache_store or (local_store if local_fallback else None)
+            if store is None:
+                return f(*args, **kwargs)
+            scope = current_complex()
+            try:
+                source = ':'.join(str(hook()) for hook in KEY_HOOKS)
+                key = f'{namespace}:{scope}:{store.version(scope)}:{source}:{args!r}:{sorted(kwargs.items())!r}'
+                value = store.get(key)
+                if value is not None:
+                    return pickle.loads(value)
+            except Exception as e:
+                # A cache outage must never take reads down with it
+                print(f"Shared cache read error: {str(e)}")
+                return f(*args, **kwargs)
+            result = f(*args, **kwargs)
+            try:
+                store.set(key, pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL),
+                                ttl if ttl is not None else SHARED_CACHE_CONFIG['ttl'])
+            except Exception as e:
+                print(f"Shared cache write error: {str(e)}")
+            return result
+        return decorated_function
+    return decorator
+
+def invalidate(scope=None):
+    """Bump the data version so every cached read of this complex misses"""
+    scope = scope or current_complex()
+    local_store.bump(scope)
+    if cache_store is None:
+        return
+    try:
+        cache_store.bump(scope)
+    except Exception as e:
+        print(f"Shared cache invalidation error: {str(e)}")
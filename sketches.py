@@ -0,0 +1,216 @@
+"""
+Mergeable streaming sketches for long ticket histories.
+
+QuantileSketch is a log-bucketed relative-error sketch (DDSketch): each
+value is counted in bucket ceil(log_gamma(x)), so every quantile it reports
+is within RELATIVE_ACCURACY of the exact value, and two sketches merge by
+adding bucket counts. HyperLogLog estimates distinct counts (e.g. flats
+reporting issues) in 2**HLL_PRECISION bytes with about 1.04/sqrt(2**p)
+standard error, and merges by taking the register-wise maximum.
+
+Both have bulk add_many() methods for backfills and fixed-size state, so
+summaries over millions of tickets cost the same as over a hundred.
+QuantileSketch.remove() takes a value back out exactly (a reopened or
+deleted ticket); HyperLogLog cannot, so distinct-flat counts only shrink
+when the sketches are rebuilt.
+"""
+
+import hashlib
+import json
+import math
+import numpy as np
+import pandas as pd
+
+RELATIVE_ACCURACY = 0.01
+QUANTILE_MIN_VALUE = 1e-9  # Smaller values (including 0) share a single zero bucket
+HLL_PRECISION = 12  # 4096 registers, ~1.6% standard error
+SKETCH_COLUMNS = ['block_no', 'problem_type', 'flat_no', 'status', 'created_at', 'updated_at', 'status_changed_at']
+DONE_STATUSES = ['Resolved', 'Closed']
+
+class QuantileSketch:
+    """Relative-error quantile sketch over non-negative values"""
+
+    def __init__(self, relative_accuracy=RELATIVE_ACCURACY, buckets=None, zero_count=0):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.buckets = dict(buckets or {})
+        self.zero_count = zero_count
+
+    @property
+    def count(self):
+        return self.zero_count + sum(self.buckets.values())
+
+    def add(self, value):
+        if value is None or math.isnan(value):
+            return
+        if value <= QUANTILE_MIN_VALUE:
+            self.zero_count += 1
+        else:
+            key = math.ceil(math.log(value) / self.log_gamma)
+            self.buckets[key] = self.buckets.get(key, 0) + 1
+
+    def remove(self, value):
+        """Take back one earlier add(value)"""
+        if value is None or math.isnan(value):
+            return
+        if value <= QUANTILE_MIN_VALUE:
+            self.zero_count = max(0, self.zero_count - 1)
+            return
+        key = math.ceil(math.log(value) / self.log_gamma)
+        count = self.buckets.get(key, 0) - 1
+        if count > 0:
+            self.buckets[key] = count
+        else:
+            self.buckets.pop(key, None)
+
+    def add_many(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        positive = values > QUANTILE_MIN_VALUE
+        self.zero_count += int((~positive).sum())
+        keys, counts = np.unique(np.ceil(np.log(values[positive]) / self.log_gamma).astype(np.int64),
+                                 return_counts=True)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            self.buckets[key] = self.buckets.get(key, 0) + count
+
+    def merge(self, other):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError('Cannot merge sketches with different relative accuracy')
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self.zero_count += other.zero_count
+        return self
+
+    def quantile(self, q):
+        """Value at quantile q (0-1), or None for an empty sketch"""
+        total = self.count
+        if total == 0:
+            return None
+        rank = q * (total - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                # Midpoint of the bucket (gamma^(k-1), gamma^k] in relative terms
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+    def to_json(self):
+        return json.dumps({'accuracy': self.relative_accuracy, 'zero': self.zero_count,
+                           'buckets': {str(key): count for key, count in self.buckets.items()}},
+                          separators=(',', ':'))
+
+    @classmethod
+    def from_json(cls, text):
+        if not text:
+            return cls()
+        data = json.loads(text)
+        return cls(data['accuracy'], {int(key): count for key, count in data['buckets'].items()}, data['zero'])
+
+class HyperLogLog:
+    """Distinct-count estimator with 2**precision one-byte registers"""
+
+    def __init__(self, precision=HLL_PRECISION, registers=None):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = np.zeros(self.size, dtype=np.uint8)
+        if registers:
+            self.registers[:] = np.frombuffer(registers, dtype=np.uint8)
+
+    @staticmethod
+    def hash(value):
+        return int.from_bytes(hashlib.blake2b(str(value).encode(), digest_size=8).digest(), 'big')
+
+    def add(self, value):
+        hashed = self.hash(value)
+        index = hashed >> (64 - self.precision)
+        rest = hashed & ((1 << (64 - self.precision)) - 1)
+        rank = 64 - self.precision - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def add_many(self, values):
+        hashes = np.fromiter((self.hash(value) for value in values), dtype=np.uint64)
+        if len(hashes) == 0:
+            return
+        width = 64 - self.precision
+        index = (hashes >> np.uint64(width)).astype(np.intp)
+        rest = hashes & np.uint64((1 << width) - 1)
+        bits = np.zeros(len(rest), dtype=np.int64)
+        nonzero = rest > 0
+        bits[nonzero] = np.frexp(rest[nonzero].astype(float))[1]  # bit_length
+        rank = (width - bits + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError('Cannot merge HyperLogLogs with different precision')
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self):
+        alpha = 0.7213 / (1 + 1.079 / self.size)
+        raw = alpha * self.size * self.size / np.sum(np.ldexp(1.0, -self.registers.astype(int)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * self.size and zeros:
+            # Linear counting is more accurate for small cardinalities
+            return self.size * math.log(self.size / zeros)
+        return float(raw)
+
+    def to_bytes(self):
+        return self.registers.tobytes()
+
+def fold_tickets(groups, df):
+    """Add a chunk of SKETCH_COLUMNS rows to per-(block, problem type) [tickets, QuantileSketch, HyperLogLog]"""
+    done = df['status'].isin(DONE_STATUSES)
+    # ISO8601: raw SQLite timestamps come with and without fractional seconds
+    finished = pd.to_datetime(df['updated_at'], format='ISO8601', errors='coerce')
+    if 'status_changed_at' in df:
+        # When the ticket entered its status; bulk-loaded rows (and the CSV) only have updated_at
+        finished = pd.to_datetime(df['status_changed_at'], format='ISO8601', errors='coerce').fillna(finished)
+    hours = ((finished - pd.to_datetime(df['created_at'], format='ISO8601', errors='coerce'))
+             .dt.total_seconds().clip(lower=0) / 3600.0)
+    df = df.assign(hours=hours.where(done))
+    for (block_no, problem_type), group in df.groupby(['block_no', 'problem_type'], sort=False):
+        entry = groups.setdefault((block_no, problem_type), [0, QuantileSketch(), HyperLogLog()])
+        entry[0] += len(group)
+        entry[1].add_many(group['hours'].values)
+        entry[2].add_many(str(block_no) + '/' + group['flat_no'].astype(str))
+    return groups
+
+def summarize_sketches(sketches, percentiles=(50, 90, 99)):
+    """Merge (block_no, problem_type, tickets, QuantileSketch, HyperLogLog) rows per block and overall"""
+    blocks = {}
+    overall = [0, QuantileSketch(), HyperLogLog()]
+    for block_no, problem_type, tickets, quantiles, flats in sketches:
+        entry = blocks.setdefault(block_no, [0, QuantileSketch(), HyperLogLog()])
+        for target in (entry, overall):
+            target[0] += tickets
+            target[1].merge(quantiles)
+            target[2].merge(flats)
+    
+    def describe(name, tickets, quantiles, flats):
+        distinct = round(flats.estimate())
+        row = {
+            'name': name,
+            'tickets': tickets,
+            'resolved': quantiles.count,
+            'distinct_flats': distinct,
+            'tickets_per_flat': round(tickets / distinct, 2) if distinct else None
+        }
+        for pct in percentiles:
+            value = quantiles.quantile(pct / 100.0)
+            row[f'p{pct}_hours'] = None if value is None else round(value, 1)
+        return row
+    
+    by_block = [describe(block_no, *entry) for block_no, entry in blocks.items()]
+    by_block.sort(key=lambda r: r['tickets'], reverse=True)
+    return {
+        'overall': describe('All blocks', *overall),
+        'by_block': by_block,
+        'quantile_error_pct': RELATIVE_ACCURACY * 100,
+        'distinct_error_pct': round(104 / math.sqrt(1 << HLL_PRECISION), 1)
+    }
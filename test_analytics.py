@@ -0,0 +1,58 @@
+"""
+Regression tests for timestamp parsing in the resolution analytics and sketches.
+
+Tickets bulk-loaded into SQLite and tickets written through the app can store
+timestamps with and without fractional seconds; both must be counted.
+Resolution time ends when the ticket entered Resolved/Closed, not at its
+last edit.
+
+Usage:
+    python -m pytest test_analytics.py
+"""
+
+import pandas as pd
+from analytics import resolution_analytics
+from enhanced_app import ANALYTICS_COLUMNS
+from sketches import fold_tickets
+
+# One resolved ticket per timestamp format, plus an unparseable one
+MIXED_TICKETS = pd.DataFrame({
+    'status': ['Resolved', 'Closed', 'Resolved', 'Open'],
+    'created_at': ['2026-01-01 08:00:00', '2026-01-01 08:00:00.250000', '2026-01-01 08:00:00', 'not a date'],
+    'updated_at': ['2026-01-01 10:00:00.500000', '2026-01-01 12:00:00', '2026-01-02 08:00:00', ''],
+    'due_date': ['2026-01-01', '2026-01-01', '2026-01-01', ''],
+    'problem_type': ['Plumbing'] * 4,
+    'block_no': ['A'] * 4,
+    'assigned_to': ['Unassigned'] * 4,
+    'flat_no': ['101', '102', '103', '104']
+})
+
+def test_resolution_analytics_counts_mixed_timestamp_formats():
+    overall = resolution_analytics(MIXED_TICKETS)['overall']
+    assert overall['resolved'] == 3
+    assert overall['sla_tracked'] == 3
+    assert overall['sla_hit_rate'] == 66.7
+    assert overall['p50_hours'] == 4.0
+
+def test_fold_tickets_counts_mixed_timestamp_formats():
+    groups = fold_tickets({}, MIXED_TICKETS)
+    tickets, quantiles, _ = groups[('A', 'Plumbing')]
+    assert tickets == 4
+    assert quantiles.count == 3
+
+def test_resolution_time_prefers_status_changed_at():
+    tickets = MIXED_TICKETS.assign(
+        # Notes edited a week after resolving; the third row predates status_changed_at
+        updated_at=['2026-01-08 10:00:00', '2026-01-08 12:00:00', '2026-01-02 08:00:00', ''],
+        status_changed_at=['2026-01-01 10:00:00.500000', '2026-01-01 12:00:00', None, None])
+    overall = resolution_analytics(tickets)['overall']
+    assert overall['sla_hit_rate'] == 66.7
+    assert overall['p50_hours'] == 4.0
+
+def test_notes_edit_leaves_resolution_time_alone(manager, ticket_data):
+    manager.add_ticket(ticket_data(Ticket_ID='TKT001', Status='Resolved', Updated_At='2026-01-05 10:00:00'))
+    before = resolution_analytics(manager.get_ticket_columns(ANALYTICS_COLUMNS))['overall']
+    manager.update_ticket('TKT001', 'notes', 'Resident confirmed the fix')
+    after = resolution_analytics(manager.get_ticket_columns(ANALYTICS_COLUMNS))['overall']
+    assert after == before
+    assert (after['p50_hours'], after['sla_hit_rate']) == (2.0, 100.0)
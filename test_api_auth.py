@@ -0,0 +1,38 @@
+"""
+Tests for who may read the full ticket dumps.
+
+/api/tickets and /export include residents' contact numbers, so they need a
+login session or the SYNC_API_TOKEN bearer token that integrations use.
+
+Usage:
+    python -m pytest test_api_auth.py
+"""
+
+import pytest
+import enhanced_app
+
+@pytest.fixture
+def sync_token(monkeypatch):
+    monkeypatch.setitem(enhanced_app.SYNC_CONFIG, 'token', 'sync-secret')
+    return 'sync-secret'
+
+@pytest.mark.parametrize('path', ['/api/tickets', '/export'])
+def test_dumps_reject_anonymous_callers(app_client, sync_token, path):
+    assert app_client.get(path).status_code == 401
+    assert app_client.get(path, headers={'Authorization': 'Bearer wrong'}).status_code == 401
+
+@pytest.mark.parametrize('path', ['/api/tickets', '/export'])
+def test_dumps_accept_the_sync_token(app_client, sync_token, path):
+    response = app_client.get(path, headers={'Authorization': f'Bearer {sync_token}'})
+    assert response.status_code == 200
+
+@pytest.mark.parametrize('path', ['/api/tickets', '/export'])
+def test_dumps_accept_a_login_session(app_client, path):
+    with app_client.session_transaction() as session:
+        session['logged_in'] = True
+        session['username'] = 'admin'
+    assert app_client.get(path).status_code == 200
+
+def test_no_token_configured_means_no_token_access(app_client, monkeypatch):
+    monkeypatch.setitem(enhanced_app.SYNC_CONFIG, 'token', '')
+    assert app_client.get('/api/tickets', headers={'Authorization': 'Bearer '}).status_code == 401
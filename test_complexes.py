@@ -0,0 +1,47 @@
+"""
+Tests for multi-complex request routing and the bounded registry of open
+per-complex resources.
+
+Usage:
+    python -m pytest test_complexes.py
+"""
+
+import pytest
+from complexes import ComplexMiddleware, ComplexRegistry, COMPLEX_ENVIRON_KEY, DEFAULT_COMPLEX
+
+def route(routing, path='/', host='tickets.example.com'):
+    seen = {}
+    def wsgi_app(environ, start_response):
+        seen.update(environ)
+        return []
+    middleware = ComplexMiddleware(wsgi_app, {'complexes': ['sunrise'], 'routing': routing})
+    middleware({'PATH_INFO': path, 'HTTP_HOST': host, 'SCRIPT_NAME': ''}, None)
+    return seen[COMPLEX_ENVIRON_KEY], seen['SCRIPT_NAME'], seen['PATH_INFO']
+
+@pytest.mark.parametrize('path, expected', [
+    ('/c/sunrise/tickets', ('sunrise', '/c/sunrise', '/tickets')),
+    ('/c/sunrise', ('sunrise', '/c/sunrise', '/')),
+    ('/c/unknown/tickets', (DEFAULT_COMPLEX, '', '/c/unknown/tickets')),
+    ('/tickets', (DEFAULT_COMPLEX, '', '/tickets'))
+])
+def test_path_routing(path, expected):
+    assert route('path', path) == expected
+
+@pytest.mark.parametrize('host, expected', [
+    ('sunrise.tickets.example.com:5002', 'sunrise'),
+    ('unknown.tickets.example.com', DEFAULT_COMPLEX),
+    ('sunrise', DEFAULT_COMPLEX)  # Bare hostname, no subdomain
+])
+def test_subdomain_routing(host, expected):
+    assert route('subdomain', host=host)[0] == expected
+
+def test_registry_closes_the_least_recently_used():
+    closed = []
+    registry = ComplexRegistry(lambda complex_id: f'db:{complex_id}', closed.append, max_open=2)
+    registry.get('a')
+    registry.get('b')
+    assert registry.get('a') == 'db:a'  # Now most recently used
+    registry.get('c')
+    assert closed == ['db:b']
+    registry.close_all()
+    assert sorted(closed) == ['db:a', 'db:b', 'db:c']
@@ -0,0 +1,31 @@
+"""
+Tests for the synthetic ticket generator's CSV output.
+
+Appending to an existing file must continue its ticket IDs, and the
+generator must not need the Flask app to run.
+
+Usage:
+    python -m pytest test_data_generator.py
+"""
+
+import subprocess
+import sys
+import pandas as pd
+from data_generator import TicketGenerator, write_csv
+
+def test_append_continues_after_the_last_ticket_id(tmp_path):
+    path = tmp_path / 'tickets.csv'
+    write_csv(path, 5, TicketGenerator(seed=1))
+    write_csv(path, 3, TicketGenerator(seed=2), append=True)
+    ticket_ids = list(pd.read_csv(path, dtype=str)['Ticket ID'])
+    assert ticket_ids == [f'TKT{number:03d}' for number in range(1, 9)]
+
+def test_explicit_start_id_wins(tmp_path):
+    path = tmp_path / 'tickets.csv'
+    write_csv(path, 2, TicketGenerator(), start=41)
+    assert list(pd.read_csv(path, dtype=str)['Ticket ID']) == ['TKT041', 'TKT042']
+
+def test_generator_does_not_import_the_app():
+    script = "import sys, data_generator; print('enhanced_app' in sys.modules)"
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True)
+    assert result.stdout.strip().splitlines()[-1] == 'False'
@@ -0,0 +1,60 @@
+"""
+Tests for the token-bucket stores behind the submission and lookup limits.
+
+Both stores must charge every key or none, refill at the configured rate,
+and the shared SQLite store must forget buckets that have refilled.
+
+Usage:
+    python -m pytest test_rate_limiter.py
+"""
+
+import sqlite3
+import pytest
+from rate_limiter import MemoryBucketStore, SQLiteBucketStore
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path):
+    return MemoryBucketStore() if request.param == 'memory' else SQLiteBucketStore(str(tmp_path / 'limits.db'))
+
+def test_burst_then_retry_after(store):
+    assert [store.take(['ip:1'], 2, 0.5, now=100)[0] for _ in range(2)] == [True, True]
+    assert store.take(['ip:1'], 2, 0.5, now=100) == (False, 2.0)
+    assert store.take(['ip:1'], 2, 0.5, now=102)[0]
+
+def test_denied_request_charges_no_key(store):
+    store.take(['contact:1'], 1, 0.1, now=100)
+    assert not store.take(['ip:1', 'contact:1'], 1, 0.1, now=100)[0]
+    # ip:1 kept its token although the contact number was out
+    assert store.take(['ip:1'], 1, 0.1, now=100)[0]
+
+def test_sqlite_buckets_are_shared_between_workers(tmp_path):
+    path = str(tmp_path / 'limits.db')
+    first, second = SQLiteBucketStore(path), SQLiteBucketStore(path)
+    assert first.take(['ip:1'], 1, 0.1, now=100)[0]
+    assert not second.take(['ip:1'], 1, 0.1, now=100)[0]
+
+def test_sqlite_prunes_only_refilled_buckets(tmp_path):
+    store = SQLiteBucketStore(str(tmp_path / 'limits.db'))
+    store.take(['lookup:ip:1'], 20, 0.5, now=100)  # Full again at 102
+    store.take(['ip:2'], 5, 0.1, now=100)  # Full again at 110
+    assert store.prune(now=105) == 1
+    rows = sqlite3.connect(store.path).execute("SELECT key FROM rate_limit_buckets").fetchall()
+    assert rows == [('ip:2',)]
+    assert store.prune(now=110) == 1
+
+def test_sqlite_prunes_as_it_goes(tmp_path):
+    store = SQLiteBucketStore(str(tmp_path / 'limits.db'))
+    store.take(['ip:1'], 1, 1.0, now=store.pruned)
+    store.take(['ip:2'], 1, 1.0, now=store.pruned + store.PRUNE_SECONDS)
+    rows = sqlite3.connect(store.path).execute("SELECT key FROM rate_limit_buckets").fetchall()
+    assert rows == [('ip:2',)]
+
+def test_sqlite_upgrades_an_older_file(tmp_path):
+    path = str(tmp_path / 'limits.db')
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE rate_limit_buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)")
+    conn.execute("INSERT INTO rate_limit_buckets VALUES ('ip:1', 0, 100)")
+    conn.commit()
+    store = SQLiteBucketStore(path)
+    assert not store.take(['ip:1'], 1, 0.1, now=101)[0]
+    assert store.prune(now=101) == 1
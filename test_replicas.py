@@ -0,0 +1,48 @@
+"""
+Tests for read-replica routing and the engine hooks that instrument replicas.
+
+db_manager and its replicas are built at import, before the app registers
+its metrics and profiler hooks; registering a hook must still reach them.
+
+Usage:
+    python -m pytest test_replicas.py
+"""
+
+import time
+import pytest
+import database
+from database import DatabaseManager, register_engine_hook, last_write
+
+@pytest.fixture
+def replicated(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, 'ENGINE_HOOKS', [])
+    manager = DatabaseManager(f"sqlite:///{tmp_path / 'primary.db'}",
+                              [f"sqlite:///{tmp_path / 'replica_1.db'}", f"sqlite:///{tmp_path / 'replica_2.db'}"])
+    yield manager
+    for engine in [manager.engine] + manager.replica_engines:
+        engine.dispose()
+
+def test_hooks_registered_later_reach_existing_engines(replicated):
+    seen = []
+    register_engine_hook(seen.append)
+    for engine in [replicated.engine] + replicated.replica_engines:
+        assert engine in seen
+
+def test_hooks_run_on_engines_created_afterwards(replicated, tmp_path):
+    seen = []
+    register_engine_hook(seen.append)
+    seen.clear()
+    later = DatabaseManager(f"sqlite:///{tmp_path / 'complex.db'}")
+    assert seen == [later.engine]
+    later.engine.dispose()
+
+def test_reads_alternate_replicas_until_a_write(replicated):
+    first, second = replicated.replica_engines
+    token = last_write.set(0.0)  # Writes in earlier tests share this thread's context
+    try:
+        assert [replicated.read_engine() for _ in range(3)] == [first, second, first]
+        last_write.set(time.time())
+        assert replicated.reads_from_primary()
+        assert replicated.read_engine() is replicated.engine
+    finally:
+        last_write.reset(token)
@@ -0,0 +1,49 @@
+"""
+Tests that the daily rollup kept up to date on every write matches a
+rebuild, and that archiving moves tickets without losing their history.
+
+Usage:
+    python -m pytest test_rollups.py
+"""
+
+from datetime import date
+from database import TicketDailyRollup
+
+def snapshot(manager):
+    session = manager.SessionLocal()
+    try:
+        return {
+            (row.day, row.block_no, row.problem_type): (row.opened, row.resolved, row.closed)
+            for row in session.query(TicketDailyRollup) if row.opened or row.resolved or row.closed
+        }
+    finally:
+        session.close()
+
+def test_incremental_rollup_matches_a_rebuild(history):
+    incremental = snapshot(history)
+    history.backfill_daily_rollup()
+    assert snapshot(history) == incremental
+
+def test_delete_and_move_match_a_rebuild(history):
+    history.update_ticket_fields('TKT005', {'status': 'Resolved', 'problem_type': 'Plumbing'})
+    history.update_ticket('TKT003', 'block_no', 'C')
+    history.delete_ticket('TKT001')
+    incremental = snapshot(history)
+    history.backfill_daily_rollup()
+    assert snapshot(history) == incremental
+
+def test_daily_totals(history):
+    opened = sum(row['opened'] for row in history.get_daily_rollup(date(2026, 1, 1)))
+    assert opened == 6
+    finished = [(row['resolved'], row['closed']) for row in history.get_daily_rollup(date(2026, 1, 1))]
+    assert tuple(map(sum, zip(*finished))) == (1, 3)
+
+def test_archive_keeps_history_and_the_newest_ticket(history):
+    before = snapshot(history)
+    # TKT001, TKT004 and TKT005 are finished; TKT006 is too, but it holds the newest ID
+    assert history.archive_closed_tickets(0) == 3
+    assert [row['Ticket ID'] for row in history.get_all_tickets()] == ['TKT002', 'TKT003', 'TKT006']
+    assert history.get_ticket_status('TKT004')['Status'] == 'Resolved'
+    assert snapshot(history) == before
+    history.backfill_daily_rollup()
+    assert snapshot(history) == before
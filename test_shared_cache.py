@@ -0,0 +1,84 @@
+"""
+Tests for the read cache: the per-process fallback, version invalidation,
+key hooks and the SQLite shared store.
+
+Usage:
+    python -m pytest test_shared_cache.py
+"""
+
+import time
+import pytest
+import shared_cache
+from shared_cache import MemoryCacheStore, SQLiteCacheStore, cached, invalidate
+
+@pytest.fixture
+def stores(monkeypatch):
+    """No shared store and an empty per-process store, as in the default config"""
+    monkeypatch.setattr(shared_cache, 'cache_store', None)
+    monkeypatch.setattr(shared_cache, 'local_store', MemoryCacheStore(100))
+    monkeypatch.setattr(shared_cache, 'KEY_HOOKS', [])
+
+def counting(namespace, **options):
+    calls = []
+    @cached(namespace, **options)
+    def read(ticket_id):
+        calls.append(ticket_id)
+        return {'Ticket ID': ticket_id, 'calls': len(calls)}
+    return read, calls
+
+def test_local_fallback_caches_without_a_shared_store(stores):
+    read, calls = counting('status', ttl=60, local_fallback=True)
+    assert read('TKT001') == read('TKT001')
+    read('TKT002')
+    assert calls == ['TKT001', 'TKT002']
+
+def test_reads_without_local_fallback_are_not_cached_per_process(stores):
+    read, calls = counting('tickets', ttl=60)
+    read('TKT001')
+    read('TKT001')
+    assert calls == ['TKT001', 'TKT001']
+
+def test_local_entries_expire_after_their_ttl(stores):
+    read, calls = counting('status', ttl=0.05, local_fallback=True)
+    read('TKT001')
+    time.sleep(0.1)
+    read('TKT001')
+    assert calls == ['TKT001', 'TKT001']
+
+def test_invalidate_makes_the_next_read_miss(stores):
+    read, calls = counting('status', ttl=60, local_fallback=True)
+    read('TKT001')
+    invalidate()
+    assert read('TKT001')['calls'] == 2
+
+def test_key_hooks_keep_entries_apart(stores, monkeypatch):
+    source = {'value': 'replica'}
+    monkeypatch.setattr(shared_cache, 'KEY_HOOKS', [lambda: source['value']])
+    read, calls = counting('status', ttl=60, local_fallback=True)
+    read('TKT001')
+    source['value'] = 'primary'
+    read('TKT001')
+    read('TKT001')
+    assert len(calls) == 2
+
+def test_memory_store_drops_oldest_entries_beyond_its_bound():
+    store = MemoryCacheStore(3)
+    for i in range(5):
+        store.set(f'k{i}', b'v', 60)
+    store.set('k2', b'new', 60)
+    assert list(store.entries) == ['k3', 'k4', 'k2']
+    assert store.get('k0') is None and store.get('k2') == b'new'
+
+def test_sqlite_store_versions_and_size_bound(tmp_path):
+    store = SQLiteCacheStore(str(tmp_path / 'cache.db'), max_bytes=25)
+    assert store.version('default') == 0
+    store.bump('default')
+    store.bump('default')
+    assert store.version('default') == 2
+    store.set('soon', b'x' * 10, 10)
+    store.set('later', b'y' * 10, 20)
+    store.set('last', b'z' * 10, 30)  # Over 25 bytes: the entry closest to expiry goes
+    assert store.get('soon') is None
+    assert store.get('later') == b'y' * 10 and store.get('last') == b'z' * 10
+    store.set('huge', b'h' * 100, 60)
+    assert store.get('huge') is None
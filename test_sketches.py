@@ -0,0 +1,53 @@
+"""
+Tests that the sketches kept up to date on every write match a rebuild.
+
+backfill_sketches() and the write paths must agree on what a resolution
+time is (created_at to entering Resolved/Closed), and reopening, moving or
+deleting a ticket must take its contribution back out.
+
+Usage:
+    python -m pytest test_sketches.py
+"""
+
+from sketches import QuantileSketch
+
+def snapshot(manager, with_flats=True):
+    return {
+        (block_no, problem_type): (tickets, quantiles.zero_count, quantiles.buckets,
+                                   flats.to_bytes() if with_flats else None)
+        for block_no, problem_type, tickets, quantiles, flats in manager.get_sketches()
+        if tickets or quantiles.count
+    }
+
+def test_incremental_sketches_match_a_rebuild(history):
+    incremental = snapshot(history)
+    history.backfill_sketches()
+    assert snapshot(history) == incremental
+
+def test_delete_and_move_take_the_ticket_back_out(history):
+    history.update_ticket_fields('TKT005', {'status': 'Resolved', 'problem_type': 'Plumbing'})
+    history.delete_ticket('TKT001')
+    history.delete_ticket('TKT003')
+    incremental = snapshot(history, with_flats=False)
+    history.backfill_sketches()
+    # Distinct-flat registers can't forget a flat; counts and resolution times must match
+    assert snapshot(history, with_flats=False) == incremental
+
+def test_resolution_time_ends_when_the_status_was_entered(history):
+    before = {key: dict(value[2]) for key, value in snapshot(history).items()}
+    history.update_ticket('TKT006', 'notes', 'Follow-up call')
+    history.update_ticket('TKT004', 'assigned_to', 'Ravi')
+    assert {key: dict(value[2]) for key, value in snapshot(history).items()} == before
+
+def test_quantile_remove_undoes_add():
+    sketch = QuantileSketch()
+    for value in (0, 0.5, 3, 3, 40):
+        sketch.add(value)
+    for value in (0, 3, 40):
+        sketch.remove(value)
+    expected = QuantileSketch()
+    for value in (0.5, 3):
+        expected.add(value)
+    assert (sketch.zero_count, sketch.buckets) == (expected.zero_count, expected.buckets)
+    sketch.remove(1000)  # Never added: nothing to take back
+    assert sketch.count == 2
@@ -0,0 +1,96 @@
+"""
+Tests for ticket ID allocation and the delta-sync change feed.
+
+A deleted ticket's ID must never be handed out again: the feed would then
+carry an upsert and a delete for the same ID, and a consumer applying them in
+order could delete the live ticket.
+
+Usage:
+    python -m pytest test_sync.py
+"""
+
+from datetime import datetime, timedelta
+from database import Ticket
+
+def apply_changes(changes, replica=None):
+    """What a consumer holds after applying the feed in order"""
+    replica = dict(replica or {})
+    for change in changes:
+        if change['op'] == 'upsert':
+            replica[change['ticket_id']] = change['ticket']['Status']
+        else:
+            replica.pop(change['ticket_id'], None)
+    return replica
+
+def all_changes(manager, limit=1000):
+    changes, _, _, _ = manager.get_changes((datetime.min, 0), (datetime.min, 0), limit, settle_seconds=0)
+    return changes
+
+def test_deleted_newest_ticket_id_is_not_reused(manager, ticket_data):
+    assert manager.add_new_ticket(ticket_data(Flat_No='101')) == 'TKT001'
+    assert manager.add_new_ticket(ticket_data(Flat_No='102')) == 'TKT002'
+    manager.update_ticket('TKT002', 'status', 'Resolved')
+    manager.delete_ticket('TKT002')
+    assert manager.add_new_ticket(ticket_data(Flat_No='103')) == 'TKT003'
+    assert manager.get_next_ticket_id() == 'TKT004'
+
+def test_highest_deleted_id_wins_over_newer_deletions(manager, ticket_data):
+    for flat in ('101', '102', '103'):
+        manager.add_new_ticket(ticket_data(Flat_No=flat))
+    manager.delete_ticket('TKT003')
+    manager.delete_ticket('TKT001')
+    assert manager.get_next_ticket_id() == 'TKT004'
+
+def test_archived_ids_are_not_reused(manager, ticket_data):
+    for flat in ('101', '102', '103'):
+        manager.add_new_ticket(ticket_data(Flat_No=flat))
+    session = manager.SessionLocal()
+    session.query(Ticket).update({'status': 'Closed', 'updated_at': datetime.utcnow() - timedelta(days=400)})
+    session.commit()
+    session.close()
+    assert manager.archive_closed_tickets(365) == 2
+    manager.delete_ticket('TKT003')
+    assert manager.get_next_ticket_id() == 'TKT004'
+
+def test_new_tickets_are_stamped_with_server_time(manager, ticket_data):
+    before = datetime.utcnow()
+    manager.add_new_ticket(ticket_data(Created_At='2020-01-01 00:00:00', Updated_At='2020-01-01 00:00:00'))
+    session = manager.SessionLocal()
+    ticket = session.query(Ticket).one()
+    session.close()
+    assert before <= ticket.created_at == ticket.updated_at <= datetime.utcnow()
+
+def test_feed_replays_delete_then_resubmit(manager, ticket_data):
+    manager.add_new_ticket(ticket_data(Flat_No='101'))
+    manager.add_new_ticket(ticket_data(Flat_No='102'))
+    manager.update_ticket('TKT002', 'status', 'Resolved')
+    manager.delete_ticket('TKT002')
+    manager.add_new_ticket(ticket_data(Flat_No='103'))
+    changes = all_changes(manager)
+    assert [(change['op'], change['ticket_id']) for change in changes] == [
+        ('upsert', 'TKT001'), ('delete', 'TKT002'), ('upsert', 'TKT003')]
+    assert apply_changes(changes) == {'TKT001': 'Open', 'TKT003': 'Open'}
+
+def test_feed_pages_resume_from_cursor(manager, ticket_data):
+    for flat in range(5):
+        manager.add_new_ticket(ticket_data(Flat_No=str(flat)))
+    manager.delete_ticket('TKT002')
+    manager.update_ticket('TKT004', 'notes', 'Plumber visited')
+    ticket_cursor = tombstone_cursor = (datetime.min, 0)
+    pages = []
+    while True:
+        changes, ticket_cursor, tombstone_cursor, has_more = manager.get_changes(
+            ticket_cursor, tombstone_cursor, 2, settle_seconds=0)
+        pages.append(changes)
+        if not has_more:
+            break
+    replayed = [change for page in pages for change in page]
+    assert all(len(page) <= 2 for page in pages)
+    assert [change['ticket_id'] for change in replayed] == ['TKT001', 'TKT003', 'TKT005', 'TKT002', 'TKT004']
+    assert apply_changes(replayed) == {'TKT001': 'Open', 'TKT003': 'Open', 'TKT004': 'Open', 'TKT005': 'Open'}
+
+def test_feed_holds_back_unsettled_changes(manager, ticket_data):
+    manager.add_new_ticket(ticket_data())
+    changes, ticket_cursor, _, _ = manager.get_changes((datetime.min, 0), (datetime.min, 0), 10, settle_seconds=60)
+    assert changes == []
+    assert ticket_cursor == (datetime.min, 0)
@@ -0,0 +1,61 @@
+"""
+Tests for the append-only ticket_events log.
+
+Every event is stamped with server time when it is written, so a ticket's
+history reads in the order things happened, and an ID is never shared by
+two tickets' histories.
+
+Usage:
+    python -m pytest test_ticket_events.py
+"""
+
+from database import current_actor
+
+def fields(events):
+    return [(event['field'], event['old_value'], event['new_value']) for event in events]
+
+def test_history_is_in_write_order_with_old_and_new_values(manager, ticket_data):
+    ticket_id = manager.add_new_ticket(ticket_data(Status='Open'))
+    manager.update_ticket_fields(ticket_id, {'status': 'In Progress', 'assigned_to': 'Ravi'})
+    manager.update_ticket(ticket_id, 'status', 'Resolved')
+    manager.update_ticket(ticket_id, 'status', 'Resolved')  # No change, no event
+    manager.delete_ticket(ticket_id)
+    assert fields(manager.get_ticket_events(ticket_id)) == [
+        ('created', None, 'Open'),
+        ('status', 'Open', 'In Progress'),
+        ('assigned_to', 'Unassigned', 'Ravi'),
+        ('status', 'In Progress', 'Resolved'),
+        ('deleted', 'Resolved', None)
+    ]
+
+def test_created_event_uses_server_time_not_the_ticket_timestamp(manager, ticket_data):
+    # add_ticket keeps the caller's timestamps (imports); its created event must still sort first
+    manager.add_ticket(ticket_data(Ticket_ID='TKT001', Created_At='2020-01-01 00:00:00'))
+    manager.update_ticket('TKT001', 'status', 'Closed')
+    events = manager.get_ticket_events('TKT001')
+    assert [event['field'] for event in events] == ['created', 'status']
+    assert events[0]['ts'] > '2020-01-01 00:00:00'
+
+def test_events_record_the_acting_user(manager, ticket_data):
+    token = current_actor.set('resident')
+    try:
+        ticket_id = manager.add_new_ticket(ticket_data())
+    finally:
+        current_actor.reset(token)
+    token = current_actor.set('admin')
+    try:
+        manager.update_ticket(ticket_id, 'notes', 'Called back')
+    finally:
+        current_actor.reset(token)
+    assert [(event['field'], event['actor']) for event in manager.get_ticket_events(ticket_id)] == [
+        ('created', 'resident'), ('notes', 'admin')]
+
+def test_resubmitted_ticket_has_its_own_history(manager, ticket_data):
+    manager.add_new_ticket(ticket_data(Flat_No='101'))
+    old_id = manager.add_new_ticket(ticket_data(Flat_No='102'))
+    manager.update_ticket(old_id, 'status', 'Resolved')
+    manager.delete_ticket(old_id)
+    new_id = manager.add_new_ticket(ticket_data(Flat_No='103'))
+    assert new_id != old_id
+    assert fields(manager.get_ticket_events(new_id)) == [('created', None, 'Open')]
+    assert [event['field'] for event in manager.get_ticket_events(old_id)] == ['created', 'status', 'deleted']
@@ -0,0 +1,52 @@
+"""
+Tests for TicketRow, the compact row list reads return instead of dicts.
+
+A row must behave like the dict Ticket.to_dict() builds wherever templates,
+the JSON encoder and API callers use one.
+
+Usage:
+    python -m pytest test_ticket_rows.py
+"""
+
+import json
+import pickle
+from datetime import date, datetime
+import enhanced_app
+from ticket_rows import TicketRow, row_layout, tickets_frame
+
+COLUMNS = ['ticket_id', 'status', 'assigned_to', 'due_date', 'updated_at']
+EXPECTED = {
+    'Ticket ID': 'TKT001',
+    'Status': 'Open',
+    'Assigned To': 'Unassigned',
+    'Due Date': '2026-01-12',
+    'Updated At': '2026-01-05 08:00:00'
+}
+
+def make_row(values=('TKT001', 'Open', None, date(2026, 1, 12), datetime(2026, 1, 5, 8, 0, 0, 250000))):
+    return TicketRow(row_layout(COLUMNS), values)
+
+def test_row_reads_like_a_dict():
+    row = make_row()
+    assert list(row.keys()) == list(EXPECTED)
+    assert list(row.values()) == list(EXPECTED.values())
+    assert list(row.items()) == list(EXPECTED.items())
+    assert dict(row) == EXPECTED
+    assert row == EXPECTED
+    assert row.get('Status') == 'Open' and row.get('Notes', '-') == '-'
+    assert 'Due Date' in row and 'Notes' not in row
+
+def test_sqlite_text_values_format_like_datetimes():
+    row = make_row(('TKT001', 'Open', '', '2026-01-12', '2026-01-05 08:00:00.250000'))
+    assert dict(row) == EXPECTED
+
+def test_row_serializes_to_json_and_pickle():
+    row = make_row()
+    assert json.loads(enhanced_app.app.json.dumps([row])) == [EXPECTED]
+    assert dict(pickle.loads(pickle.dumps(row))) == EXPECTED
+
+def test_frame_matches_row_values():
+    rows = [make_row(), make_row(('TKT002', 'Closed', 'Ravi', None, None))]
+    frame = tickets_frame(rows)
+    assert list(frame.columns) == list(EXPECTED)
+    assert frame.to_dict('records') == [dict(row) for row in rows]
@@ -0,0 +1,71 @@
+"""
+Tests for the group-commit write queue.
+
+Tickets submitted together must share one transaction, a bad ticket must
+fail on its own, and a request that times out must not leave its ticket
+behind to be stored after the resident was told to try again.
+
+Usage:
+    python -m pytest test_write_queue.py
+"""
+
+import threading
+import pytest
+from write_queue import WriteQueue
+
+class Gate:
+    """Wraps manager.add_tickets: records each batch and holds it until released"""
+
+    def __init__(self, manager, hold=False):
+        self.add_tickets = manager.add_tickets
+        self.batches = []
+        self.entered = threading.Event()
+        self.released = threading.Event()
+        if not hold:
+            self.released.set()
+        manager.add_tickets = self
+
+    def __call__(self, tickets, actors):
+        self.batches.append(len(tickets))
+        self.entered.set()
+        self.released.wait(5)
+        return self.add_tickets(tickets, actors)
+
+def test_concurrent_submissions_share_a_batch(manager, ticket_data):
+    gate = Gate(manager)
+    writes = WriteQueue(max_batch=10, max_wait_ms=500)
+    futures = [writes.submit(manager, ticket_data(Flat_No=str(100 + number)), 'resident')
+               for number in range(1, 6)]
+    assert sorted(future.result(5) for future in futures) == [f'TKT{number:03d}' for number in range(1, 6)]
+    assert gate.batches == [5]
+
+def test_bad_ticket_fails_alone(manager, ticket_data):
+    writes = WriteQueue(max_batch=10, max_wait_ms=500)
+    bad = ticket_data()
+    del bad['Flat No']
+    futures = [writes.submit(manager, ticket, 'resident') for ticket in (ticket_data(), bad, ticket_data())]
+    assert [futures[0].result(5), futures[2].result(5)] == ['TKT001', 'TKT002']
+    with pytest.raises(Exception):
+        futures[1].result(5)
+    assert len(manager.get_all_tickets()) == 2
+
+def test_timed_out_ticket_is_never_stored(manager, ticket_data):
+    gate = Gate(manager, hold=True)
+    writes = WriteQueue(max_batch=1, max_wait_ms=0)
+    first = writes.submit(manager, ticket_data(Flat_No='101'), 'resident')
+    assert gate.entered.wait(5)
+    # The writer is busy with the first ticket; the second is still queued
+    with pytest.raises(TimeoutError):
+        writes.add(manager, ticket_data(Flat_No='102'), 'resident', timeout=0.05)
+    gate.released.set()
+    assert first.result(5) == 'TKT001'
+    writes.submit(manager, ticket_data(Flat_No='103'), 'resident').result(5)
+    assert gate.batches == [1, 1]
+    assert len(manager.get_all_tickets()) == 2
+
+def test_timeout_during_write_waits_for_the_outcome(manager, ticket_data):
+    gate = Gate(manager, hold=True)
+    writes = WriteQueue(max_batch=1, max_wait_ms=0)
+    threading.Timer(0.2, gate.released.set).start()
+    # Times out while its batch is being written, so it reports the stored ID
+    assert writes.add(manager, ticket_data(), 'resident', timeout=0.05) == 'TKT001'
@@ -0,0 +1,16 @@
+"""
+Ticket form options and the CSV layout.
+
+Shared by the app and tools such as data_generator.py, which need the same
+blocks, problem types, statuses and staff without importing the Flask app
+(and opening its database) just for these lists.
+"""
+
+CSV_HEADERS = ['Ticket ID', 'Flat No', 'Block No', 'Problem Type', 'Date Raised', 'Contact Number', 'Description', 'Status', 'Assigned To', 'Due Date', 'Action Taken', 'Notes', 'Created At', 'Updated At']
+
+# Enhanced options
+BLOCK_OPTIONS = ['A', 'B', 'C', 'D', 'P', 'Q', 'R', 'S', 'T', 'U', 'General Area', 'Basement Parking', 'Podium', 'Club House']
+PROBLEM_TYPES = ['Plumbing', 'Electrical', 'Civil', 'Light', 'Flooring', 'AC/Heating', 'Water Supply', 'Drainage', 'Painting', 'Door/Window', 'Elevator', 'Security', 'Cleaning', 'Other']
+STATUS_OPTIONS = ['Open', 'In Progress', 'Resolved', 'Closed', 'On Hold']
+# Priority system removed - all tickets are equal priority
+STAFF_MEMBERS = ['Unassigned', 'John Doe (Plumber)', 'Jane Smith (Electrician)', 'Mike Johnson (Maintenance)', 'Sarah Wilson (Cleaner)']
@@ -0,0 +1,126 @@
+"""
+Compact ticket rows for list reads.
+
+DatabaseManager.get_all_tickets() returns TicketRow objects instead of the
+14-key dicts Ticket.to_dict() builds. A row holds only the driver's value
+tuple and a layout shared by every row of the query, yet reads like that
+dict: row['Due Date'] formats the date when a template or the JSON encoder
+asks for it, not up front. tickets_frame() turns a list of rows into the
+CSV-header DataFrame used by exports column by column, without building a
+dict per row.
+"""
+
+from collections.abc import Mapping
+import pandas as pd
+
+# Ticket columns in CSV/export order and their CSV headers
+TICKET_HEADERS = {
+    'ticket_id': 'Ticket ID',
+    'flat_no': 'Flat No',
+    'block_no': 'Block No',
+    'problem_type': 'Problem Type',
+    'date_raised': 'Date Raised',
+    'contact_number': 'Contact Number',
+    'description': 'Description',
+    'status': 'Status',
+    'assigned_to': 'Assigned To',
+    'due_date': 'Due Date',
+    'action_taken': 'Action Taken',
+    'notes': 'Notes',
+    'created_at': 'Created At',
+    'updated_at': 'Updated At'
+}
+DATE_FORMATS = {
+    'date_raised': '%Y-%m-%d',
+    'due_date': '%Y-%m-%d',
+    'created_at': '%Y-%m-%d %H:%M:%S',
+    'updated_at': '%Y-%m-%d %H:%M:%S'
+}
+# Length of a formatted date: ISO text from the driver (SQLite) is just truncated
+DATE_WIDTHS = {'%Y-%m-%d': 10, '%Y-%m-%d %H:%M:%S': 19}
+# Shown instead of NULL / empty, as Ticket.to_dict() does
+EMPTY_DEFAULTS = {'description': '', 'assigned_to': 'Unassigned', 'action_taken': '', 'notes': ''}
+
+def format_value(name, value):
+    """One column value as Ticket.to_dict() would show it"""
+    fmt = DATE_FORMATS.get(name)
+    if fmt:
+        if not value:
+            return ''
+        if isinstance(value, str):
+            return value[:DATE_WIDTHS[fmt]]
+        return value.strftime(fmt)
+    if name in EMPTY_DEFAULTS:
+        return value or EMPTY_DEFAULTS[name]
+    return value
+
+def format_column(name, values):
+    """A whole column of values formatted like format_value()"""
+    fmt = DATE_FORMATS.get(name)
+    if fmt:
+        first = next((value for value in values if value), None)
+        if first is None or isinstance(first, str):
+            # Plain slicing beats both .str accessors and re-parsing here
+            width = DATE_WIDTHS[fmt]
+            return [value[:width] if value else '' for value in values]
+        return pd.to_datetime(pd.Series(values), errors='coerce').dt.strftime(fmt).fillna('')
+    if name in EMPTY_DEFAULTS:
+        default = EMPTY_DEFAULTS[name]
+        return [value or default for value in values]
+    return values
+
+class TicketRowLayout:
+    """Column order of one query, shared by all of its rows"""
+    __slots__ = ('columns', 'positions')
+
+    def __init__(self, columns):
+        self.columns = tuple(columns)
+        self.positions = {TICKET_HEADERS[name]: (index, name) for index, name in enumerate(self.columns)}
+
+    def __reduce__(self):
+        return (row_layout, (self.columns,))
+
+_layouts = {}
+
+def row_layout(columns):
+    """Shared layout for a column list"""
+    columns = tuple(columns)
+    layout = _layouts.get(columns)
+    if layout is None:
+        layout = _layouts[columns] = TicketRowLayout(columns)
+    return layout
+
+class TicketRow(Mapping):
+    """One ticket's raw column values, read like the dict Ticket.to_dict() builds"""
+    # _values, not values: the slot would hide Mapping.values()
+    __slots__ = ('layout', '_values')
+
+    def __init__(self, layout, values):
+        self.layout = layout
+        self._values = values
+
+    def __getitem__(self, header):
+        index, name = self.layout.positions[header]
+        return format_value(name, self._values[index])
+
+    def __iter__(self):
+        return (TICKET_HEADERS[name] for name in self.layout.columns)
+
+    def __len__(self):
+        return len(self.layout.columns)
+
+    def __reduce__(self):
+        return (TicketRow, (self.layout, self._values))
+
+    def __repr__(self):
+        return f'TicketRow({dict(self)!r})'
+
+def tickets_frame(tickets):
+    """DataFrame with CSV headers from a list of TicketRow (built column-wise) or plain dicts"""
+    if not tickets or not isinstance(tickets[0], TicketRow):
+        return pd.DataFrame(tickets)
+    columns = tickets[0].layout.columns
+    return pd.DataFrame({
+        TICKET_HEADERS[name]: format_column(name, values)
+        for name, values in zip(columns, zip(*[row._values for row in tickets]))
+    })
@@ -0,0 +1,100 @@
+"""
+Group commit for new ticket submissions.
+
+With WRITE_QUEUE=true, /submit hands its ticket to an in-process queue
+instead of opening its own transaction. A single writer thread collects
+submissions for up to WRITE_QUEUE_MAX_WAIT_MS (or until WRITE_QUEUE_MAX_BATCH
+are waiting) and stores them with DatabaseManager.add_tickets() in one
+transaction, which also allocates their ticket IDs. Each request waits on
+its own future for its ID, so a burst of residents costs one commit (and one
+SQLite write lock) per batch instead of one per ticket.
+
+A request that times out before the writer picks its ticket up cancels it,
+so "please try again" never leaves a copy behind to be stored later; once
+the ticket's batch is being written, the request waits for the outcome.
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+
+# Write queue configuration (override with environment variables)
+WRITE_QUEUE_CONFIG = {
+    'enabled': os.getenv('WRITE_QUEUE', 'false').lower() == 'true',
+    'max_batch': int(os.getenv('WRITE_QUEUE_MAX_BATCH', '50')),
+    'max_wait_ms': float(os.getenv('WRITE_QUEUE_MAX_WAIT_MS', '5')),
+    'timeout': float(os.getenv('WRITE_QUEUE_TIMEOUT', '10'))  # Seconds a request waits for its ID
+}
+
+class WriteQueue:
+    """Coalesces new tickets into batched transactions on a writer thread"""
+
+    def __init__(self, max_batch=WRITE_QUEUE_CONFIG['max_batch'], max_wait_ms=WRITE_QUEUE_CONFIG['max_wait_ms']):
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.pending = queue.Queue()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def submit(self, manager, ticket_data, actor):
+        """Queue a new ticket for manager's database; the future resolves to its ticket ID"""
+        future = Future()
+        self._start()
+        self.pending.put((manager, ticket_data, actor, future))
+        return future
+
+    def add(self, manager, ticket_data, actor, timeout=WRITE_QUEUE_CONFIG['timeout']):
+        """Store a ticket through the queue and return its ID; raises if it was not stored"""
+        future = self.submit(manager, ticket_data, actor)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            if future.cancel():
+                raise
+        # Already in a batch being written: it will commit or fail, so report which
+        return future.result()
+
+    def _start(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.run, name='write-queue', daemon=True)
+                self.thread.start()
+
+    def run(self):
+        while True:
+            batch = [self.pending.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self.flush(batch)
+
+    def flush(self, batch):
+        # One transaction per database (complexes have their own)
+        by_manager = {}
+        for item in batch:
+            if not item[3].set_running_or_notify_cancel():
+                continue  # Its request timed out and gave up on it
+            by_manager.setdefault(id(item[0]), []).append(item)
+        for items in by_manager.values():
+            manager = items[0][0]
+            try:
+                results = manager.add_tickets([item[1] for item in items], [item[2] for item in items])
+            except Exception as e:
+                print(f"Error writing ticket batch: {str(e)}")
+                results = [e] * len(items)
+            # add_tickets isolates bad tickets: each future gets its own ID or error
+            for item, result in zip(items, results):
+                if isinstance(result, Exception):
+                    item[3].set_exception(result)
+                else:
+                    item[3].set_result(result)
+
+write_queue = WriteQueue() if WRITE_QUEUE_CONFIG['enabled'] else None